@@ -0,0 +1,249 @@
+"""
+Motor de especificación de páginas
+Representa selecciones como listas de intervalos sin expandir cada página
+"""
+from typing import Iterator, List, NamedTuple, Optional
+from heapq import merge
+from itertools import chain
+import re
+
+
+# Extremo de un rango: número (negativo = desde el final) o "last"
+_ENDPOINT = r'(last|ultima|última|-?\d+)'
+_TERM_RE = re.compile(
+    rf'^{_ENDPOINT}(?:\s*-\s*{_ENDPOINT})?(?:\s*:\s*(\d+))?$',
+    re.IGNORECASE
+)
+
+_ODD = ('odd', 'impares')
+_EVEN = ('even', 'pares')
+
+
+class _Term(NamedTuple):
+    """Término sin resolver de una especificación"""
+    start: int       # Página inicial (negativa = relativa al final)
+    end: int         # Página final (negativa = relativa al final)
+    step: int        # Paso (siempre positivo)
+    clip: bool       # True = recortar al documento (odd/even) en lugar de fallar
+
+
+class PageSelection:
+    """
+    Selección de páginas basada en intervalos
+    
+    Sintaxis (términos separados por comas):
+        7           Página individual
+        5-8         Rango
+        8-5         Rango inverso (8, 7, 6, 5)
+        1-20:2      Rango con paso (1, 3, 5, ... 19)
+        odd, even   Páginas impares / pares de todo el documento
+        last        Última página
+        -1, -3--1   Índices negativos contados desde el final (-1 = última)
+    
+    El coste de validar y recorrer los rangos es proporcional al número de
+    términos, no al número de páginas: las páginas se generan bajo demanda.
+    """
+    
+    def __init__(self, terms: List[_Term], spec: str = ''):
+        self._terms = terms
+        self.spec = spec
+    
+    @classmethod
+    def parse(cls, spec: str) -> 'PageSelection':
+        """
+        Parsea una especificación de páginas
+        
+        Args:
+            spec: Especificación (ej: "1,3,5-8,12,last")
+        
+        Returns:
+            Selección sin resolver
+        
+        Raises:
+            ValueError: Si el formato es inválido
+        """
+        if not spec or not spec.strip():
+            raise ValueError("La especificación no puede estar vacía")
+        
+        terms = []
+        for part in spec.split(','):
+            part = part.strip()
+            lowered = part.lower()
+            
+            if lowered in _ODD:
+                terms.append(_Term(1, -1, 2, True))
+                continue
+            if lowered in _EVEN:
+                terms.append(_Term(2, -1, 2, True))
+                continue
+            
+            match = _TERM_RE.match(part)
+            if not match:
+                raise ValueError(f"Término inválido: '{part}'")
+            
+            start = cls._parse_endpoint(match.group(1))
+            end = cls._parse_endpoint(match.group(2)) if match.group(2) else start
+            step = int(match.group(3)) if match.group(3) else 1
+            
+            if start == 0 or end == 0:
+                raise ValueError(f"Las páginas empiezan en 1: '{part}'")
+            if step < 1:
+                raise ValueError(f"El paso debe ser 1 o mayor: '{part}'")
+            
+            terms.append(_Term(start, end, step, False))
+        
+        return cls(terms, spec)
+    
+    @staticmethod
+    def _parse_endpoint(value: str) -> int:
+        """Convierte un extremo a entero (last = -1)"""
+        if value.lower() in ('last', 'ultima', 'última'):
+            return -1
+        return int(value)
+    
+    @property
+    def is_absolute(self) -> bool:
+        """True si no depende del número total de páginas"""
+        return all(t.start > 0 and t.end > 0 and not t.clip for t in self._terms)
+    
+    def ranges(self, total_pages: Optional[int] = None) -> List[range]:
+        """
+        Resuelve los términos a rangos de páginas absolutas (1-indexed)
+        
+        Args:
+            total_pages: Número de páginas del documento (obligatorio si hay
+                términos relativos como "last", negativos, odd o even)
+        
+        Returns:
+            Lista de rangos en el orden de la especificación
+        
+        Raises:
+            ValueError: Si alguna página queda fuera del documento
+        """
+        if total_pages is None and not self.is_absolute:
+            raise ValueError("Se necesita el número de páginas para resolver la especificación")
+        
+        resolved = []
+        for term in self._terms:
+            start = term.start if term.start > 0 else total_pages + 1 + term.start
+            end = term.end if term.end > 0 else total_pages + 1 + term.end
+            
+            if term.clip:
+                if start <= end:
+                    resolved.append(range(start, end + 1, term.step))
+                continue
+            
+            for page in (start, end):
+                if page < 1 or (total_pages is not None and page > total_pages):
+                    limit = f" y {total_pages}" if total_pages is not None else ""
+                    raise ValueError(f"La página {page} no es válida (debe estar entre 1{limit})")
+            
+            if start <= end:
+                resolved.append(range(start, end + 1, term.step))
+            else:
+                resolved.append(range(start, end - 1, -term.step))
+        
+        return resolved
+    
+    def merged(self, total_pages: Optional[int] = None) -> List[range]:
+        """
+        Normaliza la selección a rangos ascendentes
+        
+        Los rangos continuos se ordenan y se fusionan cuando se solapan o son
+        contiguos; los rangos con paso se conservan aparte (ascendentes).
+        
+        Returns:
+            Lista de rangos ascendentes; los continuos quedan disjuntos
+        """
+        continuous = []
+        stepped = []
+        
+        for r in self.ranges(total_pages):
+            if not r:
+                continue
+            low, high = min(r[0], r[-1]), max(r[0], r[-1])
+            if abs(r.step) == 1 or len(r) == 1:
+                continuous.append((low, high))
+            else:
+                stepped.append(range(low, high + 1, abs(r.step)))
+        
+        result = []
+        for low, high in sorted(continuous):
+            if result and low <= result[-1].stop:
+                last = result[-1]
+                result[-1] = range(last.start, max(last.stop, high + 1))
+            else:
+                result.append(range(low, high + 1))
+        
+        return result + stepped
+    
+    def iter_pages(
+        self,
+        total_pages: Optional[int] = None,
+        keep_order: bool = False
+    ) -> Iterator[int]:
+        """
+        Recorre las páginas seleccionadas bajo demanda
+        
+        Args:
+            total_pages: Número de páginas del documento
+            keep_order: True = orden de la especificación (con repeticiones);
+                False = orden ascendente sin duplicados
+        
+        Returns:
+            Iterador de números de página (1-indexed)
+        """
+        if keep_order:
+            return chain.from_iterable(self.ranges(total_pages))
+        
+        runs = self.merged(total_pages)
+        disjoint = self._disjoint(runs)
+        if disjoint is not None:
+            # Rangos disjuntos y ordenados: basta con encadenarlos
+            return chain.from_iterable(disjoint)
+        return self._unique(merge(*runs))
+    
+    @staticmethod
+    def _disjoint(runs: List[range]) -> Optional[List[range]]:
+        """
+        Ordena los rangos si no se solapan entre sí
+        
+        Returns:
+            Rangos ordenados por su primera página, o None si el intervalo de
+            algún rango se solapa con el del siguiente
+        """
+        ordered = sorted(runs, key=lambda r: r[0])
+        for previous, current in zip(ordered, ordered[1:]):
+            if current[0] <= previous[-1]:
+                return None
+        return ordered
+    
+    @staticmethod
+    def _unique(pages: Iterator[int]) -> Iterator[int]:
+        """Descarta repeticiones consecutivas de una secuencia ordenada"""
+        previous = None
+        for page in pages:
+            if page != previous:
+                yield page
+                previous = page
+    
+    def count(self, total_pages: Optional[int] = None, keep_order: bool = False) -> int:
+        """
+        Cuenta las páginas seleccionadas
+        
+        El cálculo es proporcional al número de rangos salvo que haya rangos
+        con paso que se solapen con otros (ej: "1-10,odd").
+        
+        Returns:
+            Número de páginas
+        """
+        if keep_order:
+            return sum(len(r) for r in self.ranges(total_pages))
+        
+        runs = self.merged(total_pages)
+        if self._disjoint(runs) is not None:
+            return sum(len(r) for r in runs)
+        return sum(1 for _ in self._unique(merge(*runs)))
+    
+    def __repr__(self) -> str:
+        return f"PageSelection({self.spec!r})"
@@ -8,6 +8,13 @@ from .pdf_converter import PDFConverter
 from .pdf_security import PDFSecurity
 from .ocr_service import OCRService
 from .batch_processor import BatchProcessor
+from .pdf_rasterizer import PDFRasterizer
+from .text_layer_scanner import TextLayerScanner
+from .ocr_cache import OCRCache
+from .image_preprocessor import ImagePreprocessor
+from .text_index import TextIndex
+from .office_converter import OfficeConverter
+from .pdf_writer import StreamingPDFWriter
 
 __all__ = [
     'PDFMerger',
@@ -16,5 +23,12 @@ __all__ = [
     'PDFConverter',
     'PDFSecurity',
     'OCRService',
-    'BatchProcessor'
+    'BatchProcessor',
+    'PDFRasterizer',
+    'TextLayerScanner',
+    'OCRCache',
+    'ImagePreprocessor',
+    'TextIndex',
+    'OfficeConverter',
+    'StreamingPDFWriter'
 ]
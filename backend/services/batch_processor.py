@@ -4,9 +4,61 @@ Aplica una operación a múltiples archivos
 """
 from typing import List, Callable, Optional, Dict, Any
 from pathlib import Path
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
 import traceback
 
 
+def _process_single_file(
+    file_path: str,
+    operation_func: Callable,
+    operation_config: Dict[str, Any],
+    output_dir: str
+) -> Dict[str, Any]:
+    """
+    Procesa un único archivo del lote
+    
+    Se define a nivel de módulo para que pueda enviarse a procesos de trabajo.
+    
+    Args:
+        file_path: Ruta del archivo a procesar
+        operation_func: Función de la operación
+        operation_config: Configuración de la operación
+        output_dir: Directorio de salida
+        
+    Returns:
+        Diccionario con el resultado del archivo
+    """
+    file_name = Path(file_path).name
+    result = {
+        'file': file_name,
+        'file_path': file_path,
+        'success': False,
+        'output_path': None,
+        'error': None
+    }
+    
+    try:
+        # Generar ruta de salida
+        output_path = str(Path(output_dir) / f"processed_{file_name}")
+        
+        # Ejecutar operación
+        operation_result = operation_func(
+            file_path,
+            output_path,
+            **operation_config
+        )
+        
+        result['success'] = True
+        result['output_path'] = output_path
+        result['details'] = operation_result
+        
+    except Exception as e:
+        result['error'] = str(e)
+        result['traceback'] = traceback.format_exc()
+    
+    return result
+
+
 class BatchProcessor:
     """Servicio para procesamiento por lotes de PDFs"""
     
@@ -16,17 +68,27 @@ class BatchProcessor:
         operation_func: Callable,
         operation_config: Dict[str, Any],
         output_dir: str,
-        progress_callback: Optional[Callable[[int, str, Dict], None]] = None
+        progress_callback: Optional[Callable[[int, str, Dict], None]] = None,
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None
     ) -> dict:
         """
         Procesa múltiples archivos con una operación específica
         
+        Por defecto los archivos se procesan uno a uno. Si se indica `workers`
+        (> 1) o un `executor`, los archivos se reparten entre procesos y el
+        progreso se reporta a medida que cada archivo termina (no necesariamente
+        en el orden de entrada). En ese modo `operation_func` debe poder
+        serializarse (funciones de módulo o métodos estáticos de servicios).
+        
         Args:
             file_paths: Lista de rutas de archivos a procesar
             operation_func: Función de la operación (ej: PDFMerger.merge_pdfs)
             operation_config: Configuración de la operación
             output_dir: Directorio de salida
             progress_callback: Función para reportar progreso (percent, message, result)
+            workers: Número de procesos en paralelo (None o 1 = secuencial)
+            executor: Executor externo a reutilizar (no se cierra al terminar)
             
         Returns:
             Diccionario con resultados:
@@ -42,53 +104,45 @@ class BatchProcessor:
         if not file_paths:
             raise ValueError("No hay archivos para procesar")
         
+        if workers is not None and workers < 1:
+            raise ValueError("El número de procesos debe ser 1 o mayor")
+        
         # Crear directorio de salida
         Path(output_dir).mkdir(exist_ok=True, parents=True)
         
         total_files = len(file_paths)
-        results = []
-        successful = 0
-        failed = 0
-        
-        # Procesar cada archivo
-        for i, file_path in enumerate(file_paths):
-            file_name = Path(file_path).name
-            result = {
-                'file': file_name,
-                'file_path': file_path,
-                'success': False,
-                'output_path': None,
-                'error': None
-            }
+        
+        if executor is not None or (workers and workers > 1):
+            results = BatchProcessor._process_parallel(
+                file_paths,
+                operation_func,
+                operation_config,
+                output_dir,
+                progress_callback,
+                workers,
+                executor
+            )
+        else:
+            results = []
             
-            try:
-                # Generar ruta de salida
-                output_path = str(Path(output_dir) / f"processed_{file_name}")
-                
-                # Ejecutar operación
-                operation_result = operation_func(
+            # Procesar cada archivo
+            for i, file_path in enumerate(file_paths):
+                result = _process_single_file(
                     file_path,
-                    output_path,
-                    **operation_config
+                    operation_func,
+                    operation_config,
+                    output_dir
                 )
+                results.append(result)
                 
-                result['success'] = True
-                result['output_path'] = output_path
-                result['details'] = operation_result
-                successful += 1
-                
-            except Exception as e:
-                result['error'] = str(e)
-                result['traceback'] = traceback.format_exc()
-                failed += 1
-            
-            results.append(result)
-            
-            # Reportar progreso
-            if progress_callback:
-                progress = int((i + 1) / total_files * 100)
-                message = f"Procesando {i+1}/{total_files}: {file_name}"
-                progress_callback(progress, message, result)
+                # Reportar progreso
+                if progress_callback:
+                    progress = int((i + 1) / total_files * 100)
+                    message = f"Procesando {i+1}/{total_files}: {result['file']}"
+                    progress_callback(progress, message, result)
+        
+        successful = sum(1 for r in results if r['success'])
+        failed = total_files - successful
         
         return {
             'success': failed == 0,
@@ -99,6 +153,74 @@ class BatchProcessor:
             'message': f'Completado: {successful} exitosos, {failed} fallidos de {total_files} archivos'
         }
     
+    @staticmethod
+    def _process_parallel(
+        file_paths: List[str],
+        operation_func: Callable,
+        operation_config: Dict[str, Any],
+        output_dir: str,
+        progress_callback: Optional[Callable[[int, str, Dict], None]],
+        workers: Optional[int],
+        executor: Optional[Executor]
+    ) -> List[Dict]:
+        """
+        Reparte los archivos del lote entre procesos de trabajo
+        
+        Returns:
+            Lista de resultados en el mismo orden que `file_paths`
+        """
+        total_files = len(file_paths)
+        results: List[Optional[Dict]] = [None] * total_files
+        
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=min(workers, total_files))
+        
+        futures = {}
+        try:
+            futures = {
+                executor.submit(
+                    _process_single_file,
+                    file_path,
+                    operation_func,
+                    operation_config,
+                    output_dir
+                ): i
+                for i, file_path in enumerate(file_paths)
+            }
+            
+            # Reportar cada archivo a medida que termina
+            for completed, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Fallos del propio pool (proceso caído, error de serialización)
+                    result = {
+                        'file': Path(file_paths[i]).name,
+                        'file_path': file_paths[i],
+                        'success': False,
+                        'output_path': None,
+                        'error': str(e),
+                        'traceback': traceback.format_exc()
+                    }
+                
+                results[i] = result
+                
+                if progress_callback:
+                    progress = int(completed / total_files * 100)
+                    message = f"Procesando {completed}/{total_files}: {result['file']}"
+                    progress_callback(progress, message, result)
+        finally:
+            # Si se interrumpe el lote, no iniciar los archivos pendientes
+            for future in futures:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(wait=True)
+        
+        return results
+    
     @staticmethod
     def validate_batch_files(
         file_paths: List[str],
@@ -108,6 +230,9 @@ class BatchProcessor:
         """
         Valida los archivos para procesamiento por lotes
         
+        Los metadatos de cada archivo se obtienen de la caché de FileHandler,
+        así que revalidar un lote sin cambios solo cuesta un stat() por archivo.
+        
         Args:
             file_paths: Lista de rutas de archivos
             required_extension: Extensión requerida (ej: '.pdf')
@@ -118,11 +243,15 @@ class BatchProcessor:
             {
                 'valid': bool,
                 'errors': List[str],
-                'warnings': List[str]
+                'warnings': List[str],
+                'files': Dict[str, dict]  # metadatos por ruta (ver FileHandler.get_metadata)
             }
         """
+        from utils.file_handler import FileHandler
+        
         errors = []
         warnings = []
+        metadata = FileHandler.get_metadata_many(file_paths)
         
         # Validar que hay archivos
         if not file_paths:
@@ -135,7 +264,7 @@ class BatchProcessor:
         # Validar que existen
         missing_files = []
         for path in file_paths:
-            if not Path(path).exists():
+            if not metadata[path]['exists']:
                 missing_files.append(Path(path).name)
         
         if missing_files:
@@ -151,6 +280,16 @@ class BatchProcessor:
             if invalid_files:
                 errors.append(f"Archivos con extensión incorrecta: {', '.join(invalid_files)}")
         
+        # Validar que los PDFs se pueden abrir
+        if required_extension and required_extension.lower() == '.pdf':
+            corrupt_files = [
+                Path(path).name for path in file_paths
+                if metadata[path]['exists'] and path.lower().endswith('.pdf')
+                and not metadata[path]['valid']
+            ]
+            if corrupt_files:
+                errors.append(f"PDFs dañados o inválidos: {', '.join(corrupt_files)}")
+        
         # Advertencia si hay muchos archivos
         if len(file_paths) > 20:
             warnings.append(f"Procesando {len(file_paths)} archivos, esto puede tomar varios minutos")
@@ -158,5 +297,6 @@ class BatchProcessor:
         return {
             'valid': len(errors) == 0,
             'errors': errors,
-            'warnings': warnings
+            'warnings': warnings,
+            'files': metadata
         }
@@ -0,0 +1,223 @@
+"""
+Servicio de preprocesamiento de imágenes para OCR
+Limpia las páginas rasterizadas con OpenCV/NumPy antes de pasarlas a Tesseract
+"""
+import time
+from typing import Iterable, List, Optional, Tuple
+from PIL import Image
+
+
+# Pasos disponibles, en el orden en que se aplican
+PREPROCESSING_STEPS = ('grayscale', 'binarize', 'crop_borders', 'deskew', 'despeckle')
+
+
+class ImagePreprocessor:
+    """
+    Pipeline configurable de limpieza de imágenes
+    
+    Cada paso trabaja sobre arrays de NumPy. Los pasos que cambian la
+    geometría (crop_borders y deskew) dejan constancia de la transformación
+    para poder llevar las cajas de palabras de vuelta a la imagen original.
+    Los bordes se recortan antes de enderezar para que no falseen el perfil
+    de proyección.
+    """
+    
+    def __init__(
+        self,
+        steps: Optional[Iterable[str]] = None,
+        block_size: int = 31,
+        threshold_offset: int = 15,
+        max_skew: float = 10.0
+    ):
+        """
+        Args:
+            steps: Pasos a aplicar (None = todos). Se ejecutan siempre en el
+                orden de PREPROCESSING_STEPS
+            block_size: Tamaño de la vecindad de la binarización adaptativa (impar)
+            threshold_offset: Constante restada a la media local al binarizar
+            max_skew: Inclinación máxima a corregir, en grados
+        
+        Raises:
+            ValueError: Si algún paso no existe
+            Exception: Si opencv-python no está instalado
+        """
+        steps = PREPROCESSING_STEPS if steps is None else tuple(steps)
+        unknown = set(steps) - set(PREPROCESSING_STEPS)
+        if unknown:
+            raise ValueError(
+                f"Pasos de preprocesamiento inválidos: {', '.join(sorted(unknown))}. "
+                f"Opciones: {', '.join(PREPROCESSING_STEPS)}"
+            )
+        
+        try:
+            import cv2
+            import numpy
+        except ImportError:
+            raise Exception("opencv-python no está instalado")
+        
+        self._cv2 = cv2
+        self._np = numpy
+        self.steps = [step for step in PREPROCESSING_STEPS if step in steps]
+        self.block_size = block_size | 1
+        self.threshold_offset = threshold_offset
+        self.max_skew = max_skew
+    
+    def process(self, image: Image.Image) -> Tuple[Image.Image, dict]:
+        """
+        Aplica los pasos configurados a una página
+        
+        Args:
+            image: Imagen de la página
+        
+        Returns:
+            Tupla (imagen procesada, info) donde info contiene:
+            {
+                'size': [ancho, alto],       # de la imagen original
+                'offset': [x, y],            # recorte de bordes (antes de enderezar)
+                'inverse': matriz 2x3 o None # deshace la rotación del deskew
+                'angle': float,              # grados girados por el deskew
+                'timings': {paso: segundos}
+            }
+        """
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('RGB')
+        
+        array = self._np.asarray(image)
+        info = {
+            'size': list(image.size),
+            'offset': [0, 0],
+            'inverse': None,
+            'angle': 0.0,
+            'timings': {}
+        }
+        
+        for step in self.steps:
+            start = time.perf_counter()
+            array = getattr(self, f'_{step}')(array, info)
+            info['timings'][step] = time.perf_counter() - start
+        
+        return Image.fromarray(array), info
+    
+    @staticmethod
+    def map_words(words: List[list], info: dict) -> List[list]:
+        """
+        Lleva las cajas de palabras de la imagen procesada a la original
+        
+        Args:
+            words: Palabras [texto, left, top, width, height, confianza]
+            info: Información devuelta por process()
+        
+        Returns:
+            Palabras con las cajas en coordenadas de la imagen original
+        """
+        offset_x, offset_y = info['offset']
+        inverse = info['inverse']
+        mapped = []
+        
+        for word, left, top, width, height, conf in words:
+            if inverse is not None:
+                center_x = left + width / 2
+                center_y = top + height / 2
+                left = inverse[0][0] * center_x + inverse[0][1] * center_y + inverse[0][2] - width / 2
+                top = inverse[1][0] * center_x + inverse[1][1] * center_y + inverse[1][2] - height / 2
+            left += offset_x
+            top += offset_y
+            mapped.append([word, int(round(left)), int(round(top)), width, height, conf])
+        
+        return mapped
+    
+    # ==================== PASOS ====================
+    
+    def _gray(self, array):
+        """Devuelve el array en escala de grises"""
+        if array.ndim == 3:
+            return self._cv2.cvtColor(array, self._cv2.COLOR_RGB2GRAY)
+        return array
+    
+    def _grayscale(self, array, info: dict):
+        """Conversión a escala de grises"""
+        return self._gray(array)
+    
+    def _binarize(self, array, info: dict):
+        """
+        Binarización adaptativa (umbral gaussiano local)
+        
+        El umbral local vacía el interior de las zonas oscuras grandes (como
+        los bordes del escáner), así que lo muy oscuro se mantiene en negro.
+        """
+        gray = self._gray(array)
+        binary = self._cv2.adaptiveThreshold(
+            gray, 255,
+            self._cv2.ADAPTIVE_THRESH_GAUSSIAN_C, self._cv2.THRESH_BINARY,
+            self.block_size, self.threshold_offset
+        )
+        binary[gray < 64] = 0
+        return binary
+    
+    def _deskew(self, array, info: dict):
+        """
+        Endereza la página por perfil de proyección
+        
+        Prueba ángulos dentro de ±max_skew (primero cada 0.5° y luego cada
+        0.1° alrededor del mejor) sobre una muestra de píxeles de tinta, y se
+        queda con el que concentra la tinta en menos filas.
+        """
+        np = self._np
+        ys, xs = np.nonzero(self._gray(array) < 128)
+        if len(xs) < 100:
+            return array
+        
+        # Con una muestra basta para estimar el ángulo
+        if len(xs) > 20000:
+            sample = np.random.default_rng(0).choice(len(xs), 20000, replace=False)
+            ys, xs = ys[sample], xs[sample]
+        
+        def best_angle(candidates):
+            radians = np.deg2rad(candidates)[:, None]
+            rows = np.round(ys * np.cos(radians) - xs * np.sin(radians)).astype(np.int64)
+            rows -= rows.min(axis=1, keepdims=True)
+            scores = [np.square(np.bincount(row)).sum() for row in rows]
+            return float(candidates[int(np.argmax(scores))])
+        
+        angle = best_angle(np.arange(-self.max_skew, self.max_skew + 0.25, 0.5))
+        angle = best_angle(np.arange(angle - 0.5, angle + 0.55, 0.1))
+        if abs(angle) < 0.1:
+            return array
+        
+        height, width = array.shape[:2]
+        matrix = self._cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        interpolation = self._cv2.INTER_NEAREST if 'binarize' in self.steps else self._cv2.INTER_LINEAR
+        border = 255 if array.ndim == 2 else (255, 255, 255)
+        
+        info['angle'] = round(angle, 2)
+        info['inverse'] = self._cv2.invertAffineTransform(matrix).tolist()
+        return self._cv2.warpAffine(
+            array, matrix, (width, height),
+            flags=interpolation, borderMode=self._cv2.BORDER_CONSTANT, borderValue=border
+        )
+    
+    def _despeckle(self, array, info: dict):
+        """Elimina el ruido de puntos aislados con un filtro de mediana"""
+        return self._cv2.medianBlur(array, 3)
+    
+    def _crop_borders(self, array, info: dict):
+        """Recorta los bordes oscuros que deja el escáner en los márgenes"""
+        dark = self._gray(array) < 128
+        dark_rows = dark.mean(axis=1) > 0.5
+        dark_cols = dark.mean(axis=0) > 0.5
+        
+        def trim(flags):
+            start, end = 0, len(flags)
+            while start < end and flags[start]:
+                start += 1
+            while end > start and flags[end - 1]:
+                end -= 1
+            return start, end
+        
+        top, bottom = trim(dark_rows)
+        left, right = trim(dark_cols)
+        if bottom - top < 10 or right - left < 10:
+            return array
+        
+        info['offset'] = [info['offset'][0] + left, info['offset'][1] + top]
+        return array[top:bottom, left:right]
@@ -0,0 +1,185 @@
+"""
+Caché persistente de resultados de OCR
+Guarda en SQLite el texto y las cajas de palabras de cada página reconocida
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+from PIL import Image
+from config.settings import settings
+
+
+class OCRCache:
+    """
+    Caché en disco de resultados de OCR con expulsión LRU
+    
+    La clave combina el contenido de la imagen de la página con el idioma,
+    la resolución y la versión de Tesseract, de modo que repetir un trabajo
+    con otro nombre de salida reutiliza el reconocimiento anterior. Es
+    segura entre hilos; varios procesos pueden compartir el archivo.
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_size_mb: Optional[int] = None):
+        """
+        Args:
+            path: Archivo SQLite (None = settings.OCR_CACHE_DIR/ocr_cache.sqlite3)
+            max_size_mb: Tamaño máximo de los resultados guardados
+                (None = settings.OCR_CACHE_MAX_MB)
+        """
+        if path is None:
+            Path(settings.OCR_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+            path = str(Path(settings.OCR_CACHE_DIR) / 'ocr_cache.sqlite3')
+        
+        self.path = path
+        self.max_size = (max_size_mb or settings.OCR_CACHE_MAX_MB) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS ocr_results ('
+            ' key TEXT PRIMARY KEY,'
+            ' payload BLOB NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS ocr_results_last_used ON ocr_results (last_used)'
+        )
+        self._conn.commit()
+        
+        # Tamaño total llevado en memoria para no sumar la tabla en cada put
+        self._total_size = self._stored_size()
+    
+    def _stored_size(self) -> int:
+        """Suma el tamaño de todas las entradas (recorre la tabla)"""
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_results').fetchone()[0]
+    
+    @staticmethod
+    def make_key(image: Image.Image, language: str, dpi: int, engine_version: str) -> str:
+        """
+        Calcula la clave de una página
+        
+        El orden de los idiomas se normaliza ('eng+spa' y 'spa+eng' comparten
+        entrada) para que repetir un trabajo cambiando solo el orden acierte.
+        
+        Args:
+            image: Imagen de la página
+            language: Idioma(s) de OCR
+            dpi: Resolución de renderizado
+            engine_version: Versión del motor de OCR
+        
+        Returns:
+            Clave hexadecimal
+        """
+        languages = '+'.join(sorted(set(language.split('+'))))
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f'{languages}|{dpi}|{engine_version}|{image.mode}|{image.size}'.encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Busca un resultado y lo marca como usado recientemente
+        
+        Returns:
+            Resultado guardado o None si no existe
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload FROM ocr_results WHERE key = ?', (key,)
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self._conn.execute(
+                'UPDATE ocr_results SET last_used = ? WHERE key = ?', (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        
+        return json.loads(zlib.decompress(row[0]))
+    
+    def put(self, key: str, result: dict):
+        """Guarda un resultado y expulsa los menos usados si se supera el límite"""
+        payload = zlib.compress(json.dumps(result, separators=(',', ':')).encode('utf-8'))
+        
+        with self._lock:
+            previous = self._conn.execute(
+                'SELECT size FROM ocr_results WHERE key = ?', (key,)
+            ).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO ocr_results (key, payload, size, last_used) '
+                'VALUES (?, ?, ?, ?)',
+                (key, payload, len(payload), time.time())
+            )
+            self._total_size += len(payload) - (previous[0] if previous else 0)
+            
+            if self._total_size > self.max_size:
+                self._evict()
+            self._conn.commit()
+    
+    def _evict(self):
+        """Elimina las entradas menos usadas hasta volver por debajo del límite"""
+        # Otros procesos pueden haber escrito en el archivo: recalcular el
+        # total real solo ahora, cuando el llevado en memoria supera el límite
+        self._total_size = self._stored_size()
+        excess = self._total_size - self.max_size
+        if excess <= 0:
+            return
+        
+        victims = []
+        for key, size in self._conn.execute(
+                'SELECT key, size FROM ocr_results ORDER BY last_used'):
+            victims.append((key,))
+            self._total_size -= size
+            excess -= size
+            if excess <= 0:
+                break
+        
+        self._conn.executemany('DELETE FROM ocr_results WHERE key = ?', victims)
+    
+    def stats(self) -> dict:
+        """
+        Estadísticas de la caché
+        
+        Returns:
+            Diccionario con hits, misses, entries y size_bytes
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results'
+            ).fetchone()
+        
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'size_bytes': size
+        }
+    
+    def clear(self):
+        """Elimina todas las entradas"""
+        with self._lock:
+            self._conn.execute('DELETE FROM ocr_results')
+            self._conn.commit()
+            self._total_size = 0
+    
+    def close(self):
+        """Cierra la conexión con la base de datos"""
+        with self._lock:
+            self._conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -2,14 +2,239 @@
 Servicio de OCR (Reconocimiento Óptico de Caracteres)
 Convierte PDFs escaneados en PDFs con texto searchable
 """
+from abc import ABC, abstractmethod
+import pikepdf
 import pytesseract
-from pdf2image import convert_from_path
 from PIL import Image
 from PyPDF2 import PdfWriter, PdfReader
 from pathlib import Path
-from typing import Callable, Optional, List
+from typing import Callable, Dict, Optional, List, Iterable, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+import importlib.util
 import os
 from config.settings import settings
+from .pdf_rasterizer import PDFRasterizer
+from .text_layer_scanner import TextLayerScanner
+from .ocr_cache import OCRCache
+from .image_preprocessor import ImagePreprocessor
+from .text_index import TextIndex
+
+
+# La capa de texto invisible usa Courier: al ser monoespaciada (600/1000 em
+# por carácter) cada palabra se ajusta a su caja solo con escalado horizontal
+_TEXT_LAYER_CHAR_WIDTH = 0.6
+
+# Motores de OCR ('auto' = tesserocr si está instalado, si no pytesseract)
+OCR_ENGINES = ('auto', 'tesserocr', 'pytesseract')
+
+# API de Tesseract de cada proceso de trabajo, con los modelos ya cargados
+_tesserocr_api = None
+
+
+def _init_tesserocr_worker(language: str, tessdata_path: Optional[str]):
+    """Carga los modelos de idioma una sola vez por proceso de trabajo"""
+    global _tesserocr_api
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    import tesserocr
+    
+    if tessdata_path:
+        _tesserocr_api = tesserocr.PyTessBaseAPI(path=tessdata_path, lang=language)
+    else:
+        _tesserocr_api = tesserocr.PyTessBaseAPI(lang=language)
+
+
+def _tesserocr_recognize(mode: str, size: Tuple[int, int], data: bytes) -> dict:
+    """
+    Reconoce una página en un proceso de trabajo de tesserocr
+    
+    La imagen llega como bytes sin comprimir por la tubería del pool, sin
+    pasar por archivos temporales.
+    """
+    from tesserocr import RIL, iterate_level
+    
+    api = _tesserocr_api
+    api.SetImage(Image.frombytes(mode, size, data))
+    api.Recognize()
+    
+    words = []
+    iterator = api.GetIterator()
+    if iterator is not None:
+        for item in iterate_level(iterator, RIL.WORD):
+            word = (item.GetUTF8Text(RIL.WORD) or '').strip()
+            box = item.BoundingBox(RIL.WORD)
+            if not word or box is None:
+                continue
+            left, top, right, bottom = box
+            words.append([
+                word, left, top, right - left, bottom - top,
+                round(item.Confidence(RIL.WORD), 2)
+            ])
+    
+    return {'text': api.GetUTF8Text(), 'words': words, 'size': list(size)}
+
+
+class OCREngine(ABC):
+    """
+    Motor de OCR
+    
+    recognize() devuelve el texto y las cajas de palabras de una imagen y
+    puede llamarse desde varios hilos a la vez. Los motores se cierran con
+    close() o usándolos como context manager.
+    """
+    
+    name = ''
+    
+    def __init__(self, language: str, workers: Optional[int] = None):
+        self.language = language
+        self.workers = max(1, workers or 1)
+        self._version = None
+    
+    @staticmethod
+    def create(name: Optional[str], language: str, workers: Optional[int] = None) -> 'OCREngine':
+        """
+        Crea un motor de OCR
+        
+        Args:
+            name: 'auto', 'tesserocr' o 'pytesseract' (None = settings.OCR_ENGINE)
+            language: Idioma(s) para OCR
+            workers: Páginas reconocidas a la vez
+        
+        Raises:
+            ValueError: Si el motor no existe
+            Exception: Si se pide tesserocr y no está instalado
+        """
+        name = name or settings.OCR_ENGINE
+        if name not in OCR_ENGINES:
+            raise ValueError(
+                f"Motor de OCR inválido: {name}. Opciones: {', '.join(OCR_ENGINES)}"
+            )
+        
+        tesserocr_available = importlib.util.find_spec('tesserocr') is not None
+        if name == 'tesserocr' and not tesserocr_available:
+            raise Exception("tesserocr no está instalado")
+        
+        if name == 'tesserocr' or (name == 'auto' and tesserocr_available):
+            return TesserocrEngine(language, workers)
+        return PytesseractEngine(language, workers)
+    
+    @property
+    def version(self) -> str:
+        """Motor y versión de Tesseract (forma parte de la clave de caché)"""
+        if self._version is None:
+            self._version = f'{self.name} {self._tesseract_version()}'
+        return self._version
+    
+    @abstractmethod
+    def _tesseract_version(self) -> str:
+        """Versión de Tesseract que usa el motor"""
+    
+    @abstractmethod
+    def recognize(self, image: Image.Image) -> dict:
+        """
+        Reconoce una página
+        
+        Returns:
+            {
+                'text': str,
+                'words': [[texto, left, top, width, height, confianza], ...],
+                'size': [ancho, alto]  # de la imagen, en píxeles
+            }
+        """
+    
+    def close(self):
+        """Libera los recursos del motor"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class PytesseractEngine(OCREngine):
+    """
+    Motor basado en pytesseract
+    
+    Lanza un proceso de Tesseract por página (que vuelve a cargar los
+    modelos de idioma). Es la opción de respaldo cuando tesserocr no está
+    instalado.
+    """
+    
+    name = 'pytesseract'
+    
+    def _tesseract_version(self) -> str:
+        return str(pytesseract.get_tesseract_version())
+    
+    def recognize(self, image: Image.Image) -> dict:
+        """Una sola llamada a image_to_data; el texto se reconstruye por líneas y párrafos"""
+        data = pytesseract.image_to_data(
+            image, lang=self.language, output_type=pytesseract.Output.DICT
+        )
+        
+        words = []
+        paragraphs: Dict[tuple, Dict[int, List[str]]] = {}
+        for i, word in enumerate(data['text']):
+            word = word.strip()
+            if not word:
+                continue
+            words.append([
+                word,
+                int(data['left'][i]),
+                int(data['top'][i]),
+                int(data['width'][i]),
+                int(data['height'][i]),
+                round(float(data['conf'][i]), 2)
+            ])
+            paragraph = (data['block_num'][i], data['par_num'][i])
+            paragraphs.setdefault(paragraph, {}).setdefault(data['line_num'][i], []).append(word)
+        
+        text = '\n\n'.join(
+            '\n'.join(' '.join(line) for line in lines.values())
+            for lines in paragraphs.values()
+        )
+        
+        return {'text': text, 'words': words, 'size': list(image.size)}
+
+
+class TesserocrEngine(OCREngine):
+    """
+    Motor basado en tesserocr con procesos de trabajo persistentes
+    
+    Cada proceso carga la API de Tesseract y los modelos de idioma una sola
+    vez y reconoce todas las páginas que recibe, evitando el arranque de un
+    proceso y la recarga de los modelos por página.
+    """
+    
+    name = 'tesserocr'
+    
+    def __init__(self, language: str, workers: Optional[int] = None):
+        super().__init__(language, workers)
+        
+        tessdata_path = None
+        if settings.TESSERACT_PATH:
+            candidate = Path(settings.TESSERACT_PATH).parent / 'tessdata'
+            if candidate.exists():
+                tessdata_path = str(candidate)
+        
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_tesserocr_worker,
+            initargs=(language, tessdata_path)
+        )
+    
+    def _tesseract_version(self) -> str:
+        import tesserocr
+        return tesserocr.tesseract_version().splitlines()[0]
+    
+    def recognize(self, image: Image.Image) -> dict:
+        if image.mode not in ('1', 'L', 'RGB', 'RGBA'):
+            image = image.convert('RGB')
+        return self._executor.submit(
+            _tesserocr_recognize, image.mode, image.size, image.tobytes()
+        ).result()
+    
+    def close(self):
+        self._executor.shutdown(wait=True)
 
 
 class OCRService:
@@ -32,7 +257,7 @@ class OCRService:
         Args:
             image_path: Ruta de la imagen
             language: Idioma(s) para OCR (ej: 'spa', 'eng', 'spa+eng')
-            
+        
         Returns:
             Texto extraído
         """
@@ -45,21 +270,462 @@ class OCRService:
         except Exception as e:
             raise Exception(f"Error al extraer texto: {str(e)}")
     
+    @staticmethod
+    def _ocr_page(
+        image: Image.Image,
+        language: str,
+        dpi: int,
+        engine: OCREngine,
+        cache: Optional[OCRCache] = None,
+        preprocessor: Optional[ImagePreprocessor] = None
+    ) -> dict:
+        """
+        Reconoce una página consultando antes la caché
+        
+        Con `preprocessor`, la página se limpia antes de Tesseract y las cajas
+        de palabras se devuelven en coordenadas de la imagen original. La
+        caché se consulta con la imagen ya procesada.
+        """
+        info = None
+        if preprocessor is not None:
+            image, info = preprocessor.process(image)
+        
+        if cache is None:
+            result = engine.recognize(image)
+        else:
+            key = OCRCache.make_key(image, language, dpi, engine.version)
+            result = cache.get(key)
+            if result is None:
+                result = engine.recognize(image)
+                cache.put(key, result)
+        
+        if info is not None:
+            result = dict(
+                result,
+                words=ImagePreprocessor.map_words(result['words'], info),
+                size=info['size'],
+                timings=info['timings']
+            )
+        return result
+    
+    @staticmethod
+    def _ocr_pages(
+        images: Iterable[Image.Image],
+        total_pages: int,
+        language: str,
+        dpi: int,
+        engine: OCREngine,
+        workers: Optional[int] = None,
+        page_callback: Optional[Callable[[int], None]] = None,
+        cache: Optional[OCRCache] = None,
+        preprocessor: Optional[ImagePreprocessor] = None
+    ) -> List[dict]:
+        """
+        Aplica OCR a una secuencia de páginas y devuelve los resultados en orden
+        
+        Con `workers` > 1 se reconocen hasta `workers` páginas a la vez en el
+        motor (procesos de Tesseract independientes). Los resultados se
+        reordenan por número de página y `page_callback` recibe el número de
+        páginas completadas, no el de páginas enviadas.
+        
+        Args:
+            images: Imágenes de las páginas en orden
+            total_pages: Número total de páginas
+            language: Idioma(s) para OCR
+            dpi: Resolución de las imágenes (forma parte de la clave de caché)
+            engine: Motor de OCR
+            workers: Páginas reconocidas en paralelo (None o 1 = secuencial)
+            page_callback: Función llamada con el número de páginas completadas
+            cache: Caché de resultados (None = sin caché)
+            preprocessor: Limpieza de las imágenes antes del OCR (None = ninguna)
+        
+        Returns:
+            Lista de resultados de OCREngine.recognize, uno por página
+        """
+        results: List[Optional[dict]] = [None] * total_pages
+        
+        if not workers or workers <= 1:
+            for i, image in enumerate(images):
+                results[i] = OCRService._ocr_page(
+                    image, language, dpi, engine, cache, preprocessor
+                )
+                if page_callback:
+                    page_callback(i + 1)
+            return results
+        
+        # Cada Tesseract usa un solo hilo para no saturar los núcleos
+        os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+        
+        pending = {}
+        completed = 0
+        
+        def collect(done):
+            nonlocal completed
+            for future in done:
+                results[pending.pop(future)] = future.result()
+                completed += 1
+                if page_callback:
+                    page_callback(completed)
+        
+        # Los hilos solo esperan al proceso de Tesseract, que hace el trabajo
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for i, image in enumerate(images):
+                    future = executor.submit(
+                        OCRService._ocr_page, image, language, dpi, engine, cache,
+                        preprocessor
+                    )
+                    pending[future] = i
+                    
+                    # Limitar las páginas en vuelo para no acumular imágenes
+                    if len(pending) >= workers * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            finally:
+                for future in pending:
+                    future.cancel()
+        
+        return results
+    
+    @staticmethod
+    def _plan_pages(
+        input_path: str,
+        total_pages: int,
+        skip_text_pages: bool
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Separa las páginas que necesitan OCR de las que ya tienen texto
+        
+        Returns:
+            Tupla (páginas a procesar con OCR, páginas omitidas), 1-indexed
+        """
+        if not skip_text_pages:
+            return list(range(1, total_pages + 1)), []
+        
+        ocr_pages, skipped_pages = [], []
+        for page in TextLayerScanner.scan(input_path):
+            (skipped_pages if page['has_text'] else ocr_pages).append(page['page'])
+        return ocr_pages, skipped_pages
+    
+    @staticmethod
+    def _read_text_layer(input_path: str, page_numbers: List[int]) -> Dict[int, str]:
+        """Extrae el texto existente de las páginas indicadas (1-indexed)"""
+        if not page_numbers:
+            return {}
+        reader = PdfReader(input_path)
+        return {
+            number: reader.pages[number - 1].extract_text() or ''
+            for number in page_numbers
+        }
+    
+    @staticmethod
+    def _recognize(
+        input_path: str,
+        total_pages: int,
+        language: str,
+        dpi: int,
+        workers: Optional[int],
+        skip_text_pages: bool,
+        page_callback: Optional[Callable[[int, int], None]] = None,
+        use_cache: bool = True,
+        preprocessing: Optional[Iterable[str]] = None,
+        adaptive_dpi: Optional[bool] = None,
+        engine: Optional[str] = None
+    ) -> dict:
+        """
+        Obtiene el texto de todas las páginas, aplicando OCR solo donde hace falta
+        
+        Las páginas que ya tienen capa de texto (si `skip_text_pages`) no se
+        renderizan: su texto se extrae directamente del PDF. Las demás pasan
+        por los pasos de preprocesamiento indicados y se buscan primero en la
+        caché de OCR (si `use_cache` y settings.OCR_CACHE_ENABLED).
+        
+        Con `adaptive_dpi`, la primera pasada se hace a settings.OCR_FAST_DPI
+        y solo las páginas cuya confianza media queda por debajo de
+        settings.OCR_MIN_CONFIDENCE se vuelven a renderizar y reconocer a `dpi`.
+        
+        Args:
+            page_callback: Función llamada con (páginas completadas, páginas a
+                reconocer); el total crece si hay una segunda pasada
+            preprocessing: Pasos de ImagePreprocessor (None = settings.OCR_PREPROCESSING)
+            adaptive_dpi: Primera pasada a baja resolución (None = settings.OCR_ADAPTIVE_DPI)
+            engine: Motor de OCR de OCREngine.create (None = settings.OCR_ENGINE)
+        
+        Returns:
+            {
+                'texts': List[str],             # uno por página
+                'ocr_results': Dict[int, dict], # resultados de OCR por página (1-indexed)
+                'skipped_pages': List[int],
+                'page_dpi': List[Optional[int]],  # DPI usado por página (None = sin OCR)
+                'pages_reprocessed': int,
+                'cache_hits': int,
+                'cache_misses': int,
+                'preprocessing': {'steps': List[str], 'timings': {paso: segundos}},
+                'engine': str                   # motor usado (None = sin OCR)
+            }
+        """
+        ocr_pages, skipped_pages = OCRService._plan_pages(
+            input_path, total_pages, skip_text_pages
+        )
+        
+        if adaptive_dpi is None:
+            adaptive_dpi = settings.OCR_ADAPTIVE_DPI
+        first_dpi = min(settings.OCR_FAST_DPI, dpi) if adaptive_dpi else dpi
+        
+        if preprocessing is None:
+            preprocessing = settings.OCR_PREPROCESSING
+        preprocessor = ImagePreprocessor(preprocessing) if preprocessing else None
+        
+        # El motor (y sus procesos de trabajo) vive lo que dura el trabajo
+        ocr_engine = OCREngine.create(engine, language, workers) if ocr_pages else None
+        
+        cache = None
+        if use_cache and settings.OCR_CACHE_ENABLED and ocr_pages:
+            cache = OCRCache()
+        
+        def ocr_pass(page_numbers, pass_dpi, done_before, total):
+            images = (
+                image for _, image in PDFRasterizer.iter_page_numbers(
+                    input_path, page_numbers, dpi=pass_dpi
+                )
+            )
+            
+            def page_done(completed):
+                if page_callback:
+                    page_callback(done_before + completed, total)
+            
+            return OCRService._ocr_pages(
+                images, len(page_numbers), language, pass_dpi, ocr_engine, workers,
+                page_done, cache, preprocessor
+            )
+        
+        try:
+            # Primera pasada (rápida si el DPI es adaptativo)
+            results = ocr_pass(ocr_pages, first_dpi, 0, len(ocr_pages))
+            ocr_results = dict(zip(ocr_pages, results))
+            page_dpi = {number: first_dpi for number in ocr_pages}
+            all_results = list(results)
+            
+            # Repetir a la resolución completa las páginas con poca confianza
+            retry_pages = []
+            if first_dpi < dpi:
+                retry_pages = [
+                    number for number in ocr_pages
+                    if OCRService._page_confidence(ocr_results[number]) < settings.OCR_MIN_CONFIDENCE
+                ]
+            
+            if retry_pages:
+                results = ocr_pass(
+                    retry_pages, dpi, len(ocr_pages), len(ocr_pages) + len(retry_pages)
+                )
+                all_results += results
+                for number, result in zip(retry_pages, results):
+                    ocr_results[number] = result
+                    page_dpi[number] = dpi
+        finally:
+            if cache:
+                cache.close()
+            if ocr_engine:
+                ocr_engine.close()
+        
+        texts = [''] * total_pages
+        for number, result in ocr_results.items():
+            texts[number - 1] = result['text']
+        for number, text in OCRService._read_text_layer(input_path, skipped_pages).items():
+            texts[number - 1] = text
+        
+        # Tiempo total de cada paso de preprocesamiento en el trabajo
+        timings = {step: 0.0 for step in (preprocessor.steps if preprocessor else [])}
+        for result in all_results:
+            for step, seconds in result.get('timings', {}).items():
+                timings[step] += seconds
+        
+        return {
+            'texts': texts,
+            'ocr_results': ocr_results,
+            'skipped_pages': skipped_pages,
+            'page_dpi': [page_dpi.get(number) for number in range(1, total_pages + 1)],
+            'pages_reprocessed': len(retry_pages),
+            'cache_hits': cache.hits if cache else 0,
+            'cache_misses': cache.misses if cache else 0,
+            'preprocessing': {
+                'steps': preprocessor.steps if preprocessor else [],
+                'timings': {step: round(seconds, 3) for step, seconds in timings.items()}
+            },
+            'engine': ocr_engine.name if ocr_engine else None
+        }
+    
+    @staticmethod
+    def _index_texts(path: str, texts: List[str], index_text: Optional[bool]) -> bool:
+        """
+        Guarda el texto por página del documento en el índice de búsqueda
+        
+        Un fallo del índice (base de datos bloqueada, sin FTS5, directorio de
+        solo lectura...) no invalida el OCR ya hecho: se informa y se sigue.
+        
+        Returns:
+            True si el documento quedó indexado
+        """
+        if index_text is None:
+            index_text = settings.TEXT_INDEX_ENABLED
+        if not index_text:
+            return False
+        
+        try:
+            with TextIndex() as index:
+                index.add_document(path, texts)
+        except Exception as e:
+            print(f"Error al indexar el texto de {path}: {e}")
+            return False
+        return True
+    
+    @staticmethod
+    def _page_confidence(result: dict) -> float:
+        """
+        Confianza media de Tesseract en una página (0-100)
+        
+        Se pondera por la longitud de cada palabra; una página sin palabras
+        tiene confianza 0 para que se repita a mayor resolución.
+        """
+        weighted = [
+            (conf, len(word)) for word, _, _, _, _, conf in result['words'] if conf >= 0
+        ]
+        total = sum(length for _, length in weighted)
+        if not total:
+            return 0.0
+        return sum(conf * length for conf, length in weighted) / total
+    
+    @staticmethod
+    def _visible_space(page: pikepdf.Page) -> Tuple[float, float, Tuple[float, ...]]:
+        """
+        Describe el área visible de la página tal como la renderiza Poppler
+        
+        Returns:
+            Tupla (ancho, alto, matriz) donde la matriz lleva coordenadas del
+            área visible (origen abajo a la izquierda, ya rotada) al espacio
+            de usuario de la página
+        """
+        x0, y0, x1, y1 = (float(value) for value in page.cropbox)
+        x0, x1 = sorted((x0, x1))
+        y0, y1 = sorted((y0, y1))
+        width, height = x1 - x0, y1 - y0
+        rotate = int(page.obj.get('/Rotate', 0)) % 360
+        
+        if rotate == 90:
+            return height, width, (0, 1, -1, 0, x0 + width, y0)
+        if rotate == 180:
+            return width, height, (-1, 0, 0, -1, x0 + width, y0 + height)
+        if rotate == 270:
+            return height, width, (0, -1, 1, 0, x0, y0 + height)
+        return width, height, (1, 0, 0, 1, x0, y0)
+    
+    @staticmethod
+    def _text_layer_content(page: pikepdf.Page, result: dict, font_name: str) -> bytes:
+        """
+        Genera el content stream con las palabras reconocidas como texto invisible
+        
+        Cada palabra se coloca sobre su caja (convertida de píxeles de la
+        imagen a puntos) en modo de render 3, que no pinta nada pero permite
+        buscar y seleccionar el texto. Las palabras se escriben sin espacio
+        final para que ocupen exactamente su caja; los extractores deducen
+        los espacios de la separación entre cajas.
+        """
+        width, height, matrix = OCRService._visible_space(page)
+        image_width, image_height = result['size']
+        scale_x = width / image_width
+        scale_y = height / image_height
+        
+        ops = [b'q', b'%.4f %.4f %.4f %.4f %.4f %.4f cm' % matrix, b'BT', b'3 Tr']
+        for word, left, top, box_width, box_height, _ in result['words']:
+            font_size = max(box_height * scale_y, 1.0)
+            horizontal_scale = 100 * box_width * scale_x / (len(word) * _TEXT_LAYER_CHAR_WIDTH * font_size)
+            text = pikepdf.String(word.encode('cp1252', errors='replace')).unparse()
+            ops.append(
+                b'%s %.2f Tf %.2f Tz 1 0 0 1 %.2f %.2f Tm %s Tj' % (
+                    font_name.encode(), font_size, horizontal_scale,
+                    left * scale_x, height - (top + box_height) * scale_y, text
+                )
+            )
+        ops += [b'ET', b'Q']
+        return b'\n'.join(ops)
+    
+    @staticmethod
+    def _write_text_layer(
+        input_path: str,
+        output_path: str,
+        ocr_results: Dict[int, dict]
+    ) -> int:
+        """
+        Escribe una copia del PDF con la capa de texto invisible del OCR
+        
+        Las páginas originales se conservan intactas (sus imágenes no se
+        vuelven a codificar): a cada página reconocida solo se le añade un
+        content stream con el texto, aislado del contenido original con q/Q.
+        
+        Args:
+            input_path: PDF original
+            output_path: PDF resultante
+            ocr_results: Resultados de OCR por número de página (1-indexed)
+        
+        Returns:
+            Número de páginas a las que se añadió texto
+        """
+        pages_with_text = 0
+        
+        with pikepdf.open(input_path) as pdf:
+            font = pdf.make_indirect(pikepdf.Dictionary(
+                Type=pikepdf.Name.Font,
+                Subtype=pikepdf.Name.Type1,
+                BaseFont=pikepdf.Name.Courier,
+                Encoding=pikepdf.Name.WinAnsiEncoding
+            ))
+            
+            # Las páginas se completan en orden sobre el documento original
+            for number in sorted(ocr_results):
+                result = ocr_results[number]
+                if not result['words']:
+                    continue
+                
+                page = pdf.pages[number - 1]
+                font_name = page.add_resource(font, pikepdf.Name.Font, prefix='OCR')
+                overlay = OCRService._text_layer_content(page, result, str(font_name))
+                
+                page.contents_add(pikepdf.Stream(pdf, b'q\n'), prepend=True)
+                page.contents_add(pikepdf.Stream(pdf, b'\nQ\n' + overlay))
+                pages_with_text += 1
+            
+            pdf.save(output_path)
+        
+        return pages_with_text
+    
     @staticmethod
     def pdf_to_searchable_pdf(
         input_path: str,
         output_path: str,
         language: str = 'spa+eng',
         dpi: int = 300,
-        progress_callback: Optional[Callable[[int, str], None]] = None
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+        workers: Optional[int] = None,
+        skip_text_pages: bool = True,
+        use_cache: bool = True,
+        preprocessing: Optional[Iterable[str]] = None,
+        adaptive_dpi: Optional[bool] = None,
+        engine: Optional[str] = None,
+        index_text: Optional[bool] = None
     ) -> dict:
         """
         Convierte un PDF escaneado en un PDF con texto searchable
         
         Proceso:
-        1. Convierte cada página del PDF a imagen
-        2. Aplica OCR a cada imagen
-        3. Crea un nuevo PDF con el texto extraído
+        1. Detecta las páginas que ya tienen capa de texto (sin renderizar)
+        2. Convierte a imagen por ventanas solo las páginas sin texto
+        3. Aplica OCR a cada imagen a medida que se genera
+        4. Añade el texto reconocido como capa invisible sobre las páginas
+           originales, sin volver a codificar sus imágenes
         
         Args:
             input_path: Ruta del PDF escaneado
@@ -67,38 +733,44 @@ class OCRService:
             language: Idioma(s) para OCR
             dpi: Resolución para conversión (mayor = mejor calidad pero más lento)
             progress_callback: Función para reportar progreso (percent, message)
-            
+            workers: Páginas procesadas en paralelo (None o 1 = secuencial)
+            skip_text_pages: Omitir el OCR en las páginas que ya tienen texto
+            use_cache: Reutilizar resultados de la caché de OCR
+            preprocessing: Pasos de limpieza de imagen antes del OCR, de
+                PREPROCESSING_STEPS (None = settings.OCR_PREPROCESSING, vacío = ninguno)
+            adaptive_dpi: Reconocer primero a settings.OCR_FAST_DPI y repetir a `dpi`
+                solo las páginas con poca confianza (None = settings.OCR_ADAPTIVE_DPI)
+            engine: Motor de OCR, de OCR_ENGINES (None = settings.OCR_ENGINE)
+            index_text: Guardar el texto del PDF resultante en el índice de
+                búsqueda (None = settings.TEXT_INDEX_ENABLED)
+        
         Returns:
-            Diccionario con información del resultado
+            Diccionario con información del resultado ('indexed' indica si el
+            texto quedó en el índice de búsqueda)
         """
         OCRService.configure_tesseract()
         
         try:
-            # Convertir PDF a imágenes
             if progress_callback:
-                progress_callback(5, "Convirtiendo PDF a imágenes...")
+                progress_callback(5, "Analizando PDF...")
             
-            images = convert_from_path(
-                input_path,
-                dpi=dpi,
-                poppler_path=settings.POPPLER_PATH
-            )
-            
-            total_pages = len(images)
-            extracted_texts = []
+            total_pages = PDFRasterizer.get_page_count(input_path)
             
             if progress_callback:
                 progress_callback(10, f"Procesando {total_pages} páginas...")
             
-            # Aplicar OCR a cada página
-            for i, image in enumerate(images):
+            def page_done(completed, total):
                 if progress_callback:
-                    progress = int(10 + (i / total_pages) * 80)
-                    progress_callback(progress, f"Procesando página {i+1}/{total_pages}...")
-                
-                # Extraer texto de la imagen
-                text = pytesseract.image_to_string(image, lang=language)
-                extracted_texts.append(text)
+                    progress = int(10 + (completed / total) * 80)
+                    progress_callback(progress, f"Procesada página {completed}/{total}")
+            
+            # Aplicar OCR solo a las páginas sin capa de texto
+            recognition = OCRService._recognize(
+                input_path, total_pages, language, dpi, workers, skip_text_pages,
+                page_done, use_cache, preprocessing, adaptive_dpi, engine
+            )
+            extracted_texts = recognition['texts']
+            skipped_pages = recognition['skipped_pages']
             
             # Guardar texto extraído en un archivo temporal
             temp_text_path = Path(settings.TEMP_DIR) / f"{Path(input_path).stem}_ocr.txt"
@@ -111,10 +783,12 @@ class OCRService:
             if progress_callback:
                 progress_callback(95, "Creando PDF con texto searchable...")
             
-            # Por ahora, copiar el PDF original
-            # En una implementación más avanzada, se insertaría el texto como capa invisible
-            import shutil
-            shutil.copy(input_path, output_path)
+            # Añadir el texto reconocido como capa invisible sobre las páginas originales
+            pages_with_text = OCRService._write_text_layer(
+                input_path, output_path, recognition['ocr_results']
+            )
+            
+            indexed = OCRService._index_texts(output_path, extracted_texts, index_text)
             
             if progress_callback:
                 progress_callback(100, "OCR completado")
@@ -126,10 +800,23 @@ class OCRService:
                 'output_path': output_path,
                 'text_file_path': str(temp_text_path),
                 'total_pages': total_pages,
+                'pages_skipped': len(skipped_pages),
+                'skipped_pages': skipped_pages,
+                'pages_with_text_layer': pages_with_text,
+                'cache_hits': recognition['cache_hits'],
+                'cache_misses': recognition['cache_misses'],
+                'preprocessing': recognition['preprocessing'],
+                'page_dpi': recognition['page_dpi'],
+                'pages_reprocessed': recognition['pages_reprocessed'],
+                'ocr_engine': recognition['engine'],
+                'indexed': indexed,
                 'total_characters': total_chars,
-                'message': f'Se procesaron {total_pages} páginas ({total_chars} caracteres extraídos)'
+                'message': (
+                    f'Se procesaron {total_pages} páginas '
+                    f'({len(skipped_pages)} ya tenían texto, {total_chars} caracteres extraídos)'
+                )
             }
-            
+        
         except Exception as e:
             raise Exception(f"Error en OCR: {str(e)}")
     
@@ -138,7 +825,14 @@ class OCRService:
         input_path: str,
         language: str = 'spa+eng',
         dpi: int = 300,
-        progress_callback: Optional[Callable[[int, str], None]] = None
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+        workers: Optional[int] = None,
+        skip_text_pages: bool = True,
+        use_cache: bool = True,
+        preprocessing: Optional[Iterable[str]] = None,
+        adaptive_dpi: Optional[bool] = None,
+        engine: Optional[str] = None,
+        index_text: Optional[bool] = None
     ) -> dict:
         """
         Extrae texto de un PDF escaneado
@@ -150,33 +844,43 @@ class OCRService:
             language: Idioma(s) para OCR
             dpi: Resolución
             progress_callback: Función para reportar progreso
-            
+            workers: Páginas procesadas en paralelo (None o 1 = secuencial)
+            skip_text_pages: Leer directamente el texto de las páginas que ya lo tienen
+            use_cache: Reutilizar resultados de la caché de OCR
+            preprocessing: Pasos de limpieza de imagen antes del OCR, de
+                PREPROCESSING_STEPS (None = settings.OCR_PREPROCESSING, vacío = ninguno)
+            adaptive_dpi: Reconocer primero a settings.OCR_FAST_DPI y repetir a `dpi`
+                solo las páginas con poca confianza (None = settings.OCR_ADAPTIVE_DPI)
+            engine: Motor de OCR, de OCR_ENGINES (None = settings.OCR_ENGINE)
+            index_text: Guardar el texto por página en el índice de búsqueda
+                (None = settings.TEXT_INDEX_ENABLED)
+        
         Returns:
-            Diccionario con el texto extraído por página
+            Diccionario con el texto extraído por página ('indexed' indica si
+            quedó en el índice de búsqueda)
         """
         OCRService.configure_tesseract()
         
         try:
             if progress_callback:
-                progress_callback(5, "Convirtiendo PDF a imágenes...")
+                progress_callback(5, "Analizando PDF...")
             
-            images = convert_from_path(
-                input_path,
-                dpi=dpi,
-                poppler_path=settings.POPPLER_PATH
-            )
-            
-            total_pages = len(images)
-            extracted_texts = []
+            total_pages = PDFRasterizer.get_page_count(input_path)
             
-            # Aplicar OCR a cada página
-            for i, image in enumerate(images):
+            def page_done(completed, total):
                 if progress_callback:
-                    progress = int(5 + (i / total_pages) * 90)
-                    progress_callback(progress, f"Procesando página {i+1}/{total_pages}...")
-                
-                text = pytesseract.image_to_string(image, lang=language)
-                extracted_texts.append(text)
+                    progress = int(5 + (completed / total) * 90)
+                    progress_callback(progress, f"Procesada página {completed}/{total}")
+            
+            # Aplicar OCR solo a las páginas sin capa de texto
+            recognition = OCRService._recognize(
+                input_path, total_pages, language, dpi, workers, skip_text_pages,
+                page_done, use_cache, preprocessing, adaptive_dpi, engine
+            )
+            extracted_texts = recognition['texts']
+            skipped_pages = recognition['skipped_pages']
+            
+            indexed = OCRService._index_texts(input_path, extracted_texts, index_text)
             
             if progress_callback:
                 progress_callback(100, "Extracción completada")
@@ -186,10 +890,19 @@ class OCRService:
             return {
                 'success': True,
                 'total_pages': total_pages,
+                'pages_skipped': len(skipped_pages),
+                'skipped_pages': skipped_pages,
+                'cache_hits': recognition['cache_hits'],
+                'cache_misses': recognition['cache_misses'],
+                'preprocessing': recognition['preprocessing'],
+                'page_dpi': recognition['page_dpi'],
+                'pages_reprocessed': recognition['pages_reprocessed'],
+                'ocr_engine': recognition['engine'],
+                'indexed': indexed,
                 'texts': extracted_texts,
                 'total_characters': total_chars,
                 'message': f'Se extrajeron {total_chars} caracteres de {total_pages} páginas'
             }
-            
+        
         except Exception as e:
             raise Exception(f"Error al extraer texto: {str(e)}")
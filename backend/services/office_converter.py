@@ -0,0 +1,486 @@
+"""
+Conversores de documentos de oficina a PDF
+LibreOffice sin interfaz (con un pool de instancias en caliente), docx2pdf
+(Microsoft Word) y un conversor de prueba que no necesita suite ofimática
+"""
+from abc import ABC, abstractmethod
+import atexit
+import importlib.util
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import textwrap
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import pikepdf
+from config.settings import settings
+
+
+# Conversores disponibles ('auto' = LibreOffice si está instalado, si no docx2pdf)
+OFFICE_CONVERTERS = ('auto', 'libreoffice', 'docx2pdf', 'stub')
+
+# Segundos de espera a que una instancia de LibreOffice acepte conexiones
+OFFICE_START_TIMEOUT = 60
+
+# Ubicaciones habituales de LibreOffice fuera del PATH
+_SOFFICE_CANDIDATES = (
+    r'C:\Program Files\LibreOffice\program\soffice.exe',
+    r'C:\Program Files (x86)\LibreOffice\program\soffice.exe',
+    '/Applications/LibreOffice.app/Contents/MacOS/soffice',
+    '/usr/lib/libreoffice/program/soffice',
+    '/opt/libreoffice/program/soffice'
+)
+
+# Conversores compartidos por nombre (ver OfficeConverter.shared)
+_shared_converters: Dict[str, 'OfficeConverter'] = {}
+_shared_lock = threading.Lock()
+
+
+def find_soffice() -> Optional[str]:
+    """
+    Busca el ejecutable de LibreOffice
+    
+    Returns:
+        Ruta de soffice (settings.SOFFICE_PATH, el PATH o las ubicaciones
+        habituales) o None si no está instalado
+    """
+    if settings.SOFFICE_PATH:
+        return settings.SOFFICE_PATH if Path(settings.SOFFICE_PATH).exists() else None
+    
+    for name in ('soffice', 'libreoffice'):
+        path = shutil.which(name)
+        if path:
+            return path
+    
+    for path in _SOFFICE_CANDIDATES:
+        if Path(path).exists():
+            return path
+    return None
+
+
+def _kill_process(process: subprocess.Popen):
+    """Termina un proceso de LibreOffice junto con sus hijos (soffice.bin)"""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass
+    process.wait()
+
+
+def _popen_options() -> dict:
+    """Opciones de Popen para poder terminar el grupo de procesos completo"""
+    if os.name == 'posix':
+        return {'start_new_session': True}
+    return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+
+
+class OfficeConverter(ABC):
+    """
+    Conversor de documentos de oficina a PDF
+    
+    convert() puede llamarse desde varios hilos a la vez; cada conversor
+    atiende como mucho `workers` documentos simultáneos. Los conversores se
+    cierran con close() o usándolos como context manager.
+    """
+    
+    name = ''
+    
+    def __init__(self, workers: Optional[int] = None, timeout: Optional[float] = None):
+        self.workers = max(1, workers or 1)
+        self.timeout = settings.OFFICE_TIMEOUT if timeout is None else timeout
+    
+    @staticmethod
+    def create(
+        name: Optional[str] = None,
+        workers: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> 'OfficeConverter':
+        """
+        Crea un conversor
+        
+        Args:
+            name: 'auto', 'libreoffice', 'docx2pdf' o 'stub' (None = settings.WORD_CONVERTER)
+            workers: Documentos convertidos a la vez (None = settings.OFFICE_POOL_SIZE)
+            timeout: Segundos máximos por documento (None = settings.OFFICE_TIMEOUT)
+        
+        Raises:
+            ValueError: Si el conversor no existe
+            Exception: Si el conversor pedido no está instalado
+        """
+        name = name or settings.WORD_CONVERTER
+        if name not in OFFICE_CONVERTERS:
+            raise ValueError(
+                f"Conversor inválido: {name}. Opciones: {', '.join(OFFICE_CONVERTERS)}"
+            )
+        
+        if name == 'stub':
+            return StubConverter(workers, timeout)
+        
+        soffice = find_soffice()
+        if name == 'libreoffice' or (name == 'auto' and soffice):
+            if not soffice:
+                raise Exception("LibreOffice no está instalado")
+            return LibreOfficeConverter(soffice, workers or settings.OFFICE_POOL_SIZE, timeout)
+        
+        if importlib.util.find_spec('docx2pdf') is None:
+            raise Exception("docx2pdf no está instalado")
+        return Docx2PdfConverter(workers, timeout)
+    
+    @staticmethod
+    def shared(name: Optional[str] = None) -> 'OfficeConverter':
+        """
+        Conversor compartido por todo el proceso
+        
+        Se crea la primera vez que se pide y se mantiene abierto (con sus
+        instancias en caliente) hasta que termina el programa.
+        
+        Args:
+            name: Nombre del conversor (None = settings.WORD_CONVERTER)
+        """
+        name = name or settings.WORD_CONVERTER
+        with _shared_lock:
+            converter = _shared_converters.get(name)
+            if converter is None:
+                converter = OfficeConverter.create(name)
+                _shared_converters[name] = converter
+            return converter
+    
+    @staticmethod
+    def close_shared():
+        """Cierra los conversores compartidos"""
+        with _shared_lock:
+            converters = list(_shared_converters.values())
+            _shared_converters.clear()
+        for converter in converters:
+            converter.close()
+    
+    @abstractmethod
+    def convert(self, input_path: str, output_path: str, timeout: Optional[float] = None):
+        """
+        Convierte un documento a PDF
+        
+        Args:
+            input_path: Ruta del documento (DOCX, DOC, ODT, RTF...)
+            output_path: Ruta del PDF resultante
+            timeout: Segundos máximos (None = el del conversor)
+        
+        Raises:
+            Exception: Si la conversión falla o se agota el tiempo
+        """
+    
+    def close(self):
+        """Libera los recursos del conversor"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _OfficeInstance:
+    """
+    Una instancia de LibreOffice con su propio perfil de usuario
+    
+    LibreOffice solo admite un proceso por perfil, así que cada instancia
+    del pool usa un directorio de perfil distinto. Si el módulo `uno` está
+    disponible, el proceso se mantiene abierto y los documentos se le envían
+    por una tubería UNO; si no, cada documento se convierte con una llamada
+    a `soffice --convert-to` sobre el perfil ya inicializado.
+    """
+    
+    def __init__(self, soffice: str, index: int, use_uno: bool):
+        self.soffice = soffice
+        self.use_uno = use_uno
+        self.profile_dir = tempfile.mkdtemp(prefix=f'vectora_office_{index}_')
+        self.pipe_name = f'vectora_office_{os.getpid()}_{index}_{id(self)}'
+        self.process: Optional[subprocess.Popen] = None
+        self.desktop = None
+        self.ready = False
+    
+    def _base_command(self) -> List[str]:
+        return [
+            self.soffice,
+            f'-env:UserInstallation={Path(self.profile_dir).as_uri()}',
+            '--headless', '--invisible', '--nologo', '--norestore',
+            '--nodefault', '--nolockcheck'
+        ]
+    
+    def start(self):
+        """Arranca la instancia (o inicializa el perfil sin UNO)"""
+        if self.use_uno:
+            self._start_uno()
+        else:
+            # Crear el perfil una sola vez: es la parte más lenta del arranque
+            subprocess.run(
+                self._base_command() + ['--terminate_after_init'],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                timeout=OFFICE_START_TIMEOUT
+            )
+        self.ready = True
+    
+    def _start_uno(self):
+        """Arranca soffice escuchando en una tubería y se conecta por UNO"""
+        import uno
+        
+        self.process = subprocess.Popen(
+            self._base_command() + [f'--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            **_popen_options()
+        )
+        
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local
+        )
+        deadline = time.monotonic() + OFFICE_START_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(
+                    f'uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext'
+                )
+                break
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise Exception("No se pudo iniciar LibreOffice")
+                time.sleep(0.25)
+        
+        self.desktop = context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.frame.Desktop', context
+        )
+    
+    def convert(self, input_path: str, output_path: str, timeout: float):
+        """Convierte un documento; si se agota el tiempo, la instancia se detiene"""
+        if not self.ready or (self.use_uno and self.process.poll() is not None):
+            self.stop()
+            self.start()
+        
+        if self.use_uno:
+            self._convert_uno(input_path, output_path, timeout)
+        else:
+            self._convert_command(input_path, output_path, timeout)
+    
+    def _convert_uno(self, input_path: str, output_path: str, timeout: float):
+        """Carga el documento en la instancia abierta y lo exporta a PDF"""
+        import uno
+        from com.sun.star.beans import PropertyValue
+        
+        def properties(**values):
+            return tuple(PropertyValue(Name=name, Value=value) for name, value in values.items())
+        
+        # Si el documento se bloquea, matar el proceso desbloquea la llamada UNO
+        expired = threading.Event()
+        
+        def expire():
+            expired.set()
+            _kill_process(self.process)
+        
+        watchdog = threading.Timer(timeout, expire)
+        watchdog.start()
+        try:
+            document = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(str(Path(input_path).resolve())),
+                '_blank', 0, properties(Hidden=True, ReadOnly=True)
+            )
+            if document is None:
+                raise Exception("LibreOffice no pudo abrir el documento")
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(str(Path(output_path).resolve())),
+                    properties(FilterName='writer_pdf_Export')
+                )
+            finally:
+                document.close(True)
+        except Exception as e:
+            if expired.is_set():
+                self.stop()
+                raise Exception(f"Tiempo de conversión agotado ({timeout:g} s)")
+            if self.process.poll() is not None:
+                self.stop()
+            raise
+        finally:
+            watchdog.cancel()
+    
+    def _convert_command(self, input_path: str, output_path: str, timeout: float):
+        """Convierte con `soffice --convert-to` usando el perfil de la instancia"""
+        with tempfile.TemporaryDirectory(prefix='vectora_convert_') as out_dir:
+            self.process = subprocess.Popen(
+                self._base_command() + [
+                    '--convert-to', 'pdf:writer_pdf_Export', '--outdir', out_dir,
+                    str(Path(input_path).resolve())
+                ],
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                **_popen_options()
+            )
+            try:
+                _, stderr = self.process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                _kill_process(self.process)
+                raise Exception(f"Tiempo de conversión agotado ({timeout:g} s)")
+            finally:
+                self.process = None
+            
+            converted = Path(out_dir) / f"{Path(input_path).stem}.pdf"
+            if not converted.exists():
+                detail = stderr.decode(errors='replace').strip()
+                raise Exception(detail or "LibreOffice no generó el PDF")
+            shutil.move(str(converted), output_path)
+    
+    def stop(self):
+        """Detiene el proceso de la instancia"""
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            _kill_process(self.process)
+            self.process = None
+        self.ready = False
+    
+    def close(self):
+        """Detiene la instancia y borra su perfil"""
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class LibreOfficeConverter(OfficeConverter):
+    """
+    LibreOffice sin interfaz, con un pool de instancias en caliente
+    
+    Cada instancia arranca con el primer documento que atiende (o todas a
+    la vez con warm_up()) y se reutiliza para los siguientes, de modo que el
+    coste de arranque se paga una vez por instancia y no por archivo. Una
+    instancia que agota el tiempo o se cae se reinicia con el siguiente
+    documento.
+    """
+    
+    name = 'libreoffice'
+    
+    def __init__(self, soffice: str, workers: Optional[int] = None, timeout: Optional[float] = None):
+        super().__init__(workers, timeout)
+        self.soffice = soffice
+        use_uno = importlib.util.find_spec('uno') is not None
+        self._instances = [_OfficeInstance(soffice, i, use_uno) for i in range(self.workers)]
+        self._idle = queue.Queue()
+        for instance in self._instances:
+            self._idle.put(instance)
+    
+    def warm_up(self):
+        """Arranca todas las instancias del pool a la vez"""
+        threads = [
+            threading.Thread(target=instance.start)
+            for instance in self._instances if not instance.ready
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    def convert(self, input_path: str, output_path: str, timeout: Optional[float] = None):
+        instance = self._idle.get()
+        try:
+            instance.convert(input_path, output_path, self.timeout if timeout is None else timeout)
+        finally:
+            self._idle.put(instance)
+    
+    def close(self):
+        for instance in self._instances:
+            instance.close()
+
+
+class Docx2PdfConverter(OfficeConverter):
+    """
+    Microsoft Word a través de docx2pdf (Windows y macOS)
+    
+    Word se controla por automatización y no admite documentos en paralelo
+    ni cancelar una conversión, así que los documentos se atienden de uno
+    en uno y el tiempo máximo no se aplica.
+    """
+    
+    name = 'docx2pdf'
+    
+    def __init__(self, workers: Optional[int] = None, timeout: Optional[float] = None):
+        super().__init__(1, timeout)
+        self._lock = threading.Lock()
+    
+    def convert(self, input_path: str, output_path: str, timeout: Optional[float] = None):
+        from docx2pdf import convert
+        
+        with self._lock:
+            convert(input_path, output_path)
+
+
+class StubConverter(OfficeConverter):
+    """
+    Conversor de prueba que no necesita suite ofimática
+    
+    Genera un PDF A4 con el texto plano de los párrafos del documento (solo
+    DOCX; otros formatos dan una página en blanco). Sirve para probar los
+    flujos de conversión en equipos sin LibreOffice ni Word.
+    """
+    
+    name = 'stub'
+    
+    LINES_PER_PAGE = 60
+    LINE_WIDTH = 95
+    
+    def _read_lines(self, input_path: str) -> List[str]:
+        if Path(input_path).suffix.lower() != '.docx':
+            return []
+        
+        import docx
+        
+        lines = []
+        for paragraph in docx.Document(input_path).paragraphs:
+            lines.extend(textwrap.wrap(paragraph.text, self.LINE_WIDTH) or [''])
+        return lines
+    
+    def convert(self, input_path: str, output_path: str, timeout: Optional[float] = None):
+        if not Path(input_path).exists():
+            raise Exception(f"No se encontró el archivo: {input_path}")
+        
+        lines = self._read_lines(input_path)
+        pdf = pikepdf.new()
+        font = pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Font,
+            Subtype=pikepdf.Name.Type1,
+            BaseFont=pikepdf.Name.Helvetica,
+            Encoding=pikepdf.Name.WinAnsiEncoding
+        ))
+        
+        for start in range(0, max(len(lines), 1), self.LINES_PER_PAGE):
+            content = [b'BT /F1 10 Tf 12 TL 56 786 Td']
+            for line in lines[start:start + self.LINES_PER_PAGE]:
+                text = line.encode('cp1252', errors='replace')
+                text = text.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+                content.append(b'(' + text + b") '")
+            content.append(b'ET')
+            
+            pdf.pages.append(pikepdf.Page(pikepdf.Dictionary(
+                Type=pikepdf.Name.Page,
+                MediaBox=[0, 0, 595, 842],
+                Resources=pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font)),
+                Contents=pdf.make_stream(b'\n'.join(content))
+            )))
+        
+        pdf.save(output_path)
+
+
+atexit.register(OfficeConverter.close_shared)
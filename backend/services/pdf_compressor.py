@@ -1,24 +1,147 @@
 """
 Servicio de compresión de PDFs
-Reduce el tamaño de archivos PDF comprimiendo streams
+Reduce el tamaño de archivos PDF recomprimiendo imágenes y streams
 """
 import pikepdf
+from pikepdf import Name, PdfImage
+from PIL import Image
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Optional, Dict, List, Tuple, Set, Any
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import hashlib
+import io
+import math
 import os
+import shutil
+import tempfile
+from config.settings import settings
+
+
+# Matriz identidad en formato PDF (a, b, c, d, e, f)
+_IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+# Solo se remuestrea si la resolución supera el objetivo en este factor
+_RESAMPLE_THRESHOLD = 1.2
+
+# Claves que dependen de la codificación y no del contenido del stream
+_ENCODING_KEYS = {'/Length', '/Filter', '/DecodeParms', '/DL'}
+
+# Diccionarios (no streams) que también se deduplican; los arrays indirectos
+# se deduplican siempre
+_DEDUP_DICT_TYPES = {'/Font', '/FontDescriptor', '/Encoding', '/ExtGState', '/Pattern'}
+
+
+def _multiply(m1: Tuple[float, ...], m2: Tuple[float, ...]) -> Tuple[float, ...]:
+    """Multiplica dos matrices PDF (m1 × m2)"""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (
+        a1 * a2 + b1 * c2,
+        a1 * b2 + b1 * d2,
+        c1 * a2 + d1 * c2,
+        c1 * b2 + d1 * d2,
+        e1 * a2 + f1 * c2 + e2,
+        e1 * b2 + f1 * d2 + f2
+    )
+
+
+def _encode_image(
+    image: Image.Image,
+    target_size: Optional[Tuple[int, int]],
+    quality: int
+) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+    """
+    Remuestrea y recodifica una imagen extraída del PDF
+    
+    Se ejecuta en los hilos del pool: Pillow libera el GIL al decodificar,
+    remuestrear y codificar.
+    
+    Args:
+        image: Imagen decodificada
+        target_size: Nuevo tamaño (ancho, alto) o None para conservarlo
+        quality: Calidad JPEG (1-95)
+        
+    Returns:
+        Tupla (datos, propiedades del stream) o None si no se puede recodificar
+    """
+    if image.mode == '1':
+        # Imágenes bitonales: CCITT Group 4 sin pérdida (sin remuestrear)
+        buffer = io.BytesIO()
+        image.save(
+            buffer,
+            'TIFF',
+            compression='group4',
+            tiffinfo={278: image.height}  # Una sola tira
+        )
+        tiff = Image.open(io.BytesIO(buffer.getvalue()))
+        offsets = tiff.tag_v2.get(273)
+        counts = tiff.tag_v2.get(279)
+        if not offsets or len(offsets) != 1:
+            return None
+        data = buffer.getvalue()[offsets[0]:offsets[0] + counts[0]]
+        return data, {
+            'filter': Name.CCITTFaxDecode,
+            'decode_parms': pikepdf.Dictionary(
+                K=-1,
+                Columns=image.width,
+                Rows=image.height,
+                # Pillow escribe MinIsBlack: los "blancos" del fax son negros
+                BlackIs1=True
+            ),
+            'mode': '1',
+            'width': image.width,
+            'height': image.height
+        }
+    
+    if image.mode == 'P':
+        image = image.convert('RGB')
+    
+    if image.mode not in ('L', 'RGB'):
+        return None
+    
+    if target_size and target_size != image.size:
+        image = image.resize(target_size, Image.LANCZOS)
+    
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality, optimize=True)
+    return buffer.getvalue(), {
+        'filter': Name.DCTDecode,
+        'decode_parms': None,
+        'mode': image.mode,
+        'width': image.width,
+        'height': image.height
+    }
 
 
 class PDFCompressor:
     """Servicio para comprimir archivos PDF"""
     
     # Niveles de compresión
+    # 'dpi' es la resolución máxima de las imágenes tras la compresión
     COMPRESSION_LEVELS = {
-        'low': {'quality': 90, 'label': 'Baja', 'reduction': '~20%'},
-        'medium': {'quality': 70, 'label': 'Media', 'reduction': '~40%'},
-        'high': {'quality': 50, 'label': 'Alta', 'reduction': '~60%'},
-        'extreme': {'quality': 30, 'label': 'Extrema', 'reduction': '~80%'}
+        'low': {'quality': 90, 'dpi': 300, 'label': 'Baja', 'reduction': '~20%'},
+        'medium': {'quality': 70, 'dpi': 200, 'label': 'Media', 'reduction': '~40%'},
+        'high': {'quality': 50, 'dpi': 150, 'label': 'Alta', 'reduction': '~60%'},
+        'extreme': {'quality': 30, 'dpi': 96, 'label': 'Extrema', 'reduction': '~80%'}
     }
     
+    # Escalones (calidad JPEG, DPI) para el modo de tamaño objetivo,
+    # de mayor a menor calidad
+    TARGET_SIZE_STEPS = [
+        (90, 300), (80, 250), (70, 200), (60, 170), (50, 150),
+        (40, 120), (30, 96), (25, 72), (20, 60)
+    ]
+    
+    # Guardados completos como máximo al buscar el tamaño objetivo
+    TARGET_SIZE_MAX_ATTEMPTS = 4
+    
+    # Imágenes (las más grandes) usadas para estimar el tamaño final
+    TARGET_SIZE_SAMPLE_IMAGES = 8
+    
+    # Margen de error de la estimación: no se prueban escalones cuya
+    # estimación supere el objetivo en más de este factor
+    TARGET_SIZE_ESTIMATE_MARGIN = 1.15
+    
     @staticmethod
     def get_compression_level_from_value(value: int) -> str:
         """
@@ -39,21 +162,745 @@ class PDFCompressor:
         else:
             return 'extreme'
     
+    @staticmethod
+    def _collect_image_dpi(pdf: pikepdf.Pdf) -> Dict[Tuple[int, int], float]:
+        """
+        Calcula la resolución efectiva de cada imagen según cómo se dibuja
+        
+        Recorre los content streams de las páginas (y de los Form XObjects
+        anidados) siguiendo la matriz de transformación actual. Si una imagen
+        se dibuja varias veces se conserva la resolución más alta.
+        
+        Args:
+            pdf: Documento abierto con pikepdf
+            
+        Returns:
+            Diccionario {objgen de la imagen: DPI efectivo}
+        """
+        dpi_by_image: Dict[Tuple[int, int], float] = {}
+        
+        def walk(content, resources, ctm, depth):
+            if depth > 8 or resources is None:
+                return
+            xobjects = resources.get('/XObject')
+            if xobjects is None:
+                return
+            
+            stack = []
+            try:
+                instructions = pikepdf.parse_content_stream(content, 'q Q cm Do')
+            except Exception:
+                return
+            
+            for operands, operator in instructions:
+                op = str(operator)
+                if op == 'q':
+                    stack.append(ctm)
+                elif op == 'Q':
+                    if stack:
+                        ctm = stack.pop()
+                elif op == 'cm' and len(operands) == 6:
+                    ctm = _multiply(tuple(float(v) for v in operands), ctm)
+                elif op == 'Do' and operands:
+                    xobject = xobjects.get(operands[0])
+                    if not isinstance(xobject, pikepdf.Stream):
+                        continue
+                    subtype = xobject.get('/Subtype')
+                    
+                    if subtype == '/Image':
+                        a, b, c, d = ctm[:4]
+                        width_in = math.hypot(a, b) / 72
+                        height_in = math.hypot(c, d) / 72
+                        if width_in <= 0 or height_in <= 0:
+                            continue
+                        dpi = max(
+                            int(xobject.get('/Width', 0)) / width_in,
+                            int(xobject.get('/Height', 0)) / height_in
+                        )
+                        key = xobject.objgen
+                        dpi_by_image[key] = max(dpi_by_image.get(key, 0), dpi)
+                    
+                    elif subtype == '/Form':
+                        matrix = xobject.get('/Matrix')
+                        form_ctm = ctm
+                        if matrix is not None and len(matrix) == 6:
+                            form_ctm = _multiply(tuple(float(v) for v in matrix), ctm)
+                        walk(
+                            xobject,
+                            xobject.get('/Resources', resources),
+                            form_ctm,
+                            depth + 1
+                        )
+        
+        for page in pdf.pages:
+            walk(page, page.obj.get('/Resources'), _IDENTITY, 0)
+        
+        return dpi_by_image
+    
+    @staticmethod
+    def _stream_digest(obj: pikepdf.Stream, digests: Dict[Tuple[int, int], str]) -> str:
+        """
+        Hash del contenido de un stream, guardado en `digests` por objgen
+        
+        Deduplicar solo cambia referencias, nunca los datos de los streams,
+        así que cada stream se decodifica y se hashea una vez por ejecución.
+        """
+        digest = digests.get(obj.objgen)
+        if digest is None:
+            try:
+                digest = 'dec:' + hashlib.sha256(obj.read_bytes()).hexdigest()
+            except Exception:
+                # Filtros que no se pueden decodificar (ej: DCT): comparar en crudo
+                digest = 'raw:' + hashlib.sha256(obj.read_raw_bytes()).hexdigest()
+            digests[obj.objgen] = digest
+        return digest
+    
+    @staticmethod
+    def _serialize(
+        value: Any,
+        digests: Dict[Tuple[int, int], str],
+        memo: Dict[Tuple[int, int], str],
+        visiting: Set[Tuple[int, int]]
+    ) -> str:
+        """
+        Serializa un valor sustituyendo cada objeto indirecto por el hash de su contenido
+        
+        Así dos objetos que apuntan a copias idénticas (por ejemplo, imágenes
+        con su propio array [/ICCBased n 0 R]) producen el mismo texto. Los
+        ciclos se cortan con la referencia al objeto.
+        """
+        if not isinstance(value, pikepdf.Object):
+            return repr(value)
+        if not value.is_indirect:
+            return PDFCompressor._serialize_content(value, digests, memo, visiting)
+        
+        objgen = value.objgen
+        if objgen in memo:
+            return memo[objgen]
+        if objgen in visiting:
+            return f'{objgen[0]} {objgen[1]} R'
+        
+        visiting.add(objgen)
+        try:
+            text = PDFCompressor._serialize_content(value, digests, memo, visiting)
+        finally:
+            visiting.discard(objgen)
+        
+        memo[objgen] = '#' + hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return memo[objgen]
+    
+    @staticmethod
+    def _serialize_content(
+        value: pikepdf.Object,
+        digests: Dict[Tuple[int, int], str],
+        memo: Dict[Tuple[int, int], str],
+        visiting: Set[Tuple[int, int]]
+    ) -> str:
+        """Serializa el contenido de un objeto (ver _serialize)"""
+        def serialize(item):
+            return PDFCompressor._serialize(item, digests, memo, visiting)
+        
+        if isinstance(value, pikepdf.Stream):
+            digest = PDFCompressor._stream_digest(value, digests)
+            # Sin decodificar, el filtro y sus parámetros (DecodeParms,
+            # JBIG2Globals...) forman parte del contenido
+            skip = _ENCODING_KEYS if digest.startswith('dec:') else {'/Length', '/DL'}
+            stream_dict = value.stream_dict
+            return digest + '<<' + ''.join(
+                f'{key} {serialize(stream_dict[key])} '
+                for key in sorted(stream_dict.keys()) if key not in skip
+            ) + '>>'
+        
+        if isinstance(value, pikepdf.Dictionary):
+            return '<<' + ''.join(
+                f'{key} {serialize(value[key])} ' for key in sorted(value.keys())
+            ) + '>>'
+        
+        if isinstance(value, pikepdf.Array):
+            return '[' + ' '.join(serialize(item) for item in value) + ']'
+        
+        return value.unparse().decode('latin-1')
+    
+    @staticmethod
+    def _content_key(
+        obj: pikepdf.Object,
+        digests: Dict[Tuple[int, int], str],
+        memo: Dict[Tuple[int, int], str]
+    ) -> Optional[str]:
+        """
+        Calcula una clave de contenido para deduplicar un objeto
+        
+        Para streams se usa el hash del contenido decodificado más el resto del
+        diccionario (sin las claves de codificación); las referencias a otros
+        objetos se comparan por contenido (ver _serialize).
+        
+        Args:
+            obj: Objeto indirecto
+            digests: Hashes de streams ya calculados (por objgen)
+            memo: Claves ya calculadas en esta pasada (por objgen)
+        
+        Returns:
+            Clave del contenido o None si el objeto no se deduplica
+        """
+        if isinstance(obj, pikepdf.Stream):
+            if obj.get('/Type') in ('/XRef', '/ObjStm', '/Metadata'):
+                return None
+        elif isinstance(obj, pikepdf.Dictionary):
+            if obj.get('/Type') not in _DEDUP_DICT_TYPES:
+                return None
+        elif not isinstance(obj, pikepdf.Array):
+            return None
+        
+        return PDFCompressor._serialize(obj, digests, memo, set())
+    
+    @staticmethod
+    def _replace_references(
+        container: pikepdf.Object,
+        replacements: Dict[Tuple[int, int], pikepdf.Object]
+    ):
+        """Sustituye las referencias a objetos duplicados por el objeto canónico"""
+        if isinstance(container, pikepdf.Array):
+            keys = range(len(container))
+        elif isinstance(container, (pikepdf.Dictionary, pikepdf.Stream)):
+            keys = list(container.keys())
+        else:
+            return
+        
+        for key in keys:
+            value = container[key]
+            if not isinstance(value, (pikepdf.Dictionary, pikepdf.Array, pikepdf.Stream)):
+                continue
+            if value.is_indirect:
+                canonical = replacements.get(value.objgen)
+                if canonical is not None:
+                    container[key] = canonical
+            else:
+                PDFCompressor._replace_references(value, replacements)
+    
+    @staticmethod
+    def _deduplicate_objects(
+        pdf: pikepdf.Pdf,
+        digests: Optional[Dict[Tuple[int, int], str]] = None
+    ) -> Dict[str, int]:
+        """
+        Unifica imágenes, fuentes, perfiles ICC, Form XObjects y arrays idénticos
+        
+        Los objetos con el mismo contenido se reemplazan por una única copia y
+        los duplicados quedan sin referencias, por lo que no se escriben al
+        guardar. Se repite mientras aparezcan duplicados nuevos, ya que unificar
+        imágenes o fuentes puede hacer idénticos a los objetos que las usan.
+        
+        Args:
+            pdf: Documento abierto con pikepdf (se modifica en memoria)
+            digests: Hashes de streams por objgen, para reutilizarlos entre
+                varias aperturas del mismo archivo (se completa aquí)
+            
+        Returns:
+            Diccionario con estadísticas y los objetos descartados:
+            {
+                'duplicates_removed': int,
+                'bytes_reclaimed': int,
+                'removed': Set[Tuple[int, int]]
+            }
+        """
+        if digests is None:
+            digests = {}
+        removed = set()
+        stats = {'duplicates_removed': 0, 'bytes_reclaimed': 0, 'removed': removed}
+        
+        for _ in range(4):
+            canonical_by_key = {}
+            replacements = {}
+            memo = {}
+            
+            for obj in pdf.objects:
+                if obj.objgen in removed:
+                    continue
+                key = PDFCompressor._content_key(obj, digests, memo)
+                if key is None:
+                    continue
+                canonical = canonical_by_key.setdefault(key, obj)
+                if canonical.objgen != obj.objgen:
+                    replacements[obj.objgen] = canonical
+                    stats['duplicates_removed'] += 1
+                    if isinstance(obj, pikepdf.Stream):
+                        stats['bytes_reclaimed'] += len(obj.read_raw_bytes())
+                    else:
+                        stats['bytes_reclaimed'] += len(obj.unparse())
+            
+            if not replacements:
+                break
+            
+            removed.update(replacements)
+            for obj in pdf.objects:
+                if obj.objgen not in removed:
+                    PDFCompressor._replace_references(obj, replacements)
+            PDFCompressor._replace_references(pdf.trailer, replacements)
+        
+        return stats
+    
+    @staticmethod
+    def _candidate_images(
+        pdf: pikepdf.Pdf,
+        exclude: Optional[Set[Tuple[int, int]]] = None
+    ) -> List[pikepdf.Stream]:
+        """
+        Selecciona las imágenes que se pueden recomprimir con pérdida
+        
+        Se excluyen las máscaras (SMask, ImageMask), las imágenes con máscara
+        por color o con /Decode, y los objetos indicados en `exclude`.
+        
+        Returns:
+            Lista de streams de imagen
+        """
+        exclude = exclude or set()
+        
+        # Imágenes usadas como máscara: se conservan sin pérdida
+        mask_ids = set()
+        candidates = []
+        for obj in pdf.objects:
+            if not isinstance(obj, pikepdf.Stream) or obj.get('/Subtype') != '/Image':
+                continue
+            if obj.objgen in exclude:
+                continue
+            smask = obj.get('/SMask')
+            if isinstance(smask, pikepdf.Stream):
+                mask_ids.add(smask.objgen)
+            candidates.append(obj)
+        
+        return [
+            obj for obj in candidates
+            if obj.objgen not in mask_ids
+            and not obj.get('/ImageMask', False)
+            and not isinstance(obj.get('/Mask'), pikepdf.Array)
+            and '/Decode' not in obj
+        ]
+    
+    @staticmethod
+    def _prepare_image(
+        obj: pikepdf.Stream,
+        dpi: Optional[float],
+        target_dpi: int
+    ) -> Tuple[Image.Image, Optional[Tuple[int, int]]]:
+        """
+        Decodifica una imagen del PDF y calcula su tamaño objetivo
+        
+        Args:
+            obj: Stream de la imagen
+            dpi: Resolución efectiva de la imagen (None si no se conoce)
+            target_dpi: Resolución máxima deseada
+            
+        Returns:
+            Tupla (imagen, nuevo tamaño o None si no hay que remuestrear)
+        """
+        image = PdfImage(obj).as_pil_image()
+        target_size = None
+        if dpi and dpi > target_dpi * _RESAMPLE_THRESHOLD:
+            scale = target_dpi / dpi
+            target_size = (
+                max(1, round(image.width * scale)),
+                max(1, round(image.height * scale))
+            )
+        return image, target_size
+    
+    @staticmethod
+    def _recompress_images(
+        pdf: pikepdf.Pdf,
+        quality: int,
+        target_dpi: int,
+        workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        exclude: Optional[Set[Tuple[int, int]]] = None
+    ) -> Dict[str, int]:
+        """
+        Remuestrea y recodifica las imágenes del documento
+        
+        Cada imagen se decodifica, se reduce a `target_dpi` si su resolución
+        efectiva es mayor y se recodifica como JPEG con la calidad indicada
+        (o CCITT G4 si es bitonal). Solo se reemplaza si el resultado ocupa
+        menos que el stream original.
+        
+        Args:
+            pdf: Documento abierto con pikepdf (se modifica en memoria)
+            quality: Calidad JPEG
+            target_dpi: Resolución máxima de las imágenes
+            workers: Imágenes procesadas en paralelo (None o 1 = secuencial)
+            progress_callback: Función llamada con (completadas, total)
+            exclude: Objetos a ignorar (ej: duplicados ya sin referencias)
+            
+        Returns:
+            Diccionario con estadísticas:
+            {
+                'images_total': int,
+                'images_recompressed': int,
+                'bytes_saved': int
+            }
+        """
+        dpi_by_image = PDFCompressor._collect_image_dpi(pdf)
+        images = PDFCompressor._candidate_images(pdf, exclude)
+        
+        stats = {'images_total': len(images), 'images_recompressed': 0, 'bytes_saved': 0}
+        total = len(images)
+        
+        def prepare(obj):
+            return PDFCompressor._prepare_image(
+                obj, dpi_by_image.get(obj.objgen), target_dpi
+            )
+        
+        def apply(obj, encoded):
+            """Escribe la imagen recodificada si ocupa menos"""
+            if encoded is None:
+                return
+            data, info = encoded
+            original_size = len(obj.read_raw_bytes())
+            if len(data) >= original_size:
+                return
+            
+            obj.write(data, filter=info['filter'], decode_parms=info['decode_parms'])
+            obj.Width = info['width']
+            obj.Height = info['height']
+            
+            if info['mode'] == '1':
+                obj.BitsPerComponent = 1
+                obj.ColorSpace = Name.DeviceGray
+            else:
+                obj.BitsPerComponent = 8
+                components = 1 if info['mode'] == 'L' else 3
+                colorspace = obj.get('/ColorSpace')
+                keep_icc = (
+                    isinstance(colorspace, pikepdf.Array)
+                    and len(colorspace) == 2
+                    and colorspace[0] == '/ICCBased'
+                    and int(colorspace[1].get('/N', 0)) == components
+                )
+                if not keep_icc:
+                    obj.ColorSpace = Name.DeviceGray if components == 1 else Name.DeviceRGB
+            
+            stats['images_recompressed'] += 1
+            stats['bytes_saved'] += original_size - len(data)
+        
+        completed = 0
+        
+        def report():
+            if progress_callback:
+                progress_callback(completed, total)
+        
+        if not workers or workers <= 1:
+            for obj in images:
+                try:
+                    image, target_size = prepare(obj)
+                    apply(obj, _encode_image(image, target_size, quality))
+                except Exception:
+                    pass  # Formato no soportado: se conserva la imagen original
+                completed += 1
+                report()
+            return stats
+        
+        # La lectura y escritura de objetos pikepdf se hace en este hilo;
+        # los hilos del pool solo remuestrean y codifican
+        pending = {}
+        
+        def collect(done):
+            nonlocal completed
+            for future in done:
+                obj = pending.pop(future)
+                try:
+                    apply(obj, future.result())
+                except Exception:
+                    pass
+                completed += 1
+                report()
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for obj in images:
+                    try:
+                        image, target_size = prepare(obj)
+                    except Exception:
+                        completed += 1
+                        report()
+                        continue
+                    
+                    future = executor.submit(_encode_image, image, target_size, quality)
+                    pending[future] = obj
+                    
+                    # Limitar las imágenes decodificadas en memoria
+                    if len(pending) >= workers * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            finally:
+                for future in pending:
+                    future.cancel()
+        
+        return stats
+    
+    @staticmethod
+    def _compress_to_file(
+        input_path: str,
+        output_path: str,
+        quality: int,
+        target_dpi: int,
+        workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        digests: Optional[Dict[Tuple[int, int], str]] = None
+    ) -> Dict[str, int]:
+        """
+        Ejecuta una pasada completa de compresión y guarda el resultado
+        
+        Args:
+            input_path: Ruta del PDF original
+            output_path: Ruta del PDF comprimido
+            quality: Calidad JPEG de las imágenes
+            target_dpi: Resolución máxima de las imágenes
+            workers: Imágenes procesadas en paralelo (None o 1 = secuencial)
+            progress_callback: Función para reportar progreso (0-100)
+            digests: Hashes de streams de `input_path` ya calculados
+                (ver _deduplicate_objects)
+            
+        Returns:
+            Estadísticas combinadas de deduplicación e imágenes
+        """
+        with pikepdf.open(input_path) as pdf:
+            if progress_callback:
+                progress_callback(5)
+            
+            # Unificar recursos repetidos antes de procesar imágenes
+            dedup_stats = PDFCompressor._deduplicate_objects(pdf, digests)
+            
+            if progress_callback:
+                progress_callback(10)
+            
+            def images_progress(completed, total):
+                if progress_callback and total > 0:
+                    progress = int(10 + completed / total * 80)
+                    progress_callback(progress)
+            
+            # Recomprimir imágenes según los parámetros elegidos
+            image_stats = PDFCompressor._recompress_images(
+                pdf,
+                quality=quality,
+                target_dpi=target_dpi,
+                workers=workers,
+                progress_callback=images_progress,
+                exclude=dedup_stats['removed']
+            )
+            
+            if progress_callback:
+                progress_callback(90)
+            
+            # Guardar con compresión
+            # compress_streams=True optimiza los streams del PDF
+            # object_stream_mode reduce el tamaño reorganizando objetos
+            pdf.save(
+                output_path,
+                compress_streams=True,
+                stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate
+            )
+            
+            if progress_callback:
+                progress_callback(100)
+        
+        return {
+            'duplicates_removed': dedup_stats['duplicates_removed'],
+            'dedup_bytes_reclaimed': dedup_stats['bytes_reclaimed'],
+            'images_recompressed': image_stats['images_recompressed']
+        }
+    
+    @staticmethod
+    def _estimate_step_sizes(
+        input_path: str,
+        digests: Optional[Dict[Tuple[int, int], str]] = None
+    ) -> List[int]:
+        """
+        Estima el tamaño final para cada escalón de TARGET_SIZE_STEPS
+        
+        Recodifica una muestra con las imágenes más grandes en cada escalón y
+        extrapola la proporción obtenida al total de bytes de imagen. El resto
+        del documento se considera fijo.
+        
+        Args:
+            input_path: Ruta del PDF original
+            digests: Hashes de streams ya calculados (ver _deduplicate_objects)
+            
+        Returns:
+            Lista de tamaños estimados en bytes, uno por escalón
+        """
+        steps = PDFCompressor.TARGET_SIZE_STEPS
+        original_size = os.path.getsize(input_path)
+        
+        with pikepdf.open(input_path) as pdf:
+            dedup_stats = PDFCompressor._deduplicate_objects(pdf, digests)
+            dpi_by_image = PDFCompressor._collect_image_dpi(pdf)
+            images = PDFCompressor._candidate_images(pdf, dedup_stats['removed'])
+            
+            raw_sizes = {obj.objgen: len(obj.read_raw_bytes()) for obj in images}
+            image_bytes = sum(raw_sizes.values())
+            other_bytes = max(0, original_size - dedup_stats['bytes_reclaimed'] - image_bytes)
+            
+            sample = sorted(images, key=lambda o: raw_sizes[o.objgen], reverse=True)
+            sample = sample[:PDFCompressor.TARGET_SIZE_SAMPLE_IMAGES]
+            sample_raw = sum(raw_sizes[obj.objgen] for obj in sample)
+            
+            if not sample_raw:
+                return [other_bytes + image_bytes] * len(steps)
+            
+            estimates = []
+            for quality, target_dpi in steps:
+                sample_new = 0
+                for obj in sample:
+                    raw_size = raw_sizes[obj.objgen]
+                    try:
+                        image, target_size = PDFCompressor._prepare_image(
+                            obj, dpi_by_image.get(obj.objgen), target_dpi
+                        )
+                        encoded = _encode_image(image, target_size, quality)
+                    except Exception:
+                        encoded = None
+                    # Igual que al aplicar: solo se reemplaza si ocupa menos
+                    new_size = len(encoded[0]) if encoded else raw_size
+                    sample_new += min(new_size, raw_size)
+                
+                ratio = sample_new / sample_raw
+                estimates.append(int(other_bytes + image_bytes * ratio))
+        
+        return estimates
+    
+    @staticmethod
+    def _compress_to_target(
+        input_path: str,
+        output_path: str,
+        target_size_mb: float,
+        workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Busca los parámetros de mayor calidad cuyo resultado no supere el objetivo
+        
+        Parte del escalón sugerido por la estimación y hace una búsqueda binaria
+        con guardados completos sobre los escalones de TARGET_SIZE_STEPS cuya
+        estimación es plausible, limitada a TARGET_SIZE_MAX_ATTEMPTS intentos.
+        Si ningún escalón alcanza el objetivo se conserva el resultado más
+        pequeño.
+        
+        Returns:
+            Estadísticas de la pasada elegida más los parámetros usados
+        """
+        steps = PDFCompressor.TARGET_SIZE_STEPS
+        max_attempts = PDFCompressor.TARGET_SIZE_MAX_ATTEMPTS
+        target_bytes = int(target_size_mb * 1024 * 1024)
+        
+        if progress_callback:
+            progress_callback(2)
+        
+        # Cada intento vuelve a abrir el mismo archivo: los hashes de sus
+        # streams (por objgen) se calculan una sola vez
+        digests = {}
+        estimates = PDFCompressor._estimate_step_sizes(input_path, digests)
+        last = len(steps) - 1
+        first = next(
+            (i for i, size in enumerate(estimates) if size <= target_bytes),
+            last
+        )
+        plausible_limit = target_bytes * PDFCompressor.TARGET_SIZE_ESTIMATE_MARGIN
+        plausible = next(
+            (i for i, size in enumerate(estimates) if size <= plausible_limit),
+            last
+        )
+        
+        if progress_callback:
+            progress_callback(10)
+        
+        # Se busca el primer escalón (el de mayor calidad) que cabe en [lo, hi]
+        lo, hi = plausible, last
+        index = first
+        attempts = 0
+        best = None       # (índice, ruta, tamaño, estadísticas) que cumple el objetivo
+        smallest = None   # Resultado más pequeño, por si ninguno cumple
+        temp_paths = []
+        
+        try:
+            while attempts < max_attempts:
+                quality, target_dpi = steps[index]
+                fd, temp_path = tempfile.mkstemp(suffix='.pdf', dir=settings.TEMP_DIR)
+                os.close(fd)
+                temp_paths.append(temp_path)
+                
+                slot_start = 10 + attempts * 85 // max_attempts
+                
+                def attempt_progress(value, start=slot_start):
+                    if progress_callback:
+                        progress_callback(start + value * 85 // (100 * max_attempts))
+                
+                stats = PDFCompressor._compress_to_file(
+                    input_path, temp_path, quality, target_dpi, workers, attempt_progress,
+                    digests
+                )
+                attempts += 1
+                size = os.path.getsize(temp_path)
+                
+                if smallest is None or size < smallest[2]:
+                    smallest = (index, temp_path, size, stats)
+                
+                if size <= target_bytes:
+                    best = (index, temp_path, size, stats)
+                    hi = index - 1
+                else:
+                    lo = index + 1
+                
+                if lo > hi:
+                    break
+                index = (lo + hi + 1) // 2 if best is None else (lo + hi) // 2
+            
+            chosen = best or smallest
+            index, temp_path, size, stats = chosen
+            shutil.copy(temp_path, output_path)
+        finally:
+            for path in temp_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        
+        if progress_callback:
+            progress_callback(100)
+        
+        quality, target_dpi = steps[index]
+        stats.update({
+            'target_reached': best is not None,
+            'chosen_quality': quality,
+            'chosen_dpi': target_dpi,
+            'attempts': attempts
+        })
+        return stats
+    
     @staticmethod
     def compress_pdf(
         input_path: str,
         output_path: str,
         quality_level: str = 'medium',
-        progress_callback: Optional[Callable[[int], None]] = None
+        progress_callback: Optional[Callable[[int], None]] = None,
+        workers: Optional[int] = None,
+        target_size_mb: Optional[float] = None
     ) -> dict:
         """
         Comprime un PDF reduciendo la calidad de imágenes y optimizando streams
         
+        Con `target_size_mb` se ignora `quality_level` y se buscan
+        automáticamente la calidad y resolución más altas cuyo resultado no
+        supere ese tamaño.
+        
         Args:
             input_path: Ruta del PDF original
             output_path: Ruta del PDF comprimido
             quality_level: Nivel de compresión ('low', 'medium', 'high', 'extreme')
             progress_callback: Función para reportar progreso
+            workers: Imágenes procesadas en paralelo (None o 1 = secuencial)
+            target_size_mb: Tamaño máximo deseado en MB (None = usar quality_level)
             
         Returns:
             Diccionario con información del resultado:
@@ -63,59 +910,73 @@ class PDFCompressor:
                 'original_size_mb': float,
                 'compressed_size_mb': float,
                 'savings_percent': float,
+                'dedup_bytes_reclaimed': int,
+                'duplicates_removed': int,
+                'images_recompressed': int,
                 'message': str
             }
+            En modo tamaño objetivo incluye además 'target_size_mb',
+            'target_reached', 'chosen_quality', 'chosen_dpi' y 'attempts'.
         """
-        if quality_level not in PDFCompressor.COMPRESSION_LEVELS:
+        if target_size_mb is None and quality_level not in PDFCompressor.COMPRESSION_LEVELS:
             raise ValueError(f"Nivel de compresión inválido: {quality_level}")
         
+        if target_size_mb is not None and target_size_mb <= 0:
+            raise ValueError("El tamaño objetivo debe ser mayor que 0")
+        
         # Obtener tamaño original
         original_size = os.path.getsize(input_path)
         original_size_mb = original_size / (1024 * 1024)
         
         try:
-            # Abrir PDF con pikepdf
-            with pikepdf.open(input_path) as pdf:
-                total_pages = len(pdf.pages)
-                
-                # Reportar progreso inicial
-                if progress_callback:
-                    progress_callback(10)
-                
-                # Procesar cada página (para mostrar progreso)
-                for i, page in enumerate(pdf.pages):
-                    # Aquí se podría agregar procesamiento adicional de imágenes
-                    # por ahora solo reportamos progreso
-                    if progress_callback and total_pages > 0:
-                        progress = int(10 + (i + 1) / total_pages * 80)
-                        progress_callback(progress)
-                
-                # Guardar con compresión
-                # compress_streams=True optimiza los streams del PDF
-                # object_stream_mode reduce el tamaño reorganizando objetos
-                pdf.save(
+            if target_size_mb is not None:
+                stats = PDFCompressor._compress_to_target(
+                    input_path,
                     output_path,
-                    compress_streams=True,
-                    stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
-                    object_stream_mode=pikepdf.ObjectStreamMode.generate
+                    target_size_mb,
+                    workers=workers,
+                    progress_callback=progress_callback
+                )
+            else:
+                level = PDFCompressor.COMPRESSION_LEVELS[quality_level]
+                stats = PDFCompressor._compress_to_file(
+                    input_path,
+                    output_path,
+                    level['quality'],
+                    level['dpi'],
+                    workers=workers,
+                    progress_callback=progress_callback
                 )
-                
-                if progress_callback:
-                    progress_callback(100)
             
             # Calcular métricas
             compressed_size = os.path.getsize(output_path)
             compressed_size_mb = compressed_size / (1024 * 1024)
             savings_percent = ((original_size - compressed_size) / original_size) * 100
             
-            return {
+            result = {
                 'success': True,
                 'output_path': output_path,
                 'original_size_mb': round(original_size_mb, 2),
                 'compressed_size_mb': round(compressed_size_mb, 2),
                 'savings_percent': round(savings_percent, 2),
+                'dedup_bytes_reclaimed': stats['dedup_bytes_reclaimed'],
+                'duplicates_removed': stats['duplicates_removed'],
+                'images_recompressed': stats['images_recompressed'],
                 'message': f'Se redujo {savings_percent:.1f}% del tamaño original'
             }
             
+            if target_size_mb is not None:
+                result.update({
+                    'target_size_mb': target_size_mb,
+                    'target_reached': stats['target_reached'],
+                    'chosen_quality': stats['chosen_quality'],
+                    'chosen_dpi': stats['chosen_dpi'],
+                    'attempts': stats['attempts']
+                })
+                if not stats['target_reached']:
+                    result['message'] += f' (no se alcanzó el objetivo de {target_size_mb} MB)'
+            
+            return result
+            
         except Exception as e:
             raise Exception(f"Error al comprimir PDF: {str(e)}")
@@ -3,12 +3,75 @@ Servicio de conversión de formatos
 Convierte entre PDF, Word e Imágenes
 """
 from pdf2docx import Converter
-from pdf2image import convert_from_path
 from PIL import Image
 from pathlib import Path
 from typing import List, Callable, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+import math
 import os
 from config.settings import settings
+from backend.page_selection import PageSelection
+from .pdf_rasterizer import PDFRasterizer
+from .pdf_writer import StreamingPDFWriter
+from .office_converter import OfficeConverter
+
+
+# Conversión a Word en paralelo: mínimo de páginas por bloque (pdf2docx
+# detecta encabezados y pies comparando las páginas de cada bloque) y
+# bloques por proceso (más bloques que procesos dan un progreso más fino)
+WORD_MIN_CHUNK_PAGES = 8
+WORD_CHUNKS_PER_WORKER = 2
+
+
+def _parse_word_pages(
+    converter: Converter,
+    page_indexes: List[int],
+    parse_settings: dict,
+    page_callback: Optional[Callable[[], None]] = None
+):
+    """
+    Analiza con pdf2docx las páginas indicadas (0-indexed)
+    
+    Equivale a parse() de pdf2docx, pero avisando tras cada página.
+    """
+    converter.load_pages(pages=page_indexes).parse_document(**parse_settings)
+    
+    for page in converter.pages:
+        if page.skip_parsing:
+            continue
+        try:
+            page.parse(**parse_settings)
+        except Exception as e:
+            # Como pdf2docx: por defecto una página fallida no detiene la conversión
+            if not parse_settings['ignore_page_error']:
+                raise Exception(f"Error al analizar la página {page.id + 1}: {str(e)}")
+        if page_callback:
+            page_callback()
+
+
+def _parse_word_chunk(input_path: str, page_indexes: List[int]) -> dict:
+    """
+    Analiza un bloque de páginas en un proceso de trabajo
+    
+    Se define a nivel de módulo para que pueda enviarse a procesos de trabajo.
+    
+    Returns:
+        Páginas analizadas en el formato de Converter.store()
+    """
+    converter = Converter(input_path)
+    try:
+        _parse_word_pages(converter, page_indexes, converter.default_settings)
+        return converter.store()
+    finally:
+        converter.close()
+
+
+def _save_image(image: Image.Image, output_path: str, image_format: str, save_options: dict):
+    """Codifica y guarda una página; libera la imagen al terminar"""
+    try:
+        image.save(output_path, image_format, **save_options)
+    finally:
+        image.close()
 
 
 class PDFConverter:
@@ -18,15 +81,24 @@ class PDFConverter:
     def pdf_to_word(
         input_path: str,
         output_path: str,
-        progress_callback: Optional[Callable[[int, str], None]] = None
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+        pages: Optional[str] = None,
+        workers: Optional[int] = None
     ) -> dict:
         """
         Convierte PDF a Word preservando el layout
         
+        Con `workers` > 1 las páginas se reparten en bloques consecutivos que
+        se analizan en procesos independientes; el documento Word se compone
+        después en el proceso principal, en orden. El progreso se informa
+        por página (por bloque completado en modo paralelo).
+        
         Args:
             input_path: Ruta del PDF
             output_path: Ruta del archivo DOCX resultante
             progress_callback: Función para reportar progreso (progress, message)
+            pages: Especificación de páginas (ej: "1-5,8"; None = todas)
+            workers: Procesos de análisis en paralelo (None o 1 = secuencial)
             
         Returns:
             Diccionario con información del resultado
@@ -34,23 +106,62 @@ class PDFConverter:
         try:
             cv = Converter(input_path)
             
-            def progress_wrapper(current, total):
-                if progress_callback and total > 0:
-                    percent = int((current / total) * 100)
-                    
-                    # Mensajes según fase
-                    if percent <= 25:
-                        progress_callback(percent, "Analizando estructura del documento...")
-                    elif percent <= 50:
-                        progress_callback(percent, "Aplicando Layout Engine...")
-                    elif percent <= 75:
-                        progress_callback(percent, "Generando archivo final...")
-                    else:
-                        progress_callback(percent, f"Procesando... {percent}%")
-            
-            # Convertir
-            cv.convert(output_path, start=0, end=None)
-            cv.close()
+            try:
+                parse_settings = cv.default_settings
+                total_pages = len(cv.fitz_doc)
+                if pages:
+                    page_indexes = [
+                        number - 1 for number in PageSelection.parse(pages).iter_pages(total_pages)
+                    ]
+                else:
+                    page_indexes = list(range(total_pages))
+                
+                if not page_indexes:
+                    raise ValueError("No hay páginas que convertir")
+                
+                parsed = 0
+                
+                def pages_parsed(count=1):
+                    nonlocal parsed
+                    parsed += count
+                    if progress_callback:
+                        progress = int(parsed / len(page_indexes) * 85)
+                        progress_callback(
+                            progress, f"Analizando páginas... {parsed}/{len(page_indexes)}"
+                        )
+                
+                if progress_callback:
+                    progress_callback(0, "Analizando estructura del documento...")
+                
+                # Analizar las páginas (fase lenta: texto, tablas, imágenes)
+                chunk_size = max(
+                    WORD_MIN_CHUNK_PAGES,
+                    math.ceil(len(page_indexes) / ((workers or 1) * WORD_CHUNKS_PER_WORKER))
+                )
+                if not workers or workers <= 1 or len(page_indexes) <= chunk_size:
+                    _parse_word_pages(cv, page_indexes, parse_settings, pages_parsed)
+                else:
+                    chunks = [
+                        page_indexes[i:i + chunk_size]
+                        for i in range(0, len(page_indexes), chunk_size)
+                    ]
+                    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                        futures = {
+                            executor.submit(_parse_word_chunk, input_path, chunk): chunk
+                            for chunk in chunks
+                        }
+                        try:
+                            for future in as_completed(futures):
+                                cv.restore(future.result())
+                                pages_parsed(len(futures[future]))
+                        finally:
+                            for future in futures:
+                                future.cancel()
+                
+                # Componer el documento Word en orden
+                PDFConverter._make_docx(cv, output_path, parse_settings, progress_callback)
+            finally:
+                cv.close()
             
             if progress_callback:
                 progress_callback(100, "Conversión completada")
@@ -58,60 +169,165 @@ class PDFConverter:
             return {
                 'success': True,
                 'output_path': output_path,
+                'total_pages': len(page_indexes),
                 'message': 'PDF convertido a Word exitosamente'
             }
             
         except Exception as e:
             raise Exception(f"Error al convertir PDF a Word: {str(e)}")
     
+    @staticmethod
+    def _make_docx(
+        cv: Converter,
+        output_path: str,
+        parse_settings: dict,
+        progress_callback: Optional[Callable[[int, str], None]] = None
+    ):
+        """Crea el DOCX con las páginas analizadas, informando del progreso por página"""
+        from docx import Document
+        
+        parsed_pages = [page for page in cv.pages if page.finalized]
+        if not parsed_pages:
+            raise Exception("No se pudo analizar ninguna página")
+        
+        document = Document()
+        for i, page in enumerate(parsed_pages, start=1):
+            try:
+                page.make_docx(document)
+            except Exception as e:
+                if not parse_settings['ignore_page_error']:
+                    raise Exception(f"Error al generar la página {page.id + 1}: {str(e)}")
+            
+            if progress_callback:
+                progress = 85 + int(i / len(parsed_pages) * 14)
+                progress_callback(progress, f"Generando archivo final... {i}/{len(parsed_pages)}")
+        
+        document.save(output_path)
+    
     @staticmethod
     def pdf_to_images(
         input_path: str,
         output_dir: str,
         dpi: int = 300,
         image_format: str = 'PNG',
-        progress_callback: Optional[Callable[[int], None]] = None
+        progress_callback: Optional[Callable[[int], None]] = None,
+        pages: Optional[str] = None,
+        workers: Optional[int] = None,
+        png_compress_level: Optional[int] = None,
+        jpeg_quality: Optional[int] = None
     ) -> dict:
         """
         Convierte cada página del PDF en una imagen
         
+        Las páginas se renderizan y guardan por ventanas, de modo que la
+        memoria usada no crece con el número de páginas. Con `workers` > 1
+        el trabajo se solapa: Poppler renderiza la ventana siguiente con
+        `workers` procesos mientras un pool de hilos codifica y guarda las
+        imágenes ya renderizadas (el codificador de PIL libera el GIL).
+        
         Args:
             input_path: Ruta del PDF
             output_dir: Directorio donde guardar las imágenes
             dpi: Resolución (150=baja, 300=alta, 600=muy alta)
             image_format: 'PNG' o 'JPEG'
             progress_callback: Función para reportar progreso
+            pages: Especificación de páginas (ej: "1-5,8"; None = todas)
+            workers: Páginas renderizadas y codificadas en paralelo
+                (None o 1 = secuencial; como mucho RASTER_WINDOW_PAGES)
+            png_compress_level: Compresión PNG de 0 (rápida, archivos
+                grandes) a 9 (lenta, archivos pequeños); None = 6
+            jpeg_quality: Calidad JPEG de 1 a 95; None = 75
             
         Returns:
             Diccionario con información del resultado
         """
+        image_format = image_format.upper()
+        save_options = {}
+        if image_format == 'PNG' and png_compress_level is not None:
+            if not 0 <= png_compress_level <= 9:
+                raise ValueError("El nivel de compresión PNG debe estar entre 0 y 9")
+            save_options['compress_level'] = png_compress_level
+        if image_format == 'JPEG' and jpeg_quality is not None:
+            if not 1 <= jpeg_quality <= 95:
+                raise ValueError("La calidad JPEG debe estar entre 1 y 95")
+            save_options['quality'] = jpeg_quality
+        
         try:
             # Crear directorio si no existe
             Path(output_dir).mkdir(exist_ok=True, parents=True)
             
-            # Convertir PDF a imágenes usando Poppler
-            images = convert_from_path(
-                input_path,
-                dpi=dpi,
-                poppler_path=settings.POPPLER_PATH
+            total_pages = PDFRasterizer.get_page_count(input_path)
+            base_name = Path(input_path).stem
+            
+            if pages:
+                selection = PageSelection.parse(pages)
+                page_numbers = selection.iter_pages(total_pages)
+                selected_pages = selection.count(total_pages)
+            else:
+                page_numbers = range(1, total_pages + 1)
+                selected_pages = total_pages
+            
+            convert_kwargs = {}
+            if workers and workers > 1:
+                # Más procesos que páginas por ventana no aceleran el render y
+                # multiplican las páginas decodificadas en memoria
+                workers = min(workers, settings.RASTER_WINDOW_PAGES)
+                convert_kwargs['thread_count'] = workers
+            
+            rendered = PDFRasterizer.iter_page_numbers(
+                input_path, page_numbers, dpi=dpi, **convert_kwargs
             )
             
             output_files = []
-            total_pages = len(images)
-            base_name = Path(input_path).stem
+            completed = 0
             
-            # Guardar cada imagen
-            for i, image in enumerate(images):
-                output_path = os.path.join(
+            def page_saved():
+                nonlocal completed
+                completed += 1
+                if progress_callback:
+                    progress = int(completed / selected_pages * 100)
+                    progress_callback(progress)
+            
+            def output_path_for(page_num):
+                return os.path.join(
                     output_dir,
-                    f'{base_name}_pagina_{i+1}.{image_format.lower()}'
+                    f'{base_name}_pagina_{page_num}.{image_format.lower()}'
                 )
-                image.save(output_path, image_format)
-                output_files.append(output_path)
+            
+            if not workers or workers <= 1:
+                # Renderizar con Poppler y guardar cada imagen según se genera
+                for page_num, image in rendered:
+                    output_path = output_path_for(page_num)
+                    _save_image(image, output_path, image_format, save_options)
+                    output_files.append(output_path)
+                    page_saved()
+            else:
+                pending = set()
                 
-                if progress_callback:
-                    progress = int((i + 1) / total_pages * 100)
-                    progress_callback(progress)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    try:
+                        for page_num, image in rendered:
+                            output_path = output_path_for(page_num)
+                            pending.add(executor.submit(
+                                _save_image, image, output_path, image_format, save_options
+                            ))
+                            output_files.append(output_path)
+                            
+                            # Una imagen en vuelo por hilo: la memoria queda en
+                            # la ventana de render más `workers` páginas
+                            while len(pending) >= workers:
+                                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                                for future in done:
+                                    future.result()
+                                    page_saved()
+                        
+                        for future in pending:
+                            future.result()
+                            page_saved()
+                        pending = set()
+                    finally:
+                        for future in pending:
+                            future.cancel()
             
             return {
                 'success': True,
@@ -132,6 +348,10 @@ class PDFConverter:
         """
         Combina múltiples imágenes en un PDF
         
+        Las páginas se escriben una a una y cada imagen se libera en cuanto se
+        escribe, así que la memoria no crece con el número de imágenes. Los
+        JPEG se incrustan sin recomprimir.
+        
         Args:
             image_paths: Lista de rutas de imágenes
             output_path: Ruta del PDF resultante
@@ -139,46 +359,42 @@ class PDFConverter:
             
         Returns:
             Diccionario con información del resultado
+            
+        Raises:
+            Exception: Si no hay imágenes (un PDF necesita al menos una página)
+                o alguna no se puede procesar
         """
-        if not image_paths:
-            raise ValueError("Se necesita al menos una imagen")
-        
         try:
-            images = []
+            if not image_paths:
+                raise ValueError("Se necesita al menos una imagen")
+            
             total_images = len(image_paths)
+            writer = StreamingPDFWriter(output_path)
             
-            # Cargar todas las imágenes
-            for i, path in enumerate(image_paths):
-                img = Image.open(path)
-                
-                # Convertir a RGB si es necesario (PNG con transparencia)
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                images.append(img)
+            try:
+                # Escribir cada imagen en cuanto se abre; solo hay una en memoria
+                for i, path in enumerate(image_paths):
+                    try:
+                        writer.append_image(path, resolution=100.0)
+                    except Exception as e:
+                        raise Exception(f"Error al procesar {Path(path).name}: {str(e)}")
+                    
+                    if progress_callback:
+                        progress = int((i + 1) / total_images * 100)
+                        progress_callback(progress)
                 
-                if progress_callback:
-                    # Primera mitad del progreso: cargando imágenes
-                    progress = int((i + 1) / total_images * 50)
-                    progress_callback(progress)
+                writer.close()
             
-            # Guardar como PDF
-            if images:
-                images[0].save(
-                    output_path,
-                    save_all=True,
-                    append_images=images[1:] if len(images) > 1 else [],
-                    resolution=100.0
-                )
-                
-                if progress_callback:
-                    progress_callback(100)
+            except BaseException:
+                writer.abort()
+                Path(output_path).unlink(missing_ok=True)
+                raise
             
             return {
                 'success': True,
                 'output_path': output_path,
-                'total_images': len(images),
-                'message': f'Se combinaron {len(images)} imágenes en PDF'
+                'total_images': total_images,
+                'message': f'Se combinaron {total_images} imágenes en PDF'
             }
             
         except Exception as e:
@@ -188,31 +404,39 @@ class PDFConverter:
     def word_to_pdf(
         input_path: str,
         output_path: str,
-        progress_callback: Optional[Callable[[int], None]] = None
+        progress_callback: Optional[Callable[[int], None]] = None,
+        converter: Optional[str] = None,
+        timeout: Optional[float] = None
     ) -> dict:
         """
         Convierte Word a PDF
         
-        NOTA: Requiere Microsoft Word instalado (Windows) o LibreOffice (Linux)
+        NOTA: Requiere LibreOffice o Microsoft Word instalado. Con LibreOffice
+        se usa un pool de instancias en caliente compartido por el proceso,
+        así que varias llamadas desde hilos distintos (por ejemplo un lote con
+        un ThreadPoolExecutor) convierten documentos a la vez sin volver a
+        arrancar la suite ofimática por cada archivo.
         
         Args:
             input_path: Ruta del archivo DOCX
             output_path: Ruta del PDF resultante
             progress_callback: Función para reportar progreso
+            converter: 'auto', 'libreoffice', 'docx2pdf' o 'stub' (None = settings.WORD_CONVERTER)
+            timeout: Segundos máximos para el documento (None = settings.OFFICE_TIMEOUT)
             
         Returns:
             Diccionario con información del resultado
         """
         if not settings.WORD_CONVERSION_AVAILABLE:
-            raise Exception("La conversión Word → PDF no está disponible. Requiere Microsoft Word instalado.")
+            raise Exception("La conversión Word → PDF no está disponible. Requiere LibreOffice o Microsoft Word instalado.")
         
         try:
-            from docx2pdf import convert
+            office = OfficeConverter.shared(converter)
             
             if progress_callback:
                 progress_callback(50)
             
-            convert(input_path, output_path)
+            office.convert(input_path, output_path, timeout)
             
             if progress_callback:
                 progress_callback(100)
@@ -220,10 +444,9 @@ class PDFConverter:
             return {
                 'success': True,
                 'output_path': output_path,
+                'converter': office.name,
                 'message': 'Word convertido a PDF exitosamente'
             }
             
-        except ImportError:
-            raise Exception("docx2pdf no está instalado")
         except Exception as e:
             raise Exception(f"Error al convertir Word a PDF: {str(e)}")
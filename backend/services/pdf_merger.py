@@ -2,9 +2,36 @@
 Servicio de combinación de PDFs
 Combina múltiples archivos PDF en uno solo preservando el orden
 """
+import math
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from PyPDF2 import PdfMerger
 from pathlib import Path
 from typing import List, Callable, Optional
+from config.settings import settings
+from .pdf_writer import StreamingPDFWriter
+
+
+# Motores de combinación disponibles
+MERGE_ENGINES = ('streaming', 'pypdf2')
+
+# Combinación jerárquica: mínimo de archivos por partición y particiones por
+# proceso (más particiones que procesos permiten un progreso más fino)
+TREE_MERGE_MIN_PARTITION = 8
+TREE_MERGE_PARTITIONS_PER_WORKER = 4
+
+
+def _merge_partition(input_paths: List[str], output_path: str) -> int:
+    """
+    Combina una partición de archivos en un PDF intermedio
+    
+    Se define a nivel de módulo para que pueda enviarse a procesos de trabajo.
+    
+    Returns:
+        Número de páginas escritas
+    """
+    return PDFMerger._merge_streaming(input_paths, output_path)
 
 
 class PDFMerger:
@@ -14,7 +41,9 @@ class PDFMerger:
     def merge_pdfs(
         input_paths: List[str],
         output_path: str,
-        progress_callback: Optional[Callable[[int], None]] = None
+        progress_callback: Optional[Callable[[int], None]] = None,
+        engine: Optional[str] = None,
+        workers: Optional[int] = None
     ) -> dict:
         """
         Combina múltiples PDFs en uno solo
@@ -23,18 +52,29 @@ class PDFMerger:
             input_paths: Lista de rutas de archivos PDF en el orden deseado
             output_path: Ruta del archivo PDF resultante
             progress_callback: Función para reportar progreso (0-100)
-            
+            engine: Motor de combinación (None = settings.MERGE_ENGINE):
+                - 'streaming': copia cada origen directamente al archivo de
+                  salida y lo cierra al terminar; la memoria queda acotada
+                  por el origen más grande
+                - 'pypdf2': PdfMerger de PyPDF2, mantiene todo en memoria
+                  hasta escribir
+            workers: Procesos para la combinación jerárquica con el motor
+                'streaming' (None o 1 = secuencial). Con suficientes archivos,
+                las particiones se combinan en paralelo en archivos
+                intermedios que luego se concatenan en orden
+        
         Returns:
             Diccionario con información del resultado:
             {
                 'success': bool,
                 'output_path': str,
                 'total_files': int,
+                'engine': str,
                 'message': str
             }
-            
+        
         Raises:
-            ValueError: Si hay menos de 2 archivos
+            ValueError: Si hay menos de 2 archivos o el motor no existe
             FileNotFoundError: Si algún archivo no existe
             Exception: Si hay error al procesar algún PDF
         """
@@ -42,11 +82,141 @@ class PDFMerger:
         if len(input_paths) < 2:
             raise ValueError("Se necesitan al menos 2 archivos PDF para combinar")
         
+        engine = engine or settings.MERGE_ENGINE
+        if engine not in MERGE_ENGINES:
+            raise ValueError(
+                f"Motor de combinación inválido: {engine}. Opciones: {', '.join(MERGE_ENGINES)}"
+            )
+        
         # Validación: todos los archivos existen
         for path in input_paths:
             if not Path(path).exists():
                 raise FileNotFoundError(f"El archivo no existe: {path}")
         
+        total_files = len(input_paths)
+        
+        if engine == 'streaming' and workers and workers > 1 \
+                and total_files >= 2 * TREE_MERGE_MIN_PARTITION:
+            PDFMerger._merge_tree(input_paths, output_path, progress_callback, workers)
+        elif engine == 'streaming':
+            PDFMerger._merge_streaming(input_paths, output_path, progress_callback)
+        else:
+            PDFMerger._merge_pypdf2(input_paths, output_path, progress_callback)
+        
+        return {
+            'success': True,
+            'output_path': output_path,
+            'total_files': total_files,
+            'engine': engine,
+            'message': f'Se combinaron {total_files} archivos exitosamente'
+        }
+    
+    @staticmethod
+    def _merge_streaming(
+        input_paths: List[str],
+        output_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Combina los PDFs escribiendo cada origen en la salida según se lee
+        
+        Solo hay un origen abierto a la vez. Si algo falla, el archivo de
+        salida incompleto se elimina.
+        
+        Returns:
+            Número total de páginas escritas
+        """
+        writer = StreamingPDFWriter(output_path)
+        total_files = len(input_paths)
+        
+        try:
+            for i, pdf_path in enumerate(input_paths):
+                try:
+                    writer.append(pdf_path)
+                except Exception as e:
+                    raise Exception(f"Error al procesar {Path(pdf_path).name}: {str(e)}")
+                
+                # Reportar progreso
+                if progress_callback:
+                    progress = int((i + 1) / total_files * 100)
+                    progress_callback(progress)
+            
+            writer.close()
+            return writer.page_count
+        
+        except BaseException:
+            writer.abort()
+            Path(output_path).unlink(missing_ok=True)
+            raise
+    
+    @staticmethod
+    def _merge_tree(
+        input_paths: List[str],
+        output_path: str,
+        progress_callback: Optional[Callable[[int], None]],
+        workers: int
+    ) -> int:
+        """
+        Combinación jerárquica: particiones en paralelo y concatenación final
+        
+        Los archivos se dividen en particiones contiguas que se combinan en
+        procesos de trabajo dentro de un directorio temporal en
+        settings.TEMP_DIR. Después los intermedios se concatenan en orden, lo
+        que conserva el orden de las páginas y los marcadores. El directorio
+        temporal se elimina siempre, también si el trabajo falla o se cancela.
+        
+        Returns:
+            Número total de páginas escritas
+        """
+        total_files = len(input_paths)
+        partition_size = max(
+            TREE_MERGE_MIN_PARTITION,
+            math.ceil(total_files / (workers * TREE_MERGE_PARTITIONS_PER_WORKER))
+        )
+        partitions = [
+            input_paths[start:start + partition_size]
+            for start in range(0, total_files, partition_size)
+        ]
+        
+        temp_dir = Path(tempfile.mkdtemp(prefix='merge_', dir=settings.TEMP_DIR))
+        intermediates = [str(temp_dir / f'part_{i:05d}.pdf') for i in range(len(partitions))]
+        
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(partitions)))
+        futures = {}
+        try:
+            futures = {
+                executor.submit(_merge_partition, partition, intermediate): len(partition)
+                for partition, intermediate in zip(partitions, intermediates)
+            }
+            
+            # Las particiones ocupan el 90% del progreso
+            merged_files = 0
+            for future in as_completed(futures):
+                future.result()
+                merged_files += futures[future]
+                if progress_callback:
+                    progress_callback(int(merged_files / total_files * 90))
+            
+            # Concatenación final de los intermedios
+            def final_progress(progress: int):
+                if progress_callback:
+                    progress_callback(90 + progress // 10)
+            
+            return PDFMerger._merge_streaming(intermediates, output_path, final_progress)
+        
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    @staticmethod
+    def _merge_pypdf2(
+        input_paths: List[str],
+        output_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ):
+        """Combina los PDFs con PdfMerger de PyPDF2 (todo en memoria hasta escribir)"""
         merger = PdfMerger()
         total_files = len(input_paths)
         
@@ -60,21 +230,14 @@ class PDFMerger:
                     if progress_callback:
                         progress = int((i + 1) / total_files * 100)
                         progress_callback(progress)
-                        
+                
                 except Exception as e:
                     raise Exception(f"Error al procesar {Path(pdf_path).name}: {str(e)}")
             
             # Guardar el resultado
             merger.write(output_path)
             merger.close()
-            
-            return {
-                'success': True,
-                'output_path': output_path,
-                'total_files': total_files,
-                'message': f'Se combinaron {total_files} archivos exitosamente'
-            }
-            
+        
         except Exception as e:
             merger.close()
             raise e
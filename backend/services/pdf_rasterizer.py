@@ -0,0 +1,118 @@
+"""
+Servicio de rasterización de PDFs
+Convierte páginas de PDF en imágenes por ventanas, sin cargar el documento completo
+"""
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
+from typing import Iterable, Iterator, Optional, Tuple
+from config.settings import settings
+
+
+class PDFRasterizer:
+    """Servicio para renderizar páginas de PDF como imágenes de forma incremental"""
+    
+    @staticmethod
+    def get_page_count(input_path: str) -> int:
+        """
+        Obtiene el número de páginas usando pdfinfo (sin renderizar)
+        
+        Args:
+            input_path: Ruta del PDF
+        
+        Returns:
+            Número de páginas
+        """
+        info = pdfinfo_from_path(input_path, poppler_path=settings.POPPLER_PATH)
+        return int(info['Pages'])
+    
+    @staticmethod
+    def iter_pages(
+        input_path: str,
+        dpi: int = 300,
+        first_page: int = 1,
+        last_page: Optional[int] = None,
+        window: Optional[int] = None,
+        **convert_kwargs
+    ) -> Iterator[Tuple[int, Image.Image]]:
+        """
+        Genera las páginas del PDF como imágenes, renderizando por ventanas
+        
+        Solo se mantienen en memoria las páginas de la ventana actual, por lo
+        que el consumo de memoria no depende del tamaño del documento.
+        
+        Args:
+            input_path: Ruta del PDF
+            dpi: Resolución de renderizado
+            first_page: Primera página a renderizar (1-indexed)
+            last_page: Última página a renderizar (None = última del documento)
+            window: Páginas renderizadas por llamada a Poppler
+                (None = settings.RASTER_WINDOW_PAGES)
+            **convert_kwargs: Argumentos adicionales para convert_from_path
+                (ej: grayscale, thread_count)
+        
+        Yields:
+            Tuplas (número_de_página, imagen) en orden
+        """
+        if last_page is None:
+            last_page = PDFRasterizer.get_page_count(input_path)
+        
+        window = window or settings.RASTER_WINDOW_PAGES
+        
+        for start in range(first_page, last_page + 1, window):
+            end = min(start + window - 1, last_page)
+            
+            images = convert_from_path(
+                input_path,
+                dpi=dpi,
+                first_page=start,
+                last_page=end,
+                poppler_path=settings.POPPLER_PATH,
+                **convert_kwargs
+            )
+            
+            # Entregar y soltar cada imagen para liberar memoria cuanto antes
+            page_num = start
+            while images:
+                yield page_num, images.pop(0)
+                page_num += 1
+    
+    @staticmethod
+    def iter_page_numbers(
+        input_path: str,
+        page_numbers: Iterable[int],
+        dpi: int = 300,
+        window: Optional[int] = None,
+        **convert_kwargs
+    ) -> Iterator[Tuple[int, Image.Image]]:
+        """
+        Genera solo las páginas indicadas, agrupando las consecutivas
+        
+        Cada tramo de páginas consecutivas se renderiza con iter_pages, de
+        modo que una selección dispersa no obliga a renderizar el documento.
+        
+        Args:
+            input_path: Ruta del PDF
+            page_numbers: Números de página en orden ascendente (1-indexed)
+            dpi: Resolución de renderizado
+            window: Páginas renderizadas por llamada a Poppler
+            **convert_kwargs: Argumentos adicionales para convert_from_path
+        
+        Yields:
+            Tuplas (número_de_página, imagen) en orden
+        """
+        run_start = run_end = None
+        
+        for number in page_numbers:
+            if run_end is not None and number == run_end + 1:
+                run_end = number
+                continue
+            if run_start is not None:
+                yield from PDFRasterizer.iter_pages(
+                    input_path, dpi, run_start, run_end, window, **convert_kwargs
+                )
+            run_start = run_end = number
+        
+        if run_start is not None:
+            yield from PDFRasterizer.iter_pages(
+                input_path, dpi, run_start, run_end, window, **convert_kwargs
+            )
@@ -2,56 +2,86 @@
 Servicio de división de PDFs
 Divide PDFs por rangos, páginas específicas o cada N páginas
 """
-from PyPDF2 import PdfReader, PdfWriter
+import pikepdf
 from pathlib import Path
-from typing import List, Callable, Optional, Union
+from typing import List, Callable, Optional, Union, Tuple, Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import os
+from backend.page_selection import PageSelection
+
+
+# PDF de origen abierto en cada proceso de trabajo (ver _open_source)
+_source_pdf = None
+
+
+def _open_source(input_path: str):
+    """Abre el PDF de origen una sola vez por proceso de trabajo"""
+    global _source_pdf
+    _source_pdf = pikepdf.open(input_path)
+
+
+def _write_part(
+    output_path: str,
+    pages: Iterable[int],
+    source: Optional[pikepdf.Pdf] = None,
+    page_callback: Optional[Callable[[int], None]] = None
+) -> str:
+    """
+    Escribe las páginas indicadas del PDF de origen en un archivo nuevo
+    
+    qpdf copia solo los objetos alcanzables desde esas páginas y, antes de
+    guardar, se eliminan de los /Resources de cada página las fuentes,
+    XObjects, patrones, etc. que sus content streams no usan. Así un
+    extracto de pocas páginas no arrastra los recursos compartidos de todo
+    el documento.
+    
+    Args:
+        output_path: Ruta del archivo de la parte
+        pages: Índices de las páginas (0-indexed) en el orden de salida
+        source: PDF de origen (None = el abierto en este proceso)
+        page_callback: Función llamada con el número de páginas copiadas
+        
+    Returns:
+        Ruta del archivo escrito
+    """
+    source = source if source is not None else _source_pdf
+    with pikepdf.new() as part:
+        for i, page_index in enumerate(pages):
+            part.pages.append(source.pages[page_index])
+            if page_callback:
+                page_callback(i + 1)
+        
+        # Descartar los recursos que ninguna página referencia
+        part.remove_unreferenced_resources()
+        part.save(output_path)
+    return output_path
 
 
 class PDFSplitter:
     """Servicio para dividir PDFs de diferentes maneras"""
     
     @staticmethod
-    def parse_page_specification(spec: str) -> List[int]:
+    def parse_page_specification(spec: str) -> PageSelection:
         """
         Parsea especificación de páginas como "1, 3, 5-8, 12"
         
+        Admite también rangos inversos ("8-5"), pasos ("1-20:2"), "odd",
+        "even", "last" e índices negativos ("-1" = última página). Las
+        páginas no se expanden: la selección se resuelve por rangos.
+        
         Args:
             spec: Especificación de páginas (ej: "1,3,5-8,12")
             
         Returns:
-            Lista de números de página (ordenada, sin duplicados)
+            Selección de páginas (ver PageSelection)
             
         Raises:
             ValueError: Si el formato es inválido
         """
-        pages = set()
-        parts = spec.split(',')
-        
-        for part in parts:
-            part = part.strip()
-            
-            if '-' in part:
-                # Rango: "5-8"
-                try:
-                    start, end = part.split('-')
-                    start_num = int(start.strip())
-                    end_num = int(end.strip())
-                    
-                    if start_num > end_num:
-                        raise ValueError(f"Rango inválido: {part} (inicio > fin)")
-                    
-                    pages.update(range(start_num, end_num + 1))
-                except ValueError as e:
-                    raise ValueError(f"Error al parsear rango '{part}': {str(e)}")
-            else:
-                # Página individual: "3"
-                try:
-                    pages.add(int(part))
-                except ValueError:
-                    raise ValueError(f"Número de página inválido: {part}")
-        
-        return sorted(list(pages))
+        try:
+            return PageSelection.parse(spec)
+        except ValueError as e:
+            raise ValueError(f"Error al parsear especificación '{spec}': {str(e)}")
     
     @staticmethod
     def split_by_range(
@@ -74,29 +104,24 @@ class PDFSplitter:
         Returns:
             Diccionario con información del resultado
         """
-        reader = PdfReader(input_path)
-        total_pages = len(reader.pages)
-        
-        # Validaciones
-        if start_page < 1 or end_page > total_pages:
-            raise ValueError(f"El rango debe estar entre 1 y {total_pages}")
-        
-        if start_page > end_page:
-            raise ValueError("La página inicial debe ser menor o igual que la final")
-        
-        writer = PdfWriter()
-        
-        # Agregar páginas (convertir a 0-indexed)
-        for page_num in range(start_page - 1, end_page):
-            writer.add_page(reader.pages[page_num])
+        with pikepdf.open(input_path) as source:
+            total_pages = len(source.pages)
             
-            if progress_callback:
-                progress = int((page_num - start_page + 2) / (end_page - start_page + 1) * 100)
-                progress_callback(progress)
-        
-        # Guardar resultado
-        with open(output_path, 'wb') as output_file:
-            writer.write(output_file)
+            # Validaciones
+            if start_page < 1 or end_page > total_pages:
+                raise ValueError(f"El rango debe estar entre 1 y {total_pages}")
+            
+            if start_page > end_page:
+                raise ValueError("La página inicial debe ser menor o igual que la final")
+            
+            count = end_page - start_page + 1
+            
+            def page_done(copied):
+                if progress_callback:
+                    progress_callback(int(copied / count * 100))
+            
+            # Agregar páginas (convertir a 0-indexed) y guardar resultado
+            _write_part(output_path, range(start_page - 1, end_page), source, page_done)
         
         return {
             'success': True,
@@ -110,7 +135,8 @@ class PDFSplitter:
         input_path: str,
         output_path: str,
         page_specification: str,
-        progress_callback: Optional[Callable[[int], None]] = None
+        progress_callback: Optional[Callable[[int], None]] = None,
+        keep_order: bool = False
     ) -> dict:
         """
         Extrae páginas específicas de un PDF
@@ -120,39 +146,40 @@ class PDFSplitter:
             output_path: Ruta del PDF resultante
             page_specification: Especificación de páginas (ej: "1,3,5-8,12")
             progress_callback: Función para reportar progreso
+            keep_order: True = respetar el orden de la especificación (rangos
+                inversos, repeticiones); False = orden ascendente sin duplicados
             
         Returns:
             Diccionario con información del resultado
         """
-        reader = PdfReader(input_path)
-        total_pages = len(reader.pages)
-        
         # Parsear especificación
-        pages = PDFSplitter.parse_page_specification(page_specification)
-        
-        # Validar que todas las páginas existen
-        if any(p < 1 or p > total_pages for p in pages):
-            raise ValueError(f"Todas las páginas deben estar entre 1 y {total_pages}")
+        selection = PDFSplitter.parse_page_specification(page_specification)
         
-        writer = PdfWriter()
-        
-        # Agregar páginas especificadas
-        for i, page_num in enumerate(pages):
-            writer.add_page(reader.pages[page_num - 1])  # Convertir a 0-indexed
+        with pikepdf.open(input_path) as source:
+            total_pages = len(source.pages)
             
-            if progress_callback:
-                progress = int((i + 1) / len(pages) * 100)
-                progress_callback(progress)
-        
-        # Guardar resultado
-        with open(output_path, 'wb') as output_file:
-            writer.write(output_file)
+            # Validar que todas las páginas existen (por rangos)
+            try:
+                page_count = selection.count(total_pages, keep_order)
+            except ValueError as e:
+                raise ValueError(f"Todas las páginas deben estar entre 1 y {total_pages}: {str(e)}")
+            
+            if page_count == 0:
+                raise ValueError("La especificación no selecciona ninguna página")
+            
+            def page_done(copied):
+                if progress_callback:
+                    progress_callback(int(copied / page_count * 100))
+            
+            # Agregar páginas especificadas (convertir a 0-indexed) y guardar
+            pages = (p - 1 for p in selection.iter_pages(total_pages, keep_order))
+            _write_part(output_path, pages, source, page_done)
         
         return {
             'success': True,
             'output_path': output_path,
-            'pages_extracted': len(pages),
-            'message': f'Se extrajeron {len(pages)} páginas'
+            'pages_extracted': page_count,
+            'message': f'Se extrajeron {page_count} páginas'
         }
     
     @staticmethod
@@ -160,16 +187,23 @@ class PDFSplitter:
         input_path: str,
         output_dir: str,
         n_pages: int,
-        progress_callback: Optional[Callable[[int], None]] = None
+        progress_callback: Optional[Callable[[int], None]] = None,
+        workers: Optional[int] = None
     ) -> dict:
         """
         Divide el PDF cada N páginas
         
+        El origen se abre una sola vez (una vez por proceso de trabajo en modo
+        paralelo) y cada parte se escribe copiando solo los objetos y recursos
+        que usan sus páginas. Con `workers` > 1 las partes se escriben en
+        paralelo en procesos independientes.
+        
         Args:
             input_path: Ruta del PDF original
             output_dir: Directorio donde guardar los archivos resultantes
             n_pages: Número de páginas por archivo
             progress_callback: Función para reportar progreso
+            workers: Partes escritas en paralelo (None o 1 = secuencial)
             
         Returns:
             Diccionario con información del resultado
@@ -177,38 +211,52 @@ class PDFSplitter:
         if n_pages < 1:
             raise ValueError("Debe dividir cada 1 o más páginas")
         
-        reader = PdfReader(input_path)
-        total_pages = len(reader.pages)
-        output_files = []
-        
         # Crear directorio si no existe
         Path(output_dir).mkdir(exist_ok=True, parents=True)
         
         # Obtener nombre base del archivo
         base_name = Path(input_path).stem
         
-        # Dividir en chunks
-        for i in range(0, total_pages, n_pages):
-            writer = PdfWriter()
-            end = min(i + n_pages, total_pages)
-            
-            # Agregar páginas del chunk actual
-            for page_num in range(i, end):
-                writer.add_page(reader.pages[page_num])
+        with pikepdf.open(input_path) as source:
+            total_pages = len(source.pages)
             
-            # Guardar archivo
-            part_num = i // n_pages + 1
-            output_path = os.path.join(output_dir, f"{base_name}_parte_{part_num}.pdf")
+            # Planificar las partes: (ruta, inicio, fin)
+            parts: List[Tuple[str, int, int]] = []
+            for i in range(0, total_pages, n_pages):
+                part_num = i // n_pages + 1
+                output_path = os.path.join(output_dir, f"{base_name}_parte_{part_num}.pdf")
+                parts.append((output_path, i, min(i + n_pages, total_pages)))
             
-            with open(output_path, 'wb') as output_file:
-                writer.write(output_file)
+            total_parts = len(parts)
             
-            output_files.append(output_path)
+            def report(completed):
+                if progress_callback:
+                    progress_callback(int(completed / total_parts * 100))
             
-            # Reportar progreso
-            if progress_callback:
-                progress = int((i + n_pages) / total_pages * 100)
-                progress_callback(min(progress, 100))
+            if not workers or workers <= 1 or total_parts == 1:
+                # Dividir en chunks reutilizando el origen ya abierto
+                for completed, (output_path, start, end) in enumerate(parts, start=1):
+                    _write_part(output_path, range(start, end), source)
+                    report(completed)
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, total_parts),
+                    initializer=_open_source,
+                    initargs=(input_path,)
+                ) as executor:
+                    futures = [
+                        executor.submit(_write_part, output_path, range(start, end))
+                        for output_path, start, end in parts
+                    ]
+                    try:
+                        for completed, future in enumerate(as_completed(futures), start=1):
+                            future.result()
+                            report(completed)
+                    finally:
+                        for future in futures:
+                            future.cancel()
+        
+        output_files = [output_path for output_path, _, _ in parts]
         
         return {
             'success': True,
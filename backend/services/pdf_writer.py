@@ -0,0 +1,372 @@
+"""
+Escritor incremental de PDFs
+Escribe el archivo de salida página a página sin cargar los documentos completos
+"""
+import os
+import shutil
+import zlib
+import pikepdf
+from decimal import Decimal
+from PIL import Image
+from typing import Dict, List, Optional, Tuple
+
+
+# Atributos de página que pueden heredarse del árbol de páginas
+_INHERITABLE_PAGE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+# Espacio de color de las imágenes que se incrustan sin decodificar (JPEG)
+# o tras decodificarlas (el resto), según el modo de PIL
+_IMAGE_COLOR_SPACES = {'L': b'/DeviceGray', 'RGB': b'/DeviceRGB'}
+
+
+class StreamingPDFWriter:
+    """
+    Escritor incremental de PDF
+    
+    Copia las páginas de cada origen al archivo de salida objeto por objeto
+    y cierra el origen en cuanto termina con él. En memoria solo quedan los
+    desplazamientos de la tabla xref, los ids de página y los marcadores,
+    por lo que el consumo no crece con el tamaño de los datos combinados.
+    """
+    
+    def __init__(self, output_path: str):
+        self._file = open(output_path, 'wb')
+        self._offsets: List[Optional[int]] = [None]  # El objeto 0 está reservado
+        self._page_ids: List[int] = []
+        self._outline: list = []
+        self._version = (1, 4)
+        
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._pages_id = self._reserve()
+    
+    @property
+    def page_count(self) -> int:
+        """Páginas escritas hasta el momento"""
+        return len(self._page_ids)
+    
+    def append(self, input_path: str) -> int:
+        """
+        Copia todas las páginas y marcadores de un PDF al final de la salida
+        
+        Args:
+            input_path: Ruta del PDF a añadir
+        
+        Returns:
+            Número de páginas añadidas
+        """
+        with pikepdf.open(input_path) as pdf:
+            version = tuple(int(part) for part in pdf.pdf_version.split('.'))
+            self._version = max(self._version, version)
+            
+            # Reservar primero los ids de las páginas para que los enlaces
+            # y anotaciones entre páginas del mismo origen se conserven
+            ids: Dict[Tuple[int, int], int] = {}
+            page_ids = []
+            for page in pdf.pages:
+                page_id = self._reserve()
+                ids[page.obj.objgen] = page_id
+                page_ids.append(page_id)
+            
+            pending: list = []
+            for page, page_id in zip(pdf.pages, page_ids):
+                self._write_page(page.obj, page_id, ids, pending)
+                
+                # Escribir los objetos alcanzados desde la página
+                while pending:
+                    obj, obj_id = pending.pop()
+                    self._write_object(obj, obj_id, ids, pending)
+            
+            self._outline.extend(self._read_outline(pdf, ids))
+        
+        self._page_ids.extend(page_ids)
+        return len(page_ids)
+    
+    def append_image(self, image_path: str, resolution: float = 100.0):
+        """
+        Añade una página con una imagen a tamaño completo
+        
+        Los JPEG en escala de grises o RGB se copian byte a byte como
+        DCTDecode, sin decodificarlos ni recomprimirlos. El resto de imágenes
+        se decodifican, se pasan a RGB si hace falta y se comprimen sin
+        pérdida con FlateDecode. La imagen se libera al terminar la página.
+        
+        Args:
+            image_path: Ruta de la imagen
+            resolution: Píxeles por pulgada para calcular el tamaño de página
+        """
+        image_id = self._reserve()
+        
+        with Image.open(image_path) as image:
+            width, height = image.size
+            
+            if image.format == 'JPEG' and image.mode in _IMAGE_COLOR_SPACES:
+                color_space = _IMAGE_COLOR_SPACES[image.mode]
+                header = self._image_header(width, height, color_space, b'/DCTDecode',
+                                            os.path.getsize(image_path))
+                self._offsets[image_id] = self._file.tell()
+                self._file.write(b'%d 0 obj\n' % image_id + header + b'\nstream\n')
+                with open(image_path, 'rb') as source:
+                    shutil.copyfileobj(source, self._file)
+                self._file.write(b'\nendstream\nendobj\n')
+            else:
+                if image.mode not in _IMAGE_COLOR_SPACES:
+                    image = image.convert('RGB')
+                data = zlib.compress(image.tobytes(), 6)
+                header = self._image_header(width, height, _IMAGE_COLOR_SPACES[image.mode],
+                                            b'/FlateDecode', len(data))
+                self._write_raw(image_id, header + b'\nstream\n' + data + b'\nendstream')
+                del data
+        
+        page_width = width * 72 / resolution
+        page_height = height * 72 / resolution
+        content = b'q %.4f 0 0 %.4f 0 0 cm /Im0 Do Q' % (page_width, page_height)
+        content_id = self._reserve()
+        self._write_raw(
+            content_id,
+            b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content)
+        )
+        
+        page_id = self._reserve()
+        self._write_raw(
+            page_id,
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.4f %.4f] '
+            b'/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>'
+            % (self._pages_id, page_width, page_height, image_id, content_id)
+        )
+        self._page_ids.append(page_id)
+    
+    @staticmethod
+    def _image_header(width: int, height: int, color_space: bytes, filter_name: bytes,
+                      length: int) -> bytes:
+        """Diccionario de un Image XObject de 8 bits por componente"""
+        return (
+            b'<< /Type /XObject /Subtype /Image /Width %d /Height %d '
+            b'/ColorSpace %s /BitsPerComponent 8 /Filter %s /Length %d >>'
+            % (width, height, color_space, filter_name, length)
+        )
+    
+    def close(self):
+        """Escribe el árbol de páginas, los marcadores, el catálogo y la tabla xref"""
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self._page_ids)
+        self._write_raw(
+            self._pages_id,
+            b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self._page_ids))
+        )
+        
+        catalog = [b'/Type /Catalog', b'/Pages %d 0 R' % self._pages_id]
+        if self._version > (1, 4):
+            catalog.append(b'/Version /%d.%d' % self._version)
+        if self._outline:
+            catalog.append(b'/Outlines %d 0 R' % self._write_outline())
+        catalog_id = self._reserve()
+        self._write_raw(catalog_id, b'<< ' + b' '.join(catalog) + b' >>')
+        
+        xref_offset = self._file.tell()
+        self._file.write(b'xref\n0 %d\n' % len(self._offsets))
+        for offset in self._offsets:
+            if offset is None:
+                self._file.write(b'0000000000 65535 f \n')
+            else:
+                self._file.write(b'%010d 00000 n \n' % offset)
+        self._file.write(
+            b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+            % (len(self._offsets), catalog_id, xref_offset)
+        )
+        self._file.close()
+    
+    def abort(self):
+        """Cierra el archivo de salida sin completarlo"""
+        self._file.close()
+    
+    # ==================== ESCRITURA DE OBJETOS ====================
+    
+    def _reserve(self) -> int:
+        """Reserva un número de objeto en la salida"""
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+    
+    def _write_raw(self, obj_id: int, body: bytes):
+        """Escribe un objeto ya serializado"""
+        self._offsets[obj_id] = self._file.tell()
+        self._file.write(b'%d 0 obj\n' % obj_id)
+        self._file.write(body)
+        self._file.write(b'\nendobj\n')
+    
+    def _write_page(self, page, page_id: int, ids: dict, pending: list):
+        """Escribe una página apuntando al nuevo árbol y con sus atributos heredados"""
+        overrides = {'/Parent': b'%d 0 R' % self._pages_id}
+        
+        # El árbol de páginas del origen no se copia: bajar lo heredado a la página
+        for key in _INHERITABLE_PAGE_KEYS:
+            if key in page:
+                continue
+            node = page.get('/Parent')
+            visited = set()
+            while node is not None and node.objgen not in visited:
+                visited.add(node.objgen)
+                if key in node:
+                    overrides[key] = self._serialize(node[key], ids, pending)
+                    break
+                node = node.get('/Parent')
+        
+        self._write_raw(page_id, self._serialize_dict(page, ids, pending, overrides))
+    
+    def _write_object(self, obj, obj_id: int, ids: dict, pending: list):
+        """Escribe un objeto indirecto del origen con las referencias renumeradas"""
+        if isinstance(obj, pikepdf.Stream):
+            data = obj.read_raw_bytes()
+            header = self._serialize_dict(
+                obj, ids, pending, {'/Length': b'%d' % len(data)}
+            )
+            self._write_raw(obj_id, header + b'\nstream\n' + data + b'\nendstream')
+        else:
+            self._write_raw(obj_id, self._serialize_direct(obj, ids, pending))
+    
+    def _reference(self, obj, ids: dict, pending: Optional[list]) -> Optional[int]:
+        """
+        Devuelve el nuevo número de un objeto indirecto, encolándolo si es nuevo
+        
+        Los nodos del árbol de páginas y el catálogo del origen no se copian
+        (se sustituyen por null). Sin cola, los objetos no escritos también.
+        """
+        obj_id = ids.get(obj.objgen)
+        if obj_id is not None or pending is None:
+            return obj_id
+        
+        if isinstance(obj, pikepdf.Dictionary) and obj.get('/Type') in (
+                pikepdf.Name.Pages, pikepdf.Name.Catalog):
+            return None
+        
+        obj_id = self._reserve()
+        ids[obj.objgen] = obj_id
+        pending.append((obj, obj_id))
+        return obj_id
+    
+    def _serialize(self, obj, ids: dict, pending: Optional[list]) -> bytes:
+        """Serializa un valor usado dentro de otro objeto"""
+        if isinstance(obj, pikepdf.Object) and obj.is_indirect:
+            obj_id = self._reference(obj, ids, pending)
+            return b'null' if obj_id is None else b'%d 0 R' % obj_id
+        return self._serialize_direct(obj, ids, pending)
+    
+    def _serialize_direct(self, obj, ids: dict, pending: Optional[list]) -> bytes:
+        """Serializa un objeto directo"""
+        if obj is None:
+            return b'null'
+        if isinstance(obj, bool):
+            return b'true' if obj else b'false'
+        if isinstance(obj, int):
+            return b'%d' % obj
+        if isinstance(obj, Decimal):
+            return format(obj, 'f').encode('ascii')
+        if isinstance(obj, float):
+            return repr(obj).encode('ascii')
+        if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream)):
+            return self._serialize_dict(obj, ids, pending)
+        if isinstance(obj, pikepdf.Array):
+            return b'[' + b' '.join(self._serialize(item, ids, pending) for item in obj) + b']'
+        return obj.unparse(resolved=True)
+    
+    def _serialize_dict(
+        self,
+        obj,
+        ids: dict,
+        pending: Optional[list],
+        overrides: Optional[Dict[str, bytes]] = None
+    ) -> bytes:
+        """Serializa un diccionario, reemplazando las claves indicadas"""
+        overrides = overrides or {}
+        entries = []
+        for key, value in obj.items():
+            if key not in overrides:
+                entries.append(pikepdf.Name(key).unparse() + b' ' + self._serialize(value, ids, pending))
+        for key, value in overrides.items():
+            entries.append(pikepdf.Name(key).unparse() + b' ' + value)
+        return b'<< ' + b' '.join(entries) + b' >>'
+    
+    # ==================== MARCADORES ====================
+    
+    def _read_outline(self, pdf: pikepdf.Pdf, ids: dict) -> list:
+        """Lee los marcadores del origen con destinos ya renumerados"""
+        outlines = pdf.Root.get('/Outlines')
+        if outlines is None:
+            return []
+        return self._read_outline_items(pdf, outlines.get('/First'), ids, set())
+    
+    def _read_outline_items(self, pdf: pikepdf.Pdf, item, ids: dict, visited: set) -> list:
+        """Recorre una cadena de marcadores hermanos y sus hijos"""
+        items = []
+        while item is not None and item.objgen not in visited:
+            visited.add(item.objgen)
+            
+            title = item.get('/Title')
+            title = title.unparse(resolved=True) if isinstance(title, pikepdf.String) else b'()'
+            children = self._read_outline_items(pdf, item.get('/First'), ids, visited)
+            is_open = int(item.get('/Count', 0)) > 0
+            
+            items.append((title, self._resolve_destination(pdf, item, ids), is_open, children))
+            item = item.get('/Next')
+        return items
+    
+    def _resolve_destination(self, pdf: pikepdf.Pdf, item, ids: dict) -> Optional[bytes]:
+        """Devuelve el destino de un marcador apuntando a la página copiada"""
+        dest = item.get('/Dest')
+        if dest is None:
+            action = item.get('/A')
+            if action is not None and action.get('/S') == pikepdf.Name.GoTo:
+                dest = action.get('/D')
+        
+        # Destinos con nombre
+        try:
+            if isinstance(dest, pikepdf.Name):
+                dest = pdf.Root.Dests.get(str(dest))
+            elif isinstance(dest, pikepdf.String):
+                dest = pikepdf.NameTree(pdf.Root.Names.Dests).get(str(dest))
+        except (AttributeError, KeyError, TypeError):
+            return None
+        
+        if isinstance(dest, pikepdf.Dictionary):
+            dest = dest.get('/D')
+        if not isinstance(dest, pikepdf.Array) or len(dest) == 0:
+            return None
+        
+        target = dest[0]
+        if not isinstance(target, pikepdf.Object) or target.objgen not in ids:
+            return None
+        
+        return b'[%d 0 R' % ids[target.objgen] + b''.join(
+            b' ' + self._serialize(value, ids, None) for value in list(dest)[1:]
+        ) + b']'
+    
+    def _write_outline(self) -> int:
+        """Escribe el árbol de marcadores y devuelve el id de su raíz"""
+        root_id = self._reserve()
+        first, last, count = self._write_outline_level(self._outline, root_id)
+        self._write_raw(
+            root_id,
+            b'<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>' % (first, last, count)
+        )
+        return root_id
+    
+    def _write_outline_level(self, items: list, parent_id: int) -> Tuple[int, int, int]:
+        """Escribe un nivel de marcadores; devuelve (primero, último, visibles)"""
+        item_ids = [self._reserve() for _ in items]
+        visible = len(items)
+        
+        for index, (title, dest, is_open, children) in enumerate(items):
+            entries = [b'/Title ' + title, b'/Parent %d 0 R' % parent_id]
+            if index > 0:
+                entries.append(b'/Prev %d 0 R' % item_ids[index - 1])
+            if index + 1 < len(items):
+                entries.append(b'/Next %d 0 R' % item_ids[index + 1])
+            if dest is not None:
+                entries.append(b'/Dest ' + dest)
+            if children:
+                first, last, count = self._write_outline_level(children, item_ids[index])
+                entries.append(b'/First %d 0 R /Last %d 0 R' % (first, last))
+                entries.append(b'/Count %d' % (count if is_open else -len(children)))
+                if is_open:
+                    visible += count
+            self._write_raw(item_ids[index], b'<< ' + b' '.join(entries) + b' >>')
+        
+        return item_ids[0], item_ids[-1], visible
@@ -0,0 +1,315 @@
+"""
+Índice de texto completo
+Guarda en SQLite (FTS5) el texto de cada página de los PDFs procesados
+"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+from config.settings import settings
+
+
+class TextIndex:
+    """
+    Índice de búsqueda sobre el texto por página de los PDFs
+    
+    Cada documento se identifica por su ruta absoluta y recuerda el tamaño
+    y la fecha de modificación con que se indexó, de modo que refresh()
+    solo vuelve a extraer el texto de los archivos que han cambiado. Las
+    búsquedas usan el índice FTS5 (sin distinguir mayúsculas ni acentos) y
+    se ordenan por relevancia (BM25). Es seguro entre hilos.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Archivo SQLite (None = settings.TEXT_INDEX_PATH)
+        """
+        if path is None:
+            Path(settings.TEXT_INDEX_PATH).parent.mkdir(parents=True, exist_ok=True)
+            path = str(settings.TEXT_INDEX_PATH)
+        
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' id INTEGER PRIMARY KEY,'
+            ' path TEXT NOT NULL UNIQUE,'
+            ' size INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' pages INTEGER NOT NULL,'
+            ' indexed_at REAL NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' id INTEGER PRIMARY KEY,'
+            ' document_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,'
+            ' page INTEGER NOT NULL);'
+            'CREATE INDEX IF NOT EXISTS pages_document ON pages (document_id);'
+            'CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5('
+            " text, tokenize='unicode61 remove_diacritics 2');"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def _normalize_path(path: str) -> str:
+        """Ruta absoluta con la que se guarda el documento"""
+        return str(Path(path).resolve())
+    
+    @staticmethod
+    def to_query(text: str) -> str:
+        """
+        Convierte lo que escribe el usuario en una consulta FTS5 segura
+        
+        Cada palabra se busca literalmente (todas deben aparecer en la
+        página); una palabra terminada en * busca por prefijo.
+        
+        Args:
+            text: Texto de búsqueda
+        
+        Returns:
+            Consulta FTS5 (vacía si no hay palabras)
+        """
+        terms = []
+        for word in text.split():
+            prefix = word.endswith('*')
+            word = word.rstrip('*').replace('"', '""')
+            if word:
+                terms.append(f'"{word}"*' if prefix else f'"{word}"')
+        return ' '.join(terms)
+    
+    def is_current(self, path: str) -> bool:
+        """
+        Indica si el documento está indexado y no ha cambiado desde entonces
+        
+        Args:
+            path: Ruta del PDF
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT size, mtime_ns FROM documents WHERE path = ?',
+                (self._normalize_path(path),)
+            ).fetchone()
+        return row is not None and tuple(row) == (stat.st_size, stat.st_mtime_ns)
+    
+    def add_document(self, path: str, texts: List[str]):
+        """
+        Indexa (o reemplaza) el texto de un documento
+        
+        Args:
+            path: Ruta del PDF
+            texts: Texto de cada página, en orden
+        """
+        stat = os.stat(path)
+        path = self._normalize_path(path)
+        
+        with self._lock, self._conn:
+            self._delete(path)
+            document_id = self._conn.execute(
+                'INSERT INTO documents (path, size, mtime_ns, pages, indexed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (path, stat.st_size, stat.st_mtime_ns, len(texts), time.time())
+            ).lastrowid
+            
+            for number, text in enumerate(texts, start=1):
+                if not text or not text.strip():
+                    continue
+                page_id = self._conn.execute(
+                    'INSERT INTO pages (document_id, page) VALUES (?, ?)',
+                    (document_id, number)
+                ).lastrowid
+                self._conn.execute(
+                    'INSERT INTO page_text (rowid, text) VALUES (?, ?)', (page_id, text)
+                )
+    
+    def remove_document(self, path: str):
+        """Elimina un documento del índice"""
+        with self._lock, self._conn:
+            self._delete(self._normalize_path(path))
+    
+    def _delete(self, path: str):
+        """Borra el documento y sus páginas (requiere el lock y una transacción)"""
+        self._conn.execute(
+            'DELETE FROM page_text WHERE rowid IN ('
+            ' SELECT pages.id FROM pages JOIN documents ON documents.id = pages.document_id'
+            ' WHERE documents.path = ?)',
+            (path,)
+        )
+        self._conn.execute('DELETE FROM documents WHERE path = ?', (path,))
+    
+    def refresh(
+        self,
+        paths: Iterable[str],
+        extractor: Optional[Callable[[str], List[str]]] = None,
+        progress_callback: Optional[Callable[[int, str], None]] = None
+    ) -> dict:
+        """
+        Actualiza el índice de forma incremental
+        
+        Solo se extrae el texto de los archivos nuevos o modificados; los que
+        ya no existen se eliminan del índice.
+        
+        Args:
+            paths: Rutas de los PDFs a mantener indexados
+            extractor: Función que devuelve el texto por página de un PDF
+                (None = OCRService.extract_text_from_pdf, que solo aplica OCR
+                a las páginas sin capa de texto)
+            progress_callback: Función para reportar progreso (percent, message)
+        
+        Returns:
+            Diccionario con indexed, unchanged, removed y failed (rutas con error)
+        """
+        if extractor is None:
+            from .ocr_service import OCRService
+            
+            def extractor(path):
+                return OCRService.extract_text_from_pdf(path, index_text=False)['texts']
+        
+        paths = list(paths)
+        result = {'indexed': 0, 'unchanged': 0, 'removed': 0, 'failed': []}
+        
+        for i, path in enumerate(paths):
+            if progress_callback:
+                progress_callback(
+                    int((i / len(paths)) * 100), f"Indexando {i+1}/{len(paths)}: {Path(path).name}"
+                )
+            
+            if not Path(path).exists():
+                self.remove_document(path)
+                result['removed'] += 1
+            elif self.is_current(path):
+                result['unchanged'] += 1
+            else:
+                try:
+                    self.add_document(path, extractor(path))
+                    result['indexed'] += 1
+                except Exception as e:
+                    result['failed'].append({'path': path, 'error': str(e)})
+        
+        if progress_callback:
+            progress_callback(100, "Índice actualizado")
+        
+        return result
+    
+    def prune(self) -> int:
+        """
+        Elimina del índice los documentos cuyo archivo ya no existe
+        
+        Returns:
+            Número de documentos eliminados
+        """
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute('SELECT path FROM documents')]
+        
+        missing = [path for path in paths if not Path(path).exists()]
+        for path in missing:
+            self.remove_document(path)
+        return len(missing)
+    
+    def search(self, query: str, limit: int = 50, raw: bool = False) -> List[dict]:
+        """
+        Busca páginas que contengan el texto
+        
+        Args:
+            query: Texto a buscar (ver to_query)
+            limit: Número máximo de resultados
+            raw: Usar `query` directamente como consulta FTS5 (AND, OR, NEAR, "frase"...)
+        
+        Returns:
+            Lista ordenada por relevancia de:
+            {'path': str, 'page': int, 'snippet': str, 'score': float}
+        """
+        match = query if raw else self.to_query(query)
+        if not match:
+            return []
+        
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT documents.path, pages.page,"
+                " snippet(page_text, 0, '[', ']', '…', 12), bm25(page_text)"
+                ' FROM page_text'
+                ' JOIN pages ON pages.id = page_text.rowid'
+                ' JOIN documents ON documents.id = pages.document_id'
+                ' WHERE page_text MATCH ? ORDER BY rank LIMIT ?',
+                (match, limit)
+            ).fetchall()
+        
+        return [
+            {'path': path, 'page': page, 'snippet': snippet, 'score': round(-score, 4)}
+            for path, page, snippet, score in rows
+        ]
+    
+    def search_documents(self, query: str, limit: int = 50, raw: bool = False) -> List[dict]:
+        """
+        Busca documentos que contengan el texto, agrupando las páginas
+        
+        Args:
+            query: Texto a buscar (ver to_query)
+            limit: Número máximo de documentos
+            raw: Usar `query` directamente como consulta FTS5
+        
+        Returns:
+            Lista ordenada por relevancia de:
+            {'path': str, 'pages': List[int], 'score': float}
+        """
+        match = query if raw else self.to_query(query)
+        if not match:
+            return []
+        
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT path, group_concat(page), min(score) FROM ('
+                ' SELECT documents.path, pages.page, page_text.rank AS score'
+                ' FROM page_text'
+                ' JOIN pages ON pages.id = page_text.rowid'
+                ' JOIN documents ON documents.id = pages.document_id'
+                ' WHERE page_text MATCH ?)'
+                ' GROUP BY path ORDER BY 3 LIMIT ?',
+                (match, limit)
+            ).fetchall()
+        
+        return [
+            {
+                'path': path,
+                'pages': sorted(int(page) for page in pages.split(',')),
+                'score': round(-score, 4)
+            }
+            for path, pages, score in rows
+        ]
+    
+    def stats(self) -> dict:
+        """
+        Estadísticas del índice
+        
+        Returns:
+            Diccionario con documents y pages (páginas con texto)
+        """
+        with self._lock:
+            documents = self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+            pages = self._conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+        
+        return {'documents': documents, 'pages': pages}
+    
+    def optimize(self):
+        """Compacta el índice FTS5 tras muchas actualizaciones"""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO page_text (page_text) VALUES ('optimize')")
+    
+    def close(self):
+        """Cierra la conexión con la base de datos"""
+        with self._lock:
+            self._conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
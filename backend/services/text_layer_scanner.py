@@ -0,0 +1,118 @@
+"""
+Servicio de detección de capa de texto
+Analiza los content streams de un PDF para saber qué páginas ya tienen texto
+"""
+import pikepdf
+from typing import List, Optional
+from config.settings import settings
+
+
+# Operadores que muestran texto y posición de la cadena entre sus operandos
+_TEXT_SHOW_OPERATORS = {'Tj': 0, "'": 0, '"': 2}
+
+# Puntos por pulgada cuadrada (72 x 72)
+_POINTS_PER_SQUARE_INCH = 5184
+
+
+class TextLayerScanner:
+    """Servicio para detectar páginas que ya tienen texto extraíble"""
+    
+    @staticmethod
+    def scan(input_path: str, min_density: Optional[float] = None) -> List[dict]:
+        """
+        Analiza cada página sin renderizarla
+        
+        Recorre el content stream de cada página (y de sus Form XObjects)
+        contando los caracteres que muestran los operadores de texto con una
+        fuente extraíble. La densidad de caracteres por pulgada cuadrada
+        distingue una página digital de un escaneo con un sello o número de
+        página añadido.
+        
+        Args:
+            input_path: Ruta del PDF
+            min_density: Caracteres por pulgada cuadrada a partir de los cuales
+                la página se considera con texto (None = settings.OCR_MIN_TEXT_DENSITY)
+        
+        Returns:
+            Lista con un diccionario por página:
+            {
+                'page': int,
+                'characters': int,
+                'density': float,
+                'has_text': bool
+            }
+        """
+        if min_density is None:
+            min_density = settings.OCR_MIN_TEXT_DENSITY
+        
+        results = []
+        with pikepdf.open(input_path) as pdf:
+            for number, page in enumerate(pdf.pages, start=1):
+                try:
+                    characters = TextLayerScanner._count_characters(
+                        page, page.resources, set()
+                    )
+                except (pikepdf.PdfError, ValueError, TypeError):
+                    # Contenido ilegible: mejor aplicar OCR a la página
+                    characters = 0
+                
+                box = page.cropbox
+                area = abs(float(box[2]) - float(box[0])) * abs(float(box[3]) - float(box[1]))
+                density = characters / (area / _POINTS_PER_SQUARE_INCH) if area else 0.0
+                
+                results.append({
+                    'page': number,
+                    'characters': characters,
+                    'density': round(density, 3),
+                    'has_text': characters > 0 and density >= min_density
+                })
+        
+        return results
+    
+    @staticmethod
+    def _count_characters(owner, resources, visited: set) -> int:
+        """Cuenta los caracteres extraíbles de una página o Form XObject"""
+        fonts = resources.get('/Font') if resources is not None else None
+        xobjects = resources.get('/XObject') if resources is not None else None
+        bytes_per_char = 1
+        characters = 0
+        
+        for operands, operator in pikepdf.parse_content_stream(owner):
+            op = str(operator)
+            
+            if op == 'Tf':
+                font = fonts.get(str(operands[0])) if fonts is not None else None
+                bytes_per_char = TextLayerScanner._bytes_per_char(font)
+            
+            elif op in _TEXT_SHOW_OPERATORS and bytes_per_char:
+                characters += len(bytes(operands[_TEXT_SHOW_OPERATORS[op]])) // bytes_per_char
+            
+            elif op == 'TJ' and bytes_per_char:
+                characters += sum(
+                    len(bytes(item)) // bytes_per_char
+                    for item in operands[0] if isinstance(item, pikepdf.String)
+                )
+            
+            elif op == 'Do' and xobjects is not None:
+                xobject = xobjects.get(str(operands[0]))
+                if xobject is None or xobject.get('/Subtype') != pikepdf.Name.Form \
+                        or xobject.objgen in visited:
+                    continue
+                visited.add(xobject.objgen)
+                characters += TextLayerScanner._count_characters(
+                    xobject, xobject.get('/Resources', resources), visited
+                )
+        
+        return characters
+    
+    @staticmethod
+    def _bytes_per_char(font) -> int:
+        """
+        Bytes por carácter de una fuente, o 0 si su texto no es extraíble
+        
+        Las fuentes compuestas (Type0) usan códigos de 2 bytes y sin un
+        /ToUnicode no se puede recuperar el texto.
+        """
+        if font is None or font.get('/Subtype') != pikepdf.Name.Type0:
+            return 1
+        return 2 if '/ToUnicode' in font else 0
@@ -19,11 +19,40 @@ class Settings:
     # ==================== CONFIGURACIÓN OCR ====================
     TESSERACT_LANG = os.getenv('TESSERACT_LANG', 'spa+eng')
     OCR_DPI = int(os.getenv('OCR_DPI', 300))
+    # Motor de OCR: 'tesserocr' (procesos persistentes con los modelos cargados),
+    # 'pytesseract' (un proceso por página) o 'auto' (tesserocr si está instalado)
+    OCR_ENGINE = os.getenv('OCR_ENGINE', 'auto')
+    # DPI adaptativo: primera pasada rápida y repetición a OCR_DPI de las
+    # páginas cuya confianza media quede por debajo de OCR_MIN_CONFIDENCE
+    OCR_ADAPTIVE_DPI = os.getenv('OCR_ADAPTIVE_DPI', 'False').lower() == 'true'
+    OCR_FAST_DPI = int(os.getenv('OCR_FAST_DPI', 200))
+    OCR_MIN_CONFIDENCE = float(os.getenv('OCR_MIN_CONFIDENCE', 75))
+    # Caracteres por pulgada cuadrada a partir de los cuales una página ya
+    # tiene capa de texto y no necesita OCR
+    OCR_MIN_TEXT_DENSITY = float(os.getenv('OCR_MIN_TEXT_DENSITY', 0.5))
+    # Pasos de limpieza de imagen antes del OCR, separados por comas (vacío = ninguno)
+    # Opciones: grayscale, binarize, deskew, despeckle, crop_borders
+    OCR_PREPROCESSING = [
+        step.strip() for step in os.getenv('OCR_PREPROCESSING', '').split(',') if step.strip()
+    ]
     
     # ==================== CONFIGURACIÓN DE CONVERSIÓN ====================
     PDF_TO_IMAGE_DPI = int(os.getenv('PDF_TO_IMAGE_DPI', 300))
+    # Páginas renderizadas a la vez (limita la memoria en documentos grandes)
+    RASTER_WINDOW_PAGES = int(os.getenv('RASTER_WINDOW_PAGES', 8))
     IMAGE_FORMAT = os.getenv('IMAGE_FORMAT', 'PNG')
     WORD_CONVERSION_AVAILABLE = os.getenv('WORD_CONVERSION_AVAILABLE', 'True').lower() == 'true'
+    # Conversor Word → PDF: auto, libreoffice, docx2pdf o stub (solo pruebas)
+    WORD_CONVERTER = os.getenv('WORD_CONVERTER', 'auto')
+    # Ejecutable de LibreOffice (vacío = buscarlo en el PATH)
+    SOFFICE_PATH = os.getenv('SOFFICE_PATH', '')
+    # Instancias de LibreOffice en paralelo y segundos máximos por documento
+    OFFICE_POOL_SIZE = int(os.getenv('OFFICE_POOL_SIZE', 2))
+    OFFICE_TIMEOUT = int(os.getenv('OFFICE_TIMEOUT', 120))
+    
+    # ==================== CONFIGURACIÓN DE COMBINACIÓN ====================
+    # Motor de combinación: 'streaming' (memoria acotada) o 'pypdf2'
+    MERGE_ENGINE = os.getenv('MERGE_ENGINE', 'streaming')
     
     # ==================== CONFIGURACIÓN DE COMPRESIÓN ====================
     DEFAULT_COMPRESSION_QUALITY = os.getenv('DEFAULT_COMPRESSION_QUALITY', 'medium')
@@ -65,10 +94,29 @@ class Settings:
     OUTPUT_DIR = BASE_DIR / os.getenv('OUTPUT_DIR', 'output')
     ASSETS_DIR = BASE_DIR / 'assets'
     
+    # ==================== CACHÉ DE OCR ====================
+    OCR_CACHE_ENABLED = os.getenv('OCR_CACHE_ENABLED', 'True').lower() == 'true'
+    OCR_CACHE_DIR = BASE_DIR / os.getenv('OCR_CACHE_DIR', 'temp/ocr_cache')
+    OCR_CACHE_MAX_MB = int(os.getenv('OCR_CACHE_MAX_MB', 256))
+    
+    # ==================== ÍNDICE DE BÚSQUEDA ====================
+    # Texto por página de los PDFs procesados con OCR o extracción de texto
+    TEXT_INDEX_ENABLED = os.getenv('TEXT_INDEX_ENABLED', 'True').lower() == 'true'
+    TEXT_INDEX_PATH = BASE_DIR / os.getenv('TEXT_INDEX_PATH', 'temp/text_index.sqlite3')
+    
+    # ==================== CACHÉ DE METADATOS ====================
+    # Páginas, validez, cifrado... de cada archivo por (ruta, tamaño, mtime)
+    METADATA_CACHE_PERSIST = os.getenv('METADATA_CACHE_PERSIST', 'True').lower() == 'true'
+    METADATA_CACHE_PATH = BASE_DIR / os.getenv('METADATA_CACHE_PATH', 'temp/metadata_cache.sqlite3')
+    
     # ==================== LÍMITES ====================
     MAX_FILE_SIZE_MB = int(os.getenv('MAX_FILE_SIZE_MB', 100))
     MAX_BATCH_FILES = int(os.getenv('MAX_BATCH_FILES', 50))
     
+    # ==================== PARALELISMO ====================
+    # Número de procesos de trabajo (0 = uno por núcleo disponible)
+    MAX_WORKERS = int(os.getenv('MAX_WORKERS', 0)) or (os.cpu_count() or 1)
+    
     # ==================== INFORMACIÓN DE LA APP ====================
     APP_NAME = "Vectora"
     APP_VERSION = "5.0.0"
@@ -3,6 +3,7 @@ Vectora - Aplicación de Escritorio
 Punto de entrada principal
 """
 import sys
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import Qt
 from ui.main_window import MainWindow
@@ -34,4 +35,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # Necesario para los procesos de trabajo en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
     main()
@@ -5,7 +5,7 @@ Aplica una operación a múltiples archivos
 from PySide6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QLabel,
     QListWidget, QComboBox, QStackedWidget, QWidget, QSlider,
-    QLineEdit, QGroupBox
+    QLineEdit, QGroupBox, QCheckBox
 )
 from PySide6.QtCore import Qt, QThread, Signal
 from .base_operation import BaseOperationWidget
@@ -14,6 +14,7 @@ from backend.services.pdf_compressor import PDFCompressor
 from backend.services.pdf_converter import PDFConverter
 from backend.services.pdf_security import PDFSecurity
 from config.settings import settings
+from concurrent.futures import ThreadPoolExecutor
 import os
 
 
@@ -24,16 +25,18 @@ class BatchWorker(QThread):
     finished = Signal(dict)
     error = Signal(str)
     
-    def __init__(self, operation_type, files, config):
+    def __init__(self, operation_type, files, config, workers=None):
         super().__init__()
         self.op_type = operation_type
         self.files = files
         self.config = config
+        self.workers = workers  # None = procesamiento secuencial
     
     def run(self):
         try:
             func = None
             kw_config = {}
+            executor = None
             
             # Mapear operación a función y config
             if self.op_type == "Comprimir PDF":
@@ -45,6 +48,10 @@ class BatchWorker(QThread):
                 
             elif self.op_type == "Word a PDF":
                 func = PDFConverter.word_to_pdf
+                # Hilos en lugar de procesos: así todos comparten el pool
+                # de instancias de LibreOffice ya arrancadas
+                if self.workers and self.workers > 1:
+                    executor = ThreadPoolExecutor(max_workers=settings.OFFICE_POOL_SIZE)
                 
             elif self.op_type == "Encriptar":
                 func = PDFSecurity.encrypt_pdf
@@ -60,13 +67,19 @@ class BatchWorker(QThread):
                 self.item_processed.emit(res['file'], res['success'])
 
             # Ejecutar
-            result = BatchProcessor.process_batch(
-                self.files,
-                func,
-                kw_config,
-                str(settings.OUTPUT_DIR / "batch"),
-                progress_callback=batch_callback
-            )
+            try:
+                result = BatchProcessor.process_batch(
+                    self.files,
+                    func,
+                    kw_config,
+                    str(settings.OUTPUT_DIR / "batch"),
+                    progress_callback=batch_callback,
+                    workers=self.workers,
+                    executor=executor
+                )
+            finally:
+                if executor is not None:
+                    executor.shutdown()
             self.finished.emit(result)
             
         except Exception as e:
@@ -144,6 +157,14 @@ class BatchWidget(BaseOperationWidget):
         self.pwd_input.setPlaceholderText("Contraseña para todos los archivos")
         s_layout.addWidget(self.pwd_input)
         self.config_stack.addWidget(self.sec_config) # Para índice 3 y 4
+        
+        # --- Ejecución en paralelo ---
+        self.parallel_check = QCheckBox(
+            f"⚡ Procesar en paralelo ({settings.MAX_WORKERS} procesos)"
+        )
+        self.parallel_check.setChecked(settings.MAX_WORKERS > 1)
+        self.parallel_check.setEnabled(settings.MAX_WORKERS > 1)
+        self.config_layout.addWidget(self.parallel_check)
 
         # Inicializar vista de config
         self.on_op_changed(0)
@@ -190,7 +211,9 @@ class BatchWidget(BaseOperationWidget):
         self.set_processing_state(True)
         self.update_progress(0, "Iniciando lote...")
         
-        self.worker = BatchWorker(op, self.files, config)
+        workers = settings.MAX_WORKERS if self.parallel_check.isChecked() else None
+        
+        self.worker = BatchWorker(op, self.files, config, workers=workers)
         self.worker.progress_updated.connect(lambda v: self.update_progress(v))
         self.worker.item_processed.connect(self.on_item_processed)
         self.worker.finished.connect(self.on_success)
@@ -4,7 +4,7 @@ Permite reducir el tamaño de archivos PDF
 """
 from PySide6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QLabel,
-    QSlider, QProgressBar, QFrame
+    QSlider, QProgressBar, QFrame, QCheckBox, QDoubleSpinBox
 )
 from PySide6.QtCore import Qt, QThread, Signal
 from .base_operation import BaseOperationWidget
@@ -19,11 +19,12 @@ class CompressWorker(QThread):
     finished = Signal(dict)
     error = Signal(str)
     
-    def __init__(self, input_file, output_file, quality_level):
+    def __init__(self, input_file, output_file, quality_level, target_size_mb=None):
         super().__init__()
         self.input_file = input_file
         self.output_file = output_file
         self.quality_level = quality_level
+        self.target_size_mb = target_size_mb
     
     def run(self):
         try:
@@ -31,7 +32,9 @@ class CompressWorker(QThread):
                 self.input_file,
                 self.output_file,
                 self.quality_level,
-                progress_callback=self.progress_updated.emit
+                progress_callback=self.progress_updated.emit,
+                workers=settings.MAX_WORKERS,
+                target_size_mb=self.target_size_mb
             )
             self.finished.emit(result)
         except Exception as e:
@@ -113,6 +116,21 @@ class CompressWidget(BaseOperationWidget):
         self.info_label.setStyleSheet("color: #6b7280; font-style: italic; margin-top: 8px;")
         slider_layout.addWidget(self.info_label)
         
+        # Tamaño máximo (ajusta calidad y resolución automáticamente)
+        target_layout = QHBoxLayout()
+        self.target_check = QCheckBox("Ajustar a un tamaño máximo:")
+        self.target_check.toggled.connect(self.on_target_toggled)
+        target_layout.addWidget(self.target_check)
+        
+        self.target_spin = QDoubleSpinBox()
+        self.target_spin.setRange(0.1, 1000)
+        self.target_spin.setValue(10)
+        self.target_spin.setSuffix(" MB")
+        self.target_spin.setEnabled(False)
+        target_layout.addWidget(self.target_spin)
+        target_layout.addStretch()
+        slider_layout.addLayout(target_layout)
+        
         self.config_layout.addWidget(slider_container)
 
     def select_file(self):
@@ -124,6 +142,11 @@ class CompressWidget(BaseOperationWidget):
             self.input_file = file
             self.file_label.setText(f"📄 {file.split('/')[-1]}")
     
+    def on_target_toggled(self, checked):
+        """El tamaño objetivo sustituye al nivel del slider"""
+        self.target_spin.setEnabled(checked)
+        self.slider.setEnabled(not checked)
+    
     def update_compression_level(self, value):
         """Actualiza la etiqueta e información según el slider"""
         level_key = settings.get_compression_level(value)
@@ -145,7 +168,11 @@ class CompressWidget(BaseOperationWidget):
         self.set_processing_state(True)
         self.update_progress(0, "Iniciando compresión...")
         
-        self.worker = CompressWorker(self.input_file, output_file, self.quality_level)
+        target_size_mb = self.target_spin.value() if self.target_check.isChecked() else None
+        
+        self.worker = CompressWorker(
+            self.input_file, output_file, self.quality_level, target_size_mb
+        )
         self.worker.progress_updated.connect(self.update_progress)
         self.worker.finished.connect(self.on_success)
         self.worker.error.connect(self.on_error)
@@ -157,6 +184,8 @@ class CompressWidget(BaseOperationWidget):
         msg = (f"¡Compresión exitosa!\n"
                f"Ahorro: {result['savings_percent']}%\n"
                f"Tamaño final: {result['compressed_size_mb']} MB")
+        if 'target_reached' in result and not result['target_reached']:
+            msg += f"\nNo se alcanzó el objetivo de {result['target_size_mb']} MB"
         self.show_success(msg)
         
     def on_error(self, error):
@@ -169,4 +198,5 @@ class CompressWidget(BaseOperationWidget):
         self.input_file = None
         self.file_label.setText("Ningún archivo seleccionado")
         self.slider.setValue(50)
+        self.target_check.setChecked(False)
         self.progress_bar.setValue(0)
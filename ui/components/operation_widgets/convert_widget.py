@@ -39,7 +39,8 @@ class ConvertWorker(QThread):
                 result = PDFConverter.pdf_to_word(
                     self.kwargs['input_path'],
                     self.kwargs['output_path'],
-                    progress_callback=progress_callback
+                    progress_callback=progress_callback,
+                    workers=settings.MAX_WORKERS
                 )
             elif self.mode == 'pdf_to_images':
                 result = PDFConverter.pdf_to_images(
@@ -47,7 +48,8 @@ class ConvertWorker(QThread):
                     self.kwargs['output_dir'],
                     dpi=self.kwargs['dpi'],
                     image_format=self.kwargs['format'],
-                    progress_callback=lambda v: self.progress_updated.emit(v)
+                    progress_callback=lambda v: self.progress_updated.emit(v),
+                    workers=settings.MAX_WORKERS
                 )
             elif self.mode == 'images_to_pdf':
                 result = PDFConverter.images_to_pdf(
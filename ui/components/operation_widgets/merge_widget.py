@@ -28,7 +28,8 @@ class MergeWorker(QThread):
             result = PDFMerger.merge_pdfs(
                 self.input_files,
                 self.output_file,
-                progress_callback=self.progress_updated.emit
+                progress_callback=self.progress_updated.emit,
+                workers=settings.MAX_WORKERS
             )
             self.finished.emit(result)
         except Exception as e:
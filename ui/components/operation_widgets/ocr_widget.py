@@ -9,6 +9,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QThread, Signal
 from .base_operation import BaseOperationWidget
 from backend.services.ocr_service import OCRService
+from backend.services.image_preprocessor import PREPROCESSING_STEPS
 from utils.file_handler import FileHandler
 from config.settings import settings
 import os
@@ -20,12 +21,16 @@ class OCRWorker(QThread):
     finished = Signal(dict)
     error = Signal(str)
     
-    def __init__(self, input_path, output_path, language, dpi):
+    def __init__(self, input_path, output_path, language, dpi, workers=None,
+                 preprocessing=None, adaptive_dpi=None):
         super().__init__()
         self.input_path = input_path
         self.output_path = output_path
         self.language = language
         self.dpi = dpi
+        self.workers = workers
+        self.preprocessing = preprocessing
+        self.adaptive_dpi = adaptive_dpi
     
     def run(self):
         try:
@@ -38,7 +43,10 @@ class OCRWorker(QThread):
                 self.output_path,
                 language=self.language,
                 dpi=self.dpi,
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                workers=self.workers,
+                preprocessing=self.preprocessing,
+                adaptive_dpi=self.adaptive_dpi
             )
             self.finished.emit(result)
         except Exception as e:
@@ -96,6 +104,18 @@ class OCRWidget(BaseOperationWidget):
         opts_layout.addStretch()
         self.config_layout.addLayout(opts_layout)
         
+        # Limpieza de imagen (escaneos de baja calidad)
+        self.preprocess_check = QCheckBox("Limpiar imagen antes del OCR (escaneos y faxes de baja calidad)")
+        self.preprocess_check.setChecked(bool(settings.OCR_PREPROCESSING))
+        self.config_layout.addWidget(self.preprocess_check)
+        
+        # DPI adaptativo: pasada rápida y repetición solo donde haga falta
+        self.adaptive_check = QCheckBox(
+            f"DPI adaptativo (primera pasada a {settings.OCR_FAST_DPI} dpi, más rápido)"
+        )
+        self.adaptive_check.setChecked(settings.OCR_ADAPTIVE_DPI)
+        self.config_layout.addWidget(self.adaptive_check)
+        
         # Nota informativa
         note = QLabel("Nota: El proceso puede tardar dependiendo del número de páginas y la resolución.")
         note.setStyleSheet("color: #6b7280; font-size: 11px; margin-top: 10px;")
@@ -121,7 +141,17 @@ class OCRWidget(BaseOperationWidget):
         self.set_processing_state(True)
         self.update_progress(0, "Iniciando motor OCR...")
         
-        self.worker = OCRWorker(self.current_file, output, lang_code, dpi)
+        # Pasos configurados en settings o, si no hay ninguno, todos
+        preprocessing = []
+        if self.preprocess_check.isChecked():
+            preprocessing = settings.OCR_PREPROCESSING or list(PREPROCESSING_STEPS)
+        
+        self.worker = OCRWorker(
+            self.current_file, output, lang_code, dpi,
+            workers=settings.MAX_WORKERS,
+            preprocessing=preprocessing,
+            adaptive_dpi=self.adaptive_check.isChecked()
+        )
         self.worker.progress_updated.connect(self.update_progress_message)
         self.worker.finished.connect(self.on_success)
         self.worker.error.connect(self.on_error)
@@ -134,7 +164,8 @@ class OCRWidget(BaseOperationWidget):
         self.set_processing_state(False)
         self.show_success(
             f"¡OCR Completado!\n"
-            f"Se procesaron {result['total_pages']} páginas.\n"
+            f"Se procesaron {result['total_pages']} páginas "
+            f"({result['pages_skipped']} ya tenían texto).\n"
             f"Caracteres detectados: {result['total_characters']}"
         )
         
@@ -41,14 +41,16 @@ class SplitWorker(QThread):
                     self.input_file,
                     self.output_path,
                     self.config['pages'],
-                    self.progress_updated.emit
+                    self.progress_updated.emit,
+                    keep_order=True
                 )
             else:  # every
                 result = PDFSplitter.split_every_n_pages(
                     self.input_file,
                     str(settings.OUTPUT_DIR),
                     self.config['n'],
-                    self.progress_updated.emit
+                    self.progress_updated.emit,
+                    workers=settings.MAX_WORKERS
                 )
             self.finished.emit(result)
         except Exception as e:
@@ -104,7 +106,7 @@ class SplitWidget(BaseOperationWidget):
         self.range_end.setPlaceholderText("Página final")
         
         self.pages_spec = QLineEdit()
-        self.pages_spec.setPlaceholderText("Ej: 1,3,5-8,12")
+        self.pages_spec.setPlaceholderText("Ej: 1,3,5-8,12 · 10-1 · 1-20:2 · odd · last")
         
         self.every_n = QLineEdit()
         self.every_n.setPlaceholderText("Número de páginas")
@@ -3,22 +3,76 @@ Ventana principal de LocalPDF v5
 Contiene la barra lateral de navegación y el área de contenido con las diferentes vistas
 """
 from PySide6.QtWidgets import (
-    QMainWindow, QWidget, QHBoxLayout, QStackedWidget, QVBoxLayout
+    QMainWindow, QWidget, QHBoxLayout, QStackedWidget, QVBoxLayout, QMessageBox
 )
 from PySide6.QtCore import Qt
 from ui.components.sidebar import Sidebar
-from ui.components.dashboard import Dashboard
-from ui.components.wizard import Wizard
-from ui.components.operation_widgets.merge_widget import MergeWidget
-from ui.components.operation_widgets.split_widget import SplitWidget
-from ui.components.operation_widgets.compress_widget import CompressWidget
-from ui.components.operation_widgets.convert_widget import ConvertWidget
-from ui.components.operation_widgets.security_widget import SecurityWidget
-from ui.components.operation_widgets.ocr_widget import OCRWidget
-from ui.components.operation_widgets.batch_widget import BatchWidget
 from config.settings import settings
 
 
+# Cada vista (y los servicios del backend que usa) se importa dentro de su
+# función, la primera vez que se muestra. Los imports son estáticos para
+# que PyInstaller los siga detectando.
+
+def _create_dashboard():
+    from ui.components.dashboard import Dashboard
+    return Dashboard()
+
+
+def _create_wizard():
+    from ui.components.wizard import Wizard
+    return Wizard()
+
+
+def _create_merge():
+    from ui.components.operation_widgets.merge_widget import MergeWidget
+    return MergeWidget()
+
+
+def _create_split():
+    from ui.components.operation_widgets.split_widget import SplitWidget
+    return SplitWidget()
+
+
+def _create_compress():
+    from ui.components.operation_widgets.compress_widget import CompressWidget
+    return CompressWidget()
+
+
+def _create_convert():
+    from ui.components.operation_widgets.convert_widget import ConvertWidget
+    return ConvertWidget()
+
+
+def _create_security():
+    from ui.components.operation_widgets.security_widget import SecurityWidget
+    return SecurityWidget()
+
+
+def _create_ocr():
+    from ui.components.operation_widgets.ocr_widget import OCRWidget
+    return OCRWidget()
+
+
+def _create_batch():
+    from ui.components.operation_widgets.batch_widget import BatchWidget
+    return BatchWidget()
+
+
+# Registro de vistas: nombre → función que la construye
+VIEW_FACTORIES = {
+    'dashboard': _create_dashboard,
+    'wizard': _create_wizard,
+    'merge': _create_merge,
+    'split': _create_split,
+    'compress': _create_compress,
+    'convert': _create_convert,
+    'security': _create_security,
+    'ocr': _create_ocr,
+    'batch': _create_batch
+}
+
+
 class MainWindow(QMainWindow):
     """Ventana principal de la aplicación"""
     
@@ -50,28 +104,9 @@ class MainWindow(QMainWindow):
         # Crear stacked widget para las vistas
         self.stacked_widget = QStackedWidget()
         
-        # Crear todas las vistas
-        self.views = {
-            'dashboard': Dashboard(),
-            'wizard': Wizard(),
-            'merge': MergeWidget(),
-            'split': SplitWidget(),
-            'compress': CompressWidget(),
-            'convert': ConvertWidget(),
-            'security': SecurityWidget(),
-            'ocr': OCRWidget(),
-            'batch': BatchWidget()
-        }
-        
-        # Conectar señales del dashboard
-        self.views['dashboard'].operation_selected.connect(self.navigate_to_view)
-        
-        # Conectar señales del wizard
-        self.views['wizard'].operation_selected.connect(self.navigate_to_view)
-        
-        # Agregar vistas al stacked widget
-        for view_name, view_widget in self.views.items():
-            self.stacked_widget.addWidget(view_widget)
+        # Las vistas se construyen la primera vez que se navega a ellas
+        # (ver VIEW_FACTORIES); aquí solo se guardan las ya creadas
+        self.views = {}
         
         # Agregar widgets al layout principal
         main_layout.addWidget(self.sidebar)
@@ -87,6 +122,25 @@ class MainWindow(QMainWindow):
             }
         """)
     
+    def get_view(self, view_name: str) -> QWidget:
+        """
+        Devuelve una vista, construyéndola si es la primera vez que se pide
+        
+        Args:
+            view_name: Nombre de la vista (clave de VIEW_FACTORIES)
+        """
+        view = self.views.get(view_name)
+        if view is None:
+            view = VIEW_FACTORIES[view_name]()
+            
+            # Dashboard y wizard llevan a otras vistas
+            if hasattr(view, 'operation_selected'):
+                view.operation_selected.connect(self.navigate_to_view)
+            
+            self.views[view_name] = view
+            self.stacked_widget.addWidget(view)
+        return view
+    
     def navigate_to_view(self, view_name: str):
         """
         Cambia la vista actual
@@ -94,10 +148,19 @@ class MainWindow(QMainWindow):
         Args:
             view_name: Nombre de la vista ('dashboard', 'merge', 'split', etc.)
         """
-        if view_name in self.views:
-            self.current_view = view_name
-            self.stacked_widget.setCurrentWidget(self.views[view_name])
-            self.sidebar.set_active_item(view_name)
+        if view_name not in VIEW_FACTORIES:
+            return
+        
+        try:
+            view = self.get_view(view_name)
+        except Exception as e:
+            # Por ejemplo, una dependencia opcional que falta
+            QMessageBox.critical(self, "Error", f"No se pudo abrir la vista: {str(e)}")
+            return
+        
+        self.current_view = view_name
+        self.stacked_widget.setCurrentWidget(view)
+        self.sidebar.set_active_item(view_name)
     
     def get_current_view(self) -> str:
         """Retorna el nombre de la vista actual"""
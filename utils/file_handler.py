@@ -2,39 +2,205 @@
 Manejo de archivos y operaciones del sistema de archivos
 """
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 import os
 import tempfile
 import shutil
+import threading
 from PyPDF2 import PdfReader
+from .pdf_probe import PDFStructureReader, decode_text_string, open_mapped
+from .metadata_cache import MetadataCache
 
 
 class FileHandler:
     """Utilidades para manejo de archivos"""
     
+    _metadata_cache: Optional[MetadataCache] = None
+    _metadata_cache_lock = threading.Lock()
+    
     @staticmethod
-    def validate_pdf_file(file_path: str) -> bool:
+    def metadata_cache() -> MetadataCache:
+        """Caché de metadatos compartida por los helpers (se crea al primer uso)"""
+        with FileHandler._metadata_cache_lock:
+            if FileHandler._metadata_cache is None:
+                FileHandler._metadata_cache = MetadataCache(FileHandler.probe)
+            return FileHandler._metadata_cache
+    
+    @staticmethod
+    def get_metadata(file_path: str) -> dict:
         """
-        Verifica que un archivo sea un PDF válido
+        Metadatos de un archivo a través de la caché
+        
+        Solo se vuelve a analizar el archivo si cambió su tamaño o su fecha
+        de modificación.
         
         Args:
             file_path: Ruta del archivo
             
         Returns:
-            True si es un PDF válido, False en caso contrario
+            Resultado de probe() más exists, size y mtime_ns
+            ({'exists': False} si el archivo no existe)
         """
+        return FileHandler.metadata_cache().get(file_path)
+    
+    @staticmethod
+    def get_metadata_many(file_paths: Iterable[str]) -> Dict[str, dict]:
+        """
+        Metadatos de varios archivos a través de la caché
+        
+        Args:
+            file_paths: Rutas de los archivos
+            
+        Returns:
+            Diccionario {ruta: metadatos} (ver get_metadata)
+        """
+        return FileHandler.metadata_cache().get_many(file_paths)
+    
+    @staticmethod
+    def probe(file_path: str) -> dict:
+        """
+        Obtiene los metadatos de un PDF sin cargar el documento
+        
+        El archivo se mapea en memoria y solo se leen la cabecera, el
+        trailer, las secciones de referencias cruzadas y los pocos objetos
+        necesarios (catálogo, árbol de páginas e /Info), así que el coste no
+        depende del tamaño del archivo. Si la estructura está dañada se
+        recurre a PyPDF2, que la reconstruye.
+        
+        Args:
+            file_path: Ruta del PDF
+        
+        Returns:
+            Diccionario con:
+            {
+                'valid': bool,
+                'version': str o None,    # ej: '1.7'
+                'page_count': int,
+                'encrypted': bool,
+                'linearized': bool,       # y sin modificaciones posteriores
+                'producer': str o None,   # None si está cifrado
+                'file_size': int,
+                'error': str o None
+            }
+        """
+        result = {
+            'valid': False,
+            'version': None,
+            'page_count': 0,
+            'encrypted': False,
+            'linearized': False,
+            'producer': None,
+            'file_size': 0,
+            'error': None
+        }
+        
         try:
+            result['file_size'] = os.path.getsize(file_path)
             with open(file_path, 'rb') as f:
                 # Verificar magic bytes del PDF
-                header = f.read(5)
-                if not header.startswith(b'%PDF-'):
-                    return False
+                if b'%PDF-' not in f.read(1024):
+                    result['error'] = "El archivo no es un PDF"
+                    return result
+        except OSError as e:
+            result['error'] = str(e)
+            return result
+        
+        f, data = open_mapped(file_path)
+        reader = None
+        try:
+            reader = PDFStructureReader(data)
+            result.update(FileHandler._probe_structure(reader, result['file_size']))
+        except Exception:
+            if reader is not None and '/Encrypt' in reader.trailer:
+                # Catálogo dentro de un stream de objetos cifrado: PyPDF2 lo
+                # descifra si la contraseña de usuario está vacía; si no,
+                # no se pueden contar las páginas
+                fallback = FileHandler._probe_with_reader(file_path)
+                if fallback.get('valid') and fallback.get('page_count'):
+                    result.update(fallback)
+                else:
+                    result.update({
+                        'valid': True,
+                        'encrypted': True,
+                        'version': reader.header_version()
+                    })
+            else:
+                # Estructura dañada o no soportada: PyPDF2 reconstruye la tabla
+                result.update(FileHandler._probe_with_reader(file_path))
+        finally:
+            data.close()
+            f.close()
+        
+        return result
+    
+    @staticmethod
+    def _probe_structure(reader: PDFStructureReader, file_size: int) -> dict:
+        """Metadatos a partir del trailer, el catálogo y el árbol de páginas"""
+        trailer = reader.trailer
+        catalog = reader.resolve(trailer['/Root'])
+        pages = reader.resolve(catalog['/Pages'])
+        encrypted = '/Encrypt' in trailer
+        
+        # /Version del catálogo prevalece sobre la cabecera si es posterior
+        version = reader.header_version()
+        catalog_version = reader.resolve(catalog.get('/Version'))
+        if isinstance(catalog_version, str) and catalog_version.lstrip('/') > (version or ''):
+            version = catalog_version.lstrip('/')
+        
+        # Las cadenas de /Info van cifradas si el documento lo está
+        producer = None
+        info = reader.resolve(trailer.get('/Info'))
+        if isinstance(info, dict) and not encrypted:
+            producer = decode_text_string(reader.resolve(info.get('/Producer')))
+        
+        # La linealización solo es válida si el archivo no se modificó después
+        linearization = reader.linearization()
+        
+        return {
+            'valid': True,
+            'version': version,
+            'page_count': int(reader.resolve(pages['/Count'])),
+            'encrypted': encrypted,
+            'linearized': bool(linearization) and linearization.get('/L') == file_size,
+            'producer': producer
+        }
+    
+    @staticmethod
+    def _probe_with_reader(file_path: str) -> dict:
+        """Metadatos con PyPDF2 para archivos con la estructura dañada"""
+        try:
+            reader = PdfReader(file_path, strict=False)
+        except Exception as e:
+            return {'valid': False, 'error': str(e)}
+        
+        result = {
+            'valid': True,
+            'version': reader.pdf_header.replace('%PDF-', '') or None,
+            'encrypted': reader.is_encrypted
+        }
+        try:
+            if reader.is_encrypted:
+                # Muchos PDFs cifrados solo restringen permisos (contraseña vacía)
+                reader.decrypt('')
+            result['page_count'] = len(reader.pages)
+            if not reader.is_encrypted and reader.metadata:
+                result['producer'] = reader.metadata.get('/Producer')
+        except Exception:
+            pass
+        return result
+    
+    @staticmethod
+    def validate_pdf_file(file_path: str) -> bool:
+        """
+        Verifica que un archivo sea un PDF válido
+        
+        Args:
+            file_path: Ruta del archivo
             
-            # Intentar abrir con PyPDF2
-            PdfReader(file_path)
-            return True
-        except:
-            return False
+        Returns:
+            True si es un PDF válido, False en caso contrario
+        """
+        return FileHandler.get_metadata(file_path).get('valid', False)
     
     @staticmethod
     def get_file_size_mb(file_path: str) -> float:
@@ -144,11 +310,7 @@ class FileHandler:
         Returns:
             Número de páginas
         """
-        try:
-            reader = PdfReader(file_path)
-            return len(reader.pages)
-        except:
-            return 0
+        return FileHandler.get_metadata(file_path).get('page_count', 0)
     
     @staticmethod
     def validate_file_extensions(
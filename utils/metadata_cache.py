@@ -0,0 +1,177 @@
+"""
+Caché de metadatos de archivos
+Evita volver a analizar archivos que no han cambiado desde la última vez
+"""
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+from config.settings import settings
+
+
+class MetadataCache:
+    """
+    Caché de metadatos por archivo, en memoria y opcionalmente en SQLite
+    
+    Cada entrada se guarda con el tamaño y la fecha de modificación (en
+    nanosegundos) del archivo: si cualquiera de los dos cambia, la entrada
+    deja de valer y los metadatos se vuelven a calcular. Comprobar un
+    archivo cuesta solo un stat(). Es segura entre hilos.
+    """
+    
+    def __init__(
+        self,
+        loader: Callable[[str], dict],
+        path: Optional[str] = None,
+        persist: Optional[bool] = None
+    ):
+        """
+        Args:
+            loader: Función que calcula los metadatos de un archivo
+            path: Archivo SQLite (None = settings.METADATA_CACHE_PATH)
+            persist: Guardar también en SQLite (None = settings.METADATA_CACHE_PERSIST)
+        """
+        self.loader = loader
+        self.persist = settings.METADATA_CACHE_PERSIST if persist is None else persist
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.Lock()
+        self._memory: Dict[str, tuple] = {}
+        self._conn = None
+        
+        if self.persist:
+            if path is None:
+                Path(settings.METADATA_CACHE_PATH).parent.mkdir(parents=True, exist_ok=True)
+                path = str(settings.METADATA_CACHE_PATH)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS file_metadata ('
+                ' path TEXT PRIMARY KEY,'
+                ' size INTEGER NOT NULL,'
+                ' mtime_ns INTEGER NOT NULL,'
+                ' metadata TEXT NOT NULL)'
+            )
+            self._conn.commit()
+    
+    def get(self, file_path: str) -> dict:
+        """
+        Metadatos de un archivo
+        
+        Returns:
+            Metadatos del loader más exists, size y mtime_ns
+            ({'exists': False} si el archivo no existe)
+        """
+        return self.get_many([file_path])[file_path]
+    
+    def get_many(self, file_paths: Iterable[str]) -> Dict[str, dict]:
+        """
+        Metadatos de varios archivos (las entradas nuevas se guardan de una vez)
+        
+        Returns:
+            Diccionario {ruta: metadatos} con las rutas tal como se pasaron
+        """
+        results = {}
+        new_rows = []
+        
+        for file_path in file_paths:
+            key = os.path.abspath(file_path)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                results[file_path] = {'exists': False}
+                continue
+            
+            version = (stat.st_size, stat.st_mtime_ns)
+            metadata = self._lookup(key, version)
+            if metadata is None:
+                metadata = dict(self.loader(file_path))
+                metadata.update(exists=True, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                with self._lock:
+                    self.misses += 1
+                    self._memory[key] = (version, metadata)
+                new_rows.append((key, stat.st_size, stat.st_mtime_ns, json.dumps(metadata)))
+            
+            results[file_path] = dict(metadata)
+        
+        if new_rows and self._conn is not None:
+            with self._lock:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO file_metadata (path, size, mtime_ns, metadata) '
+                    'VALUES (?, ?, ?, ?)',
+                    new_rows
+                )
+                self._conn.commit()
+        
+        return results
+    
+    def _lookup(self, key: str, version: tuple) -> Optional[dict]:
+        """Busca una entrada vigente en memoria y después en SQLite"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            
+            if self._conn is None:
+                return None
+            
+            row = self._conn.execute(
+                'SELECT metadata FROM file_metadata WHERE path = ? AND size = ? AND mtime_ns = ?',
+                (key, *version)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            metadata = json.loads(row[0])
+            self._memory[key] = (version, metadata)
+            self.hits += 1
+            return metadata
+    
+    def invalidate(self, file_path: str):
+        """Elimina la entrada de un archivo"""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM file_metadata WHERE path = ?', (key,))
+                self._conn.commit()
+    
+    def stats(self) -> dict:
+        """
+        Estadísticas de la caché
+        
+        Returns:
+            Diccionario con hits, misses, entries (en memoria) y persisted
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._memory),
+                'persisted': self._conn is not None
+            }
+    
+    def clear(self):
+        """Elimina todas las entradas"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM file_metadata')
+                self._conn.commit()
+    
+    def close(self):
+        """Cierra la conexión con la base de datos"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
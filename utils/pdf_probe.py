@@ -0,0 +1,414 @@
+"""
+Lectura estructural de PDFs
+Lee solo la cabecera, el trailer, la tabla de referencias cruzadas y los
+objetos imprescindibles de un PDF mapeado en memoria, sin cargar el documento
+"""
+import mmap
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+from PyPDF2.filters import FlateDecode
+
+
+_WHITESPACE = b'\x00\t\n\x0c\r '
+_DELIMITERS = b'()<>[]{}/%'
+
+_HEADER_RE = re.compile(rb'%PDF-(\d\.\d)')
+_STARTXREF_RE = re.compile(rb'startxref\s+(\d+)')
+_OBJECT_RE = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+_SUBSECTION_RE = re.compile(rb'\s*(\d+)\s+(\d+)[ \t]*\r?\n?')
+_NUMBER_RE = re.compile(rb'[+-]?(?:\d+\.?\d*|\.\d+)')
+_REFERENCE_RE = re.compile(rb'\s+(\d+)\s+R(?=[\x00\t\n\x0c\r ()<>\[\]{}/%]|$)')
+
+# Bytes del final del archivo donde se busca startxref
+_TAIL_SIZE = 2048
+
+# Bytes del principio del archivo donde se buscan la cabecera y la
+# linealización
+_HEAD_SIZE = 1024
+
+
+class Reference(tuple):
+    """Referencia indirecta (número, generación)"""
+
+
+class PDFStructureReader:
+    """
+    Lector mínimo de la estructura de un PDF
+    
+    Las secciones de referencias cruzadas (tablas clásicas y streams de
+    referencias) se recorren siguiendo /Prev, pero sus entradas no se
+    cargan: cada objeto se localiza calculando la posición de su entrada.
+    Solo se leen los objetos que se piden.
+    """
+    
+    def __init__(self, data):
+        """
+        Args:
+            data: Contenido del PDF (mmap o bytes)
+        """
+        self.data = data
+        self.sections = []
+        self.trailer = {}
+        self._object_streams: Dict[int, Tuple[bytes, List[int]]] = {}
+        self._read_xref_chain()
+    
+    # ==================== CABECERA Y TRAILER ====================
+    
+    def header_version(self) -> Optional[str]:
+        """Versión declarada en la cabecera %PDF-x.y"""
+        match = _HEADER_RE.search(self.data, 0, _HEAD_SIZE)
+        return match.group(1).decode() if match else None
+    
+    def linearization(self) -> Optional[dict]:
+        """Diccionario de linealización (primer objeto del archivo) o None"""
+        match = _OBJECT_RE.search(self.data, 0, _HEAD_SIZE)
+        if match is None:
+            return None
+        value, _ = self.parse(match.end())
+        if isinstance(value, dict) and '/Linearized' in value:
+            return value
+        return None
+    
+    def _read_xref_chain(self):
+        """Recorre las secciones de referencias cruzadas desde la más reciente"""
+        size = len(self.data)
+        tail_start = max(0, size - _TAIL_SIZE)
+        position = self.data.rfind(b'startxref', tail_start)
+        match = _STARTXREF_RE.match(self.data, position) if position >= 0 else None
+        if match is None:
+            raise ValueError("No se encontró startxref")
+        
+        offset = int(match.group(1))
+        visited = set()
+        while offset is not None and offset not in visited:
+            visited.add(offset)
+            trailer = self._read_section(offset)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            
+            # Archivos híbridos: el stream de referencias complementa la tabla
+            if isinstance(trailer.get('/XRefStm'), int):
+                self._read_section(trailer['/XRefStm'])
+            
+            prev = trailer.get('/Prev')
+            offset = prev if isinstance(prev, int) else None
+    
+    def _read_section(self, offset: int) -> dict:
+        """Registra una sección (tabla clásica o stream) y devuelve su trailer"""
+        position = self._skip_whitespace(offset)
+        if self.data[position:position + 4] == b'xref':
+            return self._read_table(position + 4)
+        return self._read_xref_stream(position)
+    
+    def _read_table(self, position: int) -> dict:
+        """Localiza las subsecciones de una tabla clásica sin leer sus entradas"""
+        subsections = []
+        while True:
+            position = self._skip_whitespace(position)
+            if self.data[position:position + 7] == b'trailer':
+                break
+            match = _SUBSECTION_RE.match(self.data, position)
+            if match is None:
+                raise ValueError("Tabla de referencias cruzadas inválida")
+            
+            first, count = int(match.group(1)), int(match.group(2))
+            start = self._skip_whitespace(match.end())
+            # Las entradas miden 20 bytes; algunos generadores escriben 19
+            entry_size = 20 if self.data[start + 19:start + 20] in (b'\r', b'\n') else 19
+            subsections.append((first, count, start, entry_size))
+            position = start + count * entry_size
+        
+        self.sections.append(('table', subsections))
+        trailer, _ = self.parse(position + 7)
+        return trailer
+    
+    def _read_xref_stream(self, position: int) -> dict:
+        """Registra un stream de referencias cruzadas (PDF 1.5+)"""
+        _, value, data = self._read_indirect(position)
+        if not isinstance(value, dict) or value.get('/Type') != '/XRef':
+            raise ValueError("Stream de referencias cruzadas inválido")
+        
+        widths = value['/W']
+        index = value.get('/Index', [0, value['/Size']])
+        ranges = []
+        row = 0
+        for i in range(0, len(index), 2):
+            ranges.append((index[i], index[i + 1], row))
+            row += index[i + 1]
+        
+        self.sections.append(('stream', (ranges, widths, data)))
+        return value
+    
+    def _lookup(self, number: int) -> Optional[tuple]:
+        """
+        Busca la entrada de un objeto en las secciones (la más reciente manda)
+        
+        Returns:
+            (1, offset) para objetos sueltos, (2, stream, índice) para objetos
+            dentro de un stream de objetos, o None si está libre o no existe
+        """
+        for kind, section in self.sections:
+            if kind == 'table':
+                for first, count, start, entry_size in section:
+                    if first <= number < first + count:
+                        position = start + (number - first) * entry_size
+                        entry = self.data[position:position + 18]
+                        if entry[17:18] == b'n':
+                            return (1, int(entry[:10]))
+                        return None
+            else:
+                ranges, widths, data = section
+                row_size = sum(widths)
+                for first, count, row in ranges:
+                    if first <= number < first + count:
+                        start = (row + number - first) * row_size
+                        fields = []
+                        for width in widths:
+                            fields.append(int.from_bytes(data[start:start + width], 'big'))
+                            start += width
+                        kind_field = fields[0] if widths[0] else 1
+                        if kind_field == 1:
+                            return (1, fields[1])
+                        if kind_field == 2:
+                            return (2, fields[1], fields[2])
+                        return None
+        return None
+    
+    # ==================== OBJETOS ====================
+    
+    def resolve(self, value):
+        """Devuelve el objeto apuntado si `value` es una referencia indirecta"""
+        depth = 0
+        while isinstance(value, Reference) and depth < 32:
+            value = self.get_object(value[0])
+            depth += 1
+        return value
+    
+    def get_object(self, number: int):
+        """Lee un objeto por su número (None si no existe)"""
+        entry = self._lookup(number)
+        if entry is None:
+            return None
+        
+        if entry[0] == 1:
+            _, value, _ = self._read_indirect(entry[1], with_stream=False)
+            return value
+        
+        _, stream_number, index = entry
+        data, offsets = self._object_stream(stream_number)
+        value, _ = self.parse(offsets[index], data)
+        return value
+    
+    def _object_stream(self, number: int) -> Tuple[bytes, List[int]]:
+        """Descomprime un stream de objetos y calcula la posición de cada objeto"""
+        if number not in self._object_streams:
+            entry = self._lookup(number)
+            if entry is None or entry[0] != 1:
+                raise ValueError(f"Stream de objetos {number} no encontrado")
+            _, value, data = self._read_indirect(entry[1])
+            first = value['/First']
+            
+            offsets = []
+            position = 0
+            for i in range(value['/N']):
+                _, position = self.parse(position, data)
+                offset, position = self.parse(position, data)
+                offsets.append(first + offset)
+            self._object_streams[number] = (data, offsets)
+        return self._object_streams[number]
+    
+    def _read_indirect(self, position: int, with_stream: bool = True):
+        """
+        Lee 'n g obj ... endobj' en una posición
+        
+        Returns:
+            Tupla (número, valor, datos del stream decodificados o None)
+        """
+        match = _OBJECT_RE.match(self.data, position)
+        if match is None:
+            raise ValueError(f"No hay ningún objeto en la posición {position}")
+        
+        value, position = self.parse(match.end())
+        stream = None
+        position = self._skip_whitespace(position)
+        if with_stream and isinstance(value, dict) and self.data[position:position + 6] == b'stream':
+            position += 6
+            if self.data[position:position + 2] == b'\r\n':
+                position += 2
+            elif self.data[position:position + 1] in (b'\n', b'\r'):
+                position += 1
+            length = self.resolve(value.get('/Length'))
+            stream = self._decode(bytes(self.data[position:position + length]), value)
+        
+        return int(match.group(1)), value, stream
+    
+    def _decode(self, data: bytes, value: dict) -> bytes:
+        """Aplica los filtros del stream (solo FlateDecode, con predictores)"""
+        filters = self.resolve(value.get('/Filter'))
+        params = self.resolve(value.get('/DecodeParms'))
+        if filters is None:
+            return data
+        if not isinstance(filters, list):
+            filters, params = [filters], [params]
+        elif not isinstance(params, list):
+            params = [params] * len(filters)
+        
+        for name, parms in zip(filters, params):
+            if name != '/FlateDecode':
+                raise ValueError(f"Filtro no soportado: {name}")
+            if parms:
+                data = FlateDecode.decode(data, parms)
+            else:
+                data = zlib.decompress(data)
+        return data
+    
+    # ==================== ANÁLISIS LÉXICO ====================
+    
+    def _skip_whitespace(self, position: int, data=None) -> int:
+        """Salta espacios y comentarios"""
+        data = self.data if data is None else data
+        size = len(data)
+        while position < size:
+            char = data[position]
+            if char in _WHITESPACE:
+                position += 1
+            elif char == 0x25:  # %
+                while position < size and data[position] not in b'\r\n':
+                    position += 1
+            else:
+                break
+        return position
+    
+    def parse(self, position: int, data=None):
+        """
+        Lee un objeto directo
+        
+        Los nombres se devuelven como str con la barra ('/Type'), las cadenas
+        como bytes y las referencias como Reference.
+        
+        Returns:
+            Tupla (valor, posición siguiente)
+        """
+        data = self.data if data is None else data
+        position = self._skip_whitespace(position, data)
+        char = data[position:position + 1]
+        
+        if data[position:position + 2] == b'<<':
+            result = {}
+            position += 2
+            while True:
+                position = self._skip_whitespace(position, data)
+                if data[position:position + 2] == b'>>':
+                    return result, position + 2
+                key, position = self.parse(position, data)
+                value, position = self.parse(position, data)
+                if isinstance(key, str):
+                    result[key] = value
+        
+        if char == b'[':
+            result = []
+            position += 1
+            while True:
+                position = self._skip_whitespace(position, data)
+                if data[position:position + 1] == b']':
+                    return result, position + 1
+                value, position = self.parse(position, data)
+                result.append(value)
+        
+        if char == b'/':
+            end = position + 1
+            while end < len(data) and data[end] not in _WHITESPACE and data[end] not in _DELIMITERS:
+                end += 1
+            name = re.sub(
+                rb'#([0-9a-fA-F]{2})', lambda m: bytes([int(m.group(1), 16)]), data[position:end]
+            )
+            return name.decode('latin-1'), end
+        
+        if char == b'(':
+            return self._parse_literal(position + 1, data)
+        
+        if char == b'<':
+            end = data.find(b'>', position)
+            digits = re.sub(rb'[^0-9a-fA-F]', b'', data[position + 1:end])
+            if len(digits) % 2:
+                digits += b'0'
+            return bytes.fromhex(digits.decode()), end + 1
+        
+        match = _NUMBER_RE.match(data, position)
+        if match:
+            token = match.group()
+            if b'.' in token:
+                return float(token), match.end()
+            reference = _REFERENCE_RE.match(data, match.end())
+            if reference:
+                return Reference((int(token), int(reference.group(1)))), reference.end()
+            return int(token), match.end()
+        
+        for keyword, value in ((b'true', True), (b'false', False), (b'null', None)):
+            if data[position:position + len(keyword)] == keyword:
+                return value, position + len(keyword)
+        
+        raise ValueError(f"Token inesperado en la posición {position}")
+    
+    @staticmethod
+    def _parse_literal(position: int, data) -> Tuple[bytes, int]:
+        """Lee una cadena literal (...) con paréntesis anidados y escapes"""
+        escapes = {ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b', ord('f'): b'\f'}
+        result = bytearray()
+        depth = 1
+        while True:
+            char = data[position]
+            position += 1
+            if char == 0x5c:  # \
+                char = data[position]
+                position += 1
+                if char in escapes:
+                    result += escapes[char]
+                elif 0x30 <= char <= 0x37:
+                    digits = bytes([char])
+                    while len(digits) < 3 and 0x30 <= data[position] <= 0x37:
+                        digits += bytes([data[position]])
+                        position += 1
+                    result.append(int(digits, 8) & 0xff)
+                elif char == 0x0d:
+                    if data[position] == 0x0a:
+                        position += 1
+                elif char != 0x0a:
+                    result.append(char)
+            elif char == 0x28:  # (
+                depth += 1
+                result.append(char)
+            elif char == 0x29:  # )
+                depth -= 1
+                if depth == 0:
+                    return bytes(result), position
+                result.append(char)
+            else:
+                result.append(char)
+
+
+def decode_text_string(value) -> Optional[str]:
+    """Convierte una cadena de texto PDF (UTF-16BE con BOM o PDFDocEncoding)"""
+    if not isinstance(value, bytes):
+        return None
+    if value.startswith(b'\xfe\xff'):
+        return value[2:].decode('utf-16-be', errors='replace')
+    if value.startswith(b'\xef\xbb\xbf'):
+        return value[3:].decode('utf-8', errors='replace')
+    return value.decode('latin-1')
+
+
+def open_mapped(file_path: str):
+    """
+    Mapea un archivo en memoria en modo solo lectura
+    
+    Returns:
+        Tupla (archivo, mmap); ambos deben cerrarse
+    """
+    f = open(file_path, 'rb')
+    try:
+        return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception:
+        f.close()
+        raise
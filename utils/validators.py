@@ -3,6 +3,7 @@ Validadores para diferentes tipos de entrada
 """
 from typing import List, Tuple, Optional
 import re
+from backend.page_selection import PageSelection
 
 
 class Validators:
@@ -37,44 +38,29 @@ class Validators:
         return True, None
     
     @staticmethod
-    def parse_page_specification(spec: str) -> Tuple[bool, Optional[List[int]], Optional[str]]:
+    def parse_page_specification(
+        spec: str,
+        total_pages: Optional[int] = None
+    ) -> Tuple[bool, Optional[PageSelection], Optional[str]]:
         """
         Parsea y valida especificación de páginas
         
+        La validación trabaja sobre los rangos, sin expandir cada página, por
+        lo que "1-2000000" cuesta lo mismo que "1-2".
+        
         Args:
-            spec: Especificación (ej: "1,3,5-8,12")
+            spec: Especificación (ej: "1,3,5-8,12", "10-1", "1-20:2", "odd", "last")
+            total_pages: Número de páginas del documento (None = validar solo
+                la sintaxis)
             
         Returns:
-            Tupla (es_valido, lista_paginas, mensaje_error)
+            Tupla (es_valido, seleccion, mensaje_error)
         """
-        if not spec or not spec.strip():
-            return False, None, "La especificación no puede estar vacía"
-        
         try:
-            pages = set()
-            parts = spec.split(',')
-            
-            for part in parts:
-                part = part.strip()
-                
-                if '-' in part:
-                    # Rango
-                    range_parts = part.split('-')
-                    if len(range_parts) != 2:
-                        return False, None, f"Rango inválido: {part}"
-                    
-                    start = int(range_parts[0].strip())
-                    end = int(range_parts[1].strip())
-                    
-                    if start > end:
-                        return False, None, f"Rango inválido {part}: inicio > fin"
-                    
-                    pages.update(range(start, end + 1))
-                else:
-                    # Página individual
-                    pages.add(int(part))
-            
-            return True, sorted(list(pages)), None
+            selection = PageSelection.parse(spec)
+            if total_pages is not None:
+                selection.ranges(total_pages)
+            return True, selection, None
             
         except ValueError as e:
             return False, None, f"Formato inválido: {str(e)}"